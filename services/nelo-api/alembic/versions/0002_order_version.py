@@ -0,0 +1,32 @@
+"""Add a version counter to orders.
+
+Revision ID: 0002_order_version
+Revises: 0001_baseline
+Create Date: 2026-10-19
+
+Incremented by every status transition, so that clients can send the version
+they displayed and have a concurrent change rejected instead of overwritten.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_order_version"
+down_revision: Union[str, None] = "0001_baseline"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "orders",
+        sa.Column("version", sa.Integer(), nullable=False, server_default="1"),
+        schema="orders",
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("orders", "version", schema="orders")
@@ -0,0 +1,233 @@
+"""Partition orders and status history by month, with archive tables.
+
+Revision ID: 0003_order_partitions
+Revises: 0002_order_version
+Create Date: 2026-10-19
+
+``orders.orders`` and ``orders.order_status_history`` become partitioned by
+``created_at`` (one partition per month), so that queries bounded by date
+only scan recent months. They have no default partition: the worker creates
+partitions months ahead, and detaches emptied ones concurrently (which a
+default partition forbids). Closed orders older than
+``ORDER_ARCHIVE_AFTER_MONTHS`` are moved by the worker to
+``orders.orders_archive`` / ``orders.order_status_history_archive`` (one
+partition per year, optionally in a cold tablespace).
+
+A primary key of a partitioned table must include the partition key: keys
+become (id, created_at), and the foreign keys to ``orders.orders(id)`` are
+dropped (order ids stay unique UUIDs, as for the other modules). References
+are only unique per ``created_at``: the application checks new references
+against both tables.
+
+The status index is replaced by partial indexes on active statuses, which
+stay small as delivered orders accumulate.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_order_partitions"
+down_revision: Union[str, None] = "0002_order_version"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ACTIVE_STATUSES = "('pending', 'confirmed', 'preparing', 'ready', 'picked_up', 'delivering')"
+
+ORDER_FOREIGN_KEYS = [
+    ("order_items", "order_items_order_id_fkey", "ON DELETE CASCADE"),
+    ("order_status_history", "order_status_history_order_id_fkey", "ON DELETE CASCADE"),
+    ("ratings", "ratings_order_id_fkey", "ON DELETE CASCADE"),
+    ("user_promotions", "user_promotions_order_id_fkey", ""),
+]
+
+PROVIDER_FOREIGN_KEY = "orders_provider_id_fkey"
+
+ENSURE_PARTITIONS = """
+CREATE OR REPLACE FUNCTION orders.ensure_partitions(
+    parent TEXT,
+    period TEXT,
+    from_date DATE,
+    to_date DATE,
+    tablespace TEXT DEFAULT NULL
+) RETURNS INTEGER AS $$
+DECLARE
+    start_date DATE := date_trunc(period, from_date)::date;
+    end_date DATE;
+    partition_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    WHILE start_date <= to_date LOOP
+        end_date := (start_date + ('1 ' || period)::interval)::date;
+        partition_name := parent || '_' || to_char(
+            start_date, CASE period WHEN 'year' THEN 'YYYY' ELSE 'YYYYMM' END
+        );
+        IF to_regclass(format('orders.%I', partition_name)) IS NULL THEN
+            -- Created, then attached: ATTACH only takes a SHARE UPDATE
+            -- EXCLUSIVE lock on the parent, which does not block queries
+            EXECUTE format(
+                'CREATE TABLE orders.%I '
+                || '(LIKE orders.%I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)%s',
+                partition_name, parent,
+                CASE WHEN tablespace IS NULL THEN '' ELSE format(' TABLESPACE %I', tablespace) END
+            );
+            EXECUTE format(
+                'ALTER TABLE orders.%I ATTACH PARTITION orders.%I FOR VALUES FROM (%L) TO (%L)',
+                parent, partition_name, start_date, end_date
+            );
+            created := created + 1;
+        END IF;
+        start_date := end_date;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    for table, constraint, _ in ORDER_FOREIGN_KEYS:
+        op.execute(f"ALTER TABLE orders.{table} DROP CONSTRAINT IF EXISTS {constraint}")
+
+    op.execute(ENSURE_PARTITIONS)
+
+    # Orders
+    op.execute("ALTER TABLE orders.orders RENAME TO orders_legacy")
+    op.execute("UPDATE orders.orders_legacy SET created_at = now() WHERE created_at IS NULL")
+    op.execute("""
+        CREATE TABLE orders.orders (
+            LIKE orders.orders_legacy INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+            PRIMARY KEY (id, created_at),
+            UNIQUE (reference, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("ALTER TABLE orders.orders ALTER COLUMN created_at SET NOT NULL")
+
+    # Status history
+    op.execute("ALTER TABLE orders.order_status_history RENAME TO order_status_history_legacy")
+    op.execute(
+        "UPDATE orders.order_status_history_legacy SET created_at = now() WHERE created_at IS NULL"
+    )
+    op.execute("""
+        CREATE TABLE orders.order_status_history (
+            LIKE orders.order_status_history_legacy INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("ALTER TABLE orders.order_status_history ALTER COLUMN created_at SET NOT NULL")
+
+    # Monthly partitions from the oldest row to 3 months ahead
+    for table in ("orders", "order_status_history"):
+        op.execute(f"""
+            SELECT orders.ensure_partitions(
+                '{table}', 'month',
+                COALESCE((SELECT min(created_at) FROM orders.{table}_legacy), now())::date,
+                GREATEST(
+                    (SELECT max(created_at) FROM orders.{table}_legacy),
+                    now() + interval '3 months'
+                )::date
+            )
+        """)
+        op.execute(f"INSERT INTO orders.{table} SELECT * FROM orders.{table}_legacy")
+        op.execute(f"DROP TABLE orders.{table}_legacy")
+
+    # LIKE does not copy foreign keys (outgoing ones are allowed on partitioned tables)
+    op.execute(f"""
+        ALTER TABLE orders.orders ADD CONSTRAINT {PROVIDER_FOREIGN_KEY}
+        FOREIGN KEY (provider_id) REFERENCES orders.providers(id)
+    """)
+
+    op.execute("CREATE INDEX idx_orders_orders_user ON orders.orders(user_id, created_at DESC)")
+    op.execute(
+        "CREATE INDEX idx_orders_orders_provider ON orders.orders(provider_id, created_at DESC)"
+    )
+    op.execute("CREATE INDEX idx_orders_orders_reference ON orders.orders(reference)")
+    op.execute("CREATE INDEX idx_orders_orders_created ON orders.orders(created_at DESC)")
+    op.execute(f"""
+        CREATE INDEX idx_orders_orders_active ON orders.orders(provider_id, created_at)
+        WHERE status IN {ACTIVE_STATUSES}
+    """)
+    op.execute(f"""
+        CREATE INDEX idx_orders_orders_active_status ON orders.orders(status, created_at)
+        WHERE status IN {ACTIVE_STATUSES}
+    """)
+    op.execute(
+        "CREATE INDEX idx_orders_status_history_order "
+        "ON orders.order_status_history(order_id, created_at)"
+    )
+    op.execute("""
+        CREATE TRIGGER trg_orders_orders_updated BEFORE UPDATE ON orders.orders
+        FOR EACH ROW EXECUTE FUNCTION update_updated_at_column()
+    """)
+
+    # Archive (cold) tables, one partition per year
+    op.execute("""
+        CREATE TABLE orders.orders_archive (
+            LIKE orders.orders INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("""
+        CREATE TABLE orders.order_status_history_archive (
+            LIKE orders.order_status_history INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    for table in ("orders_archive", "order_status_history_archive"):
+        op.execute(f"CREATE TABLE orders.{table}_default PARTITION OF orders.{table} DEFAULT")
+    op.execute(
+        "CREATE INDEX idx_orders_archive_user ON orders.orders_archive(user_id, created_at DESC)"
+    )
+    op.execute(
+        "CREATE INDEX idx_orders_archive_provider "
+        "ON orders.orders_archive(provider_id, created_at DESC)"
+    )
+    op.execute(
+        "CREATE INDEX idx_orders_archive_reference ON orders.orders_archive(reference)"
+    )
+    op.execute(
+        "CREATE INDEX idx_orders_status_history_archive_order "
+        "ON orders.order_status_history_archive(order_id)"
+    )
+
+
+def downgrade() -> None:
+    # Archived orders are moved back into plain tables
+    for table, archive in (
+        ("orders", "orders_archive"),
+        ("order_status_history", "order_status_history_archive"),
+    ):
+        op.execute(f"ALTER TABLE orders.{table} RENAME TO {table}_partitioned")
+        op.execute(f"""
+            CREATE TABLE orders.{table} (
+                LIKE orders.{table}_partitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+                PRIMARY KEY (id)
+            )
+        """)
+        op.execute(f"INSERT INTO orders.{table} SELECT * FROM orders.{table}_partitioned")
+        op.execute(f"INSERT INTO orders.{table} SELECT * FROM orders.{archive}")
+        op.execute(f"DROP TABLE orders.{table}_partitioned")
+        op.execute(f"DROP TABLE orders.{archive}")
+
+    op.execute("ALTER TABLE orders.orders ADD UNIQUE (reference)")
+    op.execute(f"""
+        ALTER TABLE orders.orders ADD CONSTRAINT {PROVIDER_FOREIGN_KEY}
+        FOREIGN KEY (provider_id) REFERENCES orders.providers(id)
+    """)
+    op.execute("CREATE INDEX idx_orders_orders_user ON orders.orders(user_id)")
+    op.execute("CREATE INDEX idx_orders_orders_provider ON orders.orders(provider_id)")
+    op.execute("CREATE INDEX idx_orders_orders_status ON orders.orders(status)")
+    op.execute("CREATE INDEX idx_orders_orders_reference ON orders.orders(reference)")
+    op.execute("CREATE INDEX idx_orders_orders_created ON orders.orders(created_at DESC)")
+    op.execute("""
+        CREATE TRIGGER trg_orders_orders_updated BEFORE UPDATE ON orders.orders
+        FOR EACH ROW EXECUTE FUNCTION update_updated_at_column()
+    """)
+    op.execute("DROP FUNCTION IF EXISTS orders.ensure_partitions(TEXT, TEXT, DATE, DATE, TEXT)")
+
+    for table, constraint, on_delete in ORDER_FOREIGN_KEYS:
+        op.execute(
+            f"ALTER TABLE orders.{table} ADD CONSTRAINT {constraint} "
+            f"FOREIGN KEY (order_id) REFERENCES orders.orders(id) {on_delete}"
+        )
@@ -0,0 +1,128 @@
+"""Running rating sums and delivery counts for providers and drivers.
+
+Revision ID: 0004_rating_aggregates
+Revises: 0003_order_partitions
+Create Date: 2026-10-19
+
+``average_rating`` of providers and drivers is kept from a running sum and
+count, updated in the statement that inserts a rating. Drivers also count
+failed deliveries, from which ``completion_rate`` is derived. Existing
+values are recomputed from the ratings and deliveries tables.
+
+Providers keep the delivered orders already archived in ``archived_orders``
+(added to as orders are archived), so the reconciliation of ``total_orders``
+does not read the archive.
+
+One rating of each type per order: a second submission is rejected.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004_rating_aggregates"
+down_revision: Union[str, None] = "0003_order_partitions"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "providers",
+        sa.Column("rating_sum", sa.Integer(), nullable=False, server_default="0"),
+        schema="orders",
+    )
+    op.add_column(
+        "providers",
+        sa.Column("archived_orders", sa.Integer(), nullable=False, server_default="0"),
+        schema="orders",
+    )
+    op.add_column(
+        "drivers",
+        sa.Column("rating_sum", sa.Integer(), nullable=False, server_default="0"),
+        schema="deliveries",
+    )
+    op.add_column(
+        "drivers",
+        sa.Column("failed_deliveries", sa.Integer(), nullable=False, server_default="0"),
+        schema="deliveries",
+    )
+
+    op.execute("""
+        CREATE UNIQUE INDEX idx_orders_ratings_order_type
+        ON orders.ratings(order_id, rating_type) WHERE product_id IS NULL
+    """)
+    op.execute("""
+        CREATE INDEX idx_orders_ratings_provider ON orders.ratings(provider_id)
+        WHERE rating_type = 'provider'
+    """)
+    op.execute("""
+        CREATE INDEX idx_orders_ratings_driver ON orders.ratings(driver_id)
+        WHERE rating_type = 'driver'
+    """)
+
+    op.execute("""
+        UPDATE orders.providers p
+        SET rating_sum = s.rating_sum,
+            rating_count = s.rating_count,
+            average_rating = round(s.rating_sum::numeric / s.rating_count, 2)
+        FROM (
+            SELECT provider_id, sum(rating) AS rating_sum, count(*) AS rating_count
+            FROM orders.ratings
+            WHERE rating_type = 'provider'
+            GROUP BY provider_id
+        ) s
+        WHERE p.id = s.provider_id
+    """)
+    op.execute("""
+        UPDATE orders.providers p
+        SET archived_orders = s.archived_orders
+        FROM (
+            SELECT provider_id, count(*) AS archived_orders
+            FROM orders.orders_archive
+            WHERE status IN ('delivered', 'refunded')
+            GROUP BY provider_id
+        ) s
+        WHERE p.id = s.provider_id
+    """)
+    op.execute("""
+        UPDATE deliveries.drivers d
+        SET rating_sum = s.rating_sum,
+            rating_count = s.rating_count,
+            average_rating = round(s.rating_sum::numeric / s.rating_count, 2)
+        FROM (
+            SELECT driver_id, sum(rating) AS rating_sum, count(*) AS rating_count
+            FROM orders.ratings
+            WHERE rating_type = 'driver'
+            GROUP BY driver_id
+        ) s
+        WHERE d.id = s.driver_id
+    """)
+    op.execute("""
+        UPDATE deliveries.drivers d
+        SET failed_deliveries = s.failed,
+            completion_rate = round(
+                100.0 * COALESCE(d.total_deliveries, 0)
+                / GREATEST(COALESCE(d.total_deliveries, 0) + s.failed, 1),
+                2
+            )
+        FROM (
+            SELECT driver_id, count(*) AS failed
+            FROM deliveries.deliveries
+            WHERE status = 'failed'
+            GROUP BY driver_id
+        ) s
+        WHERE d.id = s.driver_id
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS orders.idx_orders_ratings_driver")
+    op.execute("DROP INDEX IF EXISTS orders.idx_orders_ratings_provider")
+    op.execute("DROP INDEX IF EXISTS orders.idx_orders_ratings_order_type")
+    op.drop_column("drivers", "failed_deliveries", schema="deliveries")
+    op.drop_column("drivers", "rating_sum", schema="deliveries")
+    op.drop_column("providers", "archived_orders", schema="orders")
+    op.drop_column("providers", "rating_sum", schema="orders")
@@ -0,0 +1,115 @@
+"""Hourly and daily sales rollups per provider.
+
+Revision ID: 0005_provider_sales_rollups
+Revises: 0004_rating_aggregates
+Create Date: 2026-10-19
+
+Dashboards read order counts, sales, preparation times and cancellations
+from ``orders.provider_sales_hourly`` / ``orders.provider_sales_daily``
+instead of aggregating ``orders.orders``. Orders are counted in the hour
+(UTC) they were created. The worker refreshes the buckets of orders updated
+since ``orders.rollup_watermarks``; existing orders, archived ones included,
+are rolled up here.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005_provider_sales_rollups"
+down_revision: Union[str, None] = "0004_rating_aggregates"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ROLLUP_COLUMNS = """
+    orders_count INTEGER NOT NULL DEFAULT 0,
+    delivered_count INTEGER NOT NULL DEFAULT 0,
+    cancelled_count INTEGER NOT NULL DEFAULT 0,
+    sales_amount BIGINT NOT NULL DEFAULT 0,
+    gross_amount BIGINT NOT NULL DEFAULT 0,
+    prep_time_seconds BIGINT NOT NULL DEFAULT 0,
+    prep_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+"""
+
+
+def upgrade() -> None:
+    op.execute(f"""
+        CREATE TABLE orders.provider_sales_hourly (
+            provider_id UUID NOT NULL,
+            bucket TIMESTAMPTZ NOT NULL,
+            {ROLLUP_COLUMNS},
+            PRIMARY KEY (provider_id, bucket)
+        )
+    """)
+    op.execute(f"""
+        CREATE TABLE orders.provider_sales_daily (
+            provider_id UUID NOT NULL,
+            bucket DATE NOT NULL,
+            {ROLLUP_COLUMNS},
+            PRIMARY KEY (provider_id, bucket)
+        )
+    """)
+    op.execute(
+        "CREATE INDEX idx_orders_provider_sales_hourly_bucket "
+        "ON orders.provider_sales_hourly(bucket)"
+    )
+    op.execute(
+        "CREATE INDEX idx_orders_provider_sales_daily_bucket "
+        "ON orders.provider_sales_daily(bucket)"
+    )
+    op.execute("""
+        CREATE TABLE orders.rollup_watermarks (
+            name VARCHAR(50) PRIMARY KEY,
+            watermark TIMESTAMPTZ NOT NULL
+        )
+    """)
+
+    # Finds the orders changed since the last refresh
+    op.execute("CREATE INDEX idx_orders_orders_updated ON orders.orders(updated_at)")
+
+    op.execute("""
+        INSERT INTO orders.provider_sales_hourly (
+            provider_id, bucket, orders_count, delivered_count, cancelled_count,
+            sales_amount, gross_amount, prep_time_seconds, prep_count
+        )
+        SELECT provider_id, date_trunc('hour', created_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+               count(*),
+               count(*) FILTER (WHERE status = 'delivered'),
+               count(*) FILTER (WHERE status = 'cancelled'),
+               COALESCE(sum(subtotal) FILTER (WHERE status = 'delivered'), 0),
+               COALESCE(sum(total) FILTER (WHERE status = 'delivered'), 0),
+               COALESCE(sum(extract(epoch FROM ready_at - confirmed_at)), 0)::bigint,
+               count(ready_at - confirmed_at)
+        FROM (
+            SELECT provider_id, created_at, status, subtotal, total, confirmed_at, ready_at
+            FROM orders.orders
+            UNION ALL
+            SELECT provider_id, created_at, status, subtotal, total, confirmed_at, ready_at
+            FROM orders.orders_archive
+        ) o
+        GROUP BY 1, 2
+    """)
+    op.execute("""
+        INSERT INTO orders.provider_sales_daily (
+            provider_id, bucket, orders_count, delivered_count, cancelled_count,
+            sales_amount, gross_amount, prep_time_seconds, prep_count
+        )
+        SELECT provider_id, (bucket AT TIME ZONE 'UTC')::date,
+               sum(orders_count), sum(delivered_count), sum(cancelled_count),
+               sum(sales_amount), sum(gross_amount), sum(prep_time_seconds), sum(prep_count)
+        FROM orders.provider_sales_hourly
+        GROUP BY 1, 2
+    """)
+    op.execute(
+        "INSERT INTO orders.rollup_watermarks (name, watermark) "
+        "VALUES ('provider_sales', now())"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS orders.idx_orders_orders_updated")
+    op.execute("DROP TABLE IF EXISTS orders.rollup_watermarks")
+    op.execute("DROP TABLE IF EXISTS orders.provider_sales_daily")
+    op.execute("DROP TABLE IF EXISTS orders.provider_sales_hourly")
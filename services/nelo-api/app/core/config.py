@@ -31,6 +31,11 @@ class Settings(BaseSettings):
     database_pool_size: int = 5
     database_max_overflow: int = 10
     database_echo: bool = False
+    database_replica_urls: str = ""  # Comma-separated list of read replica DSNs
+    database_replica_max_lag_seconds: float = 5.0
+    database_replica_check_interval_seconds: float = 10.0
+    database_read_statement_timeout_ms: int = 5000
+    database_slow_query_threshold_ms: int = 500
 
     # Redis
     redis_url: RedisDsn
@@ -41,6 +46,64 @@ class Settings(BaseSettings):
     jwt_algorithm: str = "HS256"
     access_token_expire_minutes: int = 15
     refresh_token_expire_days: int = 7
+    jwt_verified_cache_size: int = 10000  # Verified token claims kept in memory (0 disables)
+    password_hash_workers: int = 2  # Concurrent Argon2 operations per process
+    principal_cache_local_ttl_seconds: float = 10.0
+    principal_cache_redis_ttl_seconds: int = 60
+    refresh_token_hmac_key: str = ""  # Key for refresh token fingerprints (defaults to secret_key)
+
+    # Rate limiting
+    rate_limit_enabled: bool = True
+
+    # Audit log (batched writer)
+    audit_batch_size: int = 500
+    audit_flush_interval_ms: int = 1000
+    audit_max_backlog: int = 100000  # Records beyond this are dropped
+
+    # Delayed jobs (Redis sorted set)
+    jobs_poll_interval_ms: int = 500
+    jobs_batch_size: int = 100
+    jobs_lease_seconds: int = 60  # A claimed job runs again if not done by then
+    jobs_max_attempts: int = 5
+    jobs_concurrency: int = 20  # Jobs run at once per worker process
+    jobs_timeout_seconds: float = 30.0  # Must stay below the lease
+    jobs_run_in_api: bool = False  # Run jobs in the API process instead of workers
+    worker_metrics_port: int = 9100
+    order_confirmation_timeout_seconds: int = 600  # Auto-cancel unconfirmed orders
+    order_preparation_grace_seconds: int = 600  # Alert past estimated prep time + grace
+    delivery_max_dispatch_rounds: int = 5
+
+    # Live tracking streams (SSE / WebSocket over Redis pub/sub)
+    realtime_queue_size: int = 32  # Pending messages per stream before dropping the oldest
+    tracking_stream_keepalive_seconds: float = 15.0
+    tracking_stream_max_seconds: int = 900  # Clients reconnect (and re-authenticate) after this
+    order_tracking_ttl_seconds: int = 86400  # Redis tracking documents, refreshed on each update
+    provider_order_queue_max_age_seconds: int = 86400  # Older active orders leave the live queue
+
+    # Order partitions (monthly) and archival of closed orders
+    order_partitions_months_ahead: int = 3
+    order_archive_after_months: int = 6  # Closed orders created before then are archived
+    order_archive_batch_size: int = 1000
+    order_archive_tablespace: str = ""  # Cold tablespace for archive partitions
+    order_maintenance_interval_seconds: int = 86400
+    aggregate_reconciliation_interval_seconds: int = 86400  # Provider/driver ratings and counts
+    aggregate_reconciliation_batch_size: int = 500  # Rows locked and reconciled per transaction
+
+    # Provider sales rollups (dashboards)
+    sales_rollup_interval_seconds: int = 60
+    sales_rollup_overlap_seconds: int = 300  # Re-read orders updated this long before the watermark
+
+    # Event loop monitor
+    event_loop_monitor_interval_ms: int = 50
+    event_loop_lag_threshold_ms: int = 100  # Log the blocking stack above this lag
+
+    # Profiling (on-demand request profiler)
+    profiling_token: str = ""  # Value of the X-Profile-Token header; empty disables it
+    profiling_sample_rules: str = ""  # e.g. "/api/v1/orders=0.01,/api/v1/providers=0.05"
+    profiling_interval_ms: float = 5.0
+    profiling_storage_dir: str = ""  # Store profiles on disk instead of Redis
+    profiling_max_profiles: int = 100
+    profiling_ttl_seconds: int = 86400
 
     # CORS
     cors_origins: list[str] = ["*"]
@@ -58,6 +121,15 @@ class Settings(BaseSettings):
         url = str(self.database_url)
         return url.replace("postgresql://", "postgresql+asyncpg://")
 
+    @property
+    def async_database_replica_urls(self) -> list[str]:
+        """Replica URLs converted to postgresql+asyncpg://."""
+        return [
+            url.strip().replace("postgresql://", "postgresql+asyncpg://")
+            for url in self.database_replica_urls.split(",")
+            if url.strip()
+        ]
+
 
 @lru_cache
 def get_settings() -> Settings:
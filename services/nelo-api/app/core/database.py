@@ -1,10 +1,14 @@
 """Database configuration with SQLAlchemy async engine."""
 
-from collections.abc import AsyncGenerator
+import asyncio
+import itertools
+import logging
+from collections.abc import AsyncGenerator, Callable, Iterator
 from contextlib import asynccontextmanager
 
 from sqlalchemy import MetaData, text
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
@@ -12,8 +16,10 @@ from sqlalchemy.ext.asyncio import (
 from sqlalchemy.orm import DeclarativeBase
 
 from app.core.config import get_settings
+from app.core.db_metrics import InstrumentedQueuePool, instrument_engine
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 # Naming convention for constraints (Alembic autogenerate support)
 NAMING_CONVENTION = {
@@ -38,7 +44,10 @@ engine = create_async_engine(
     pool_size=settings.database_pool_size,
     max_overflow=settings.database_max_overflow,
     pool_pre_ping=True,
+    poolclass=InstrumentedQueuePool,
+    pool_logging_name="primary",
 )
+instrument_engine(engine, "primary")
 
 # Session factory
 async_session_factory = async_sessionmaker(
@@ -49,6 +58,133 @@ async_session_factory = async_sessionmaker(
 )
 
 
+# =============================================================================
+# Read replicas
+# =============================================================================
+
+class ReplicaRouter:
+    """
+    Route read-only sessions to healthy replicas.
+
+    Replicas are probed every ``check_interval`` seconds. A replica that fails
+    the probe, or whose replay lag exceeds ``max_lag_seconds``, is taken out of
+    rotation until a later probe succeeds. With no usable replica, reads go to
+    the primary.
+    """
+
+    LAG_QUERY = text("""
+        SELECT CASE
+            WHEN NOT pg_is_in_recovery() THEN 0
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+        END AS lag_seconds
+    """)
+
+    def __init__(
+        self,
+        primary: AsyncEngine,
+        replicas: list[AsyncEngine],
+        max_lag_seconds: float,
+        check_interval: float,
+    ):
+        self.primary = primary
+        self.replicas = replicas
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self._healthy: list[AsyncEngine] = []
+        self._cycle: Iterator[AsyncEngine] = iter(())
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def healthy_count(self) -> int:
+        """Number of replicas currently in rotation."""
+        return len(self._healthy)
+
+    def get_read_engine(self) -> AsyncEngine:
+        """Pick the engine for a read-only session (round-robin over healthy replicas)."""
+        if not self._healthy:
+            return self.primary
+        return next(self._cycle)
+
+    async def check_replica(self, replica: AsyncEngine) -> float | None:
+        """Return the replica lag in seconds, or None if it is unreachable."""
+        try:
+            async with replica.connect() as conn:
+                result = await conn.execute(self.LAG_QUERY)
+                return float(result.scalar_one())
+        except Exception as e:
+            logger.warning(f"Replica health check failed ({replica.url.host}): {e}")
+            return None
+
+    async def refresh(self) -> None:
+        """Probe every replica and rebuild the rotation."""
+        lags = await asyncio.gather(*(self.check_replica(r) for r in self.replicas))
+        healthy = [
+            replica
+            for replica, lag in zip(self.replicas, lags)
+            if lag is not None and lag <= self.max_lag_seconds
+        ]
+        if len(healthy) != len(self._healthy):
+            logger.info(f"Read replicas in rotation: {len(healthy)}/{len(self.replicas)}")
+        self._healthy = healthy
+        self._cycle = itertools.cycle(healthy)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self.refresh()
+
+    async def start(self) -> None:
+        """Run a first probe and start the background health checks."""
+        if not self.replicas or self._task is not None:
+            return
+        await self.refresh()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop health checks and dispose replica engines."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._healthy = []
+        for replica in self.replicas:
+            await replica.dispose()
+
+
+def _create_replica_engine(url: str, name: str) -> AsyncEngine:
+    replica = create_async_engine(
+        url,
+        echo=settings.database_echo,
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
+        pool_pre_ping=True,
+        poolclass=InstrumentedQueuePool,
+        pool_logging_name=name,
+    )
+    instrument_engine(replica, name)
+    return replica
+
+
+replica_router = ReplicaRouter(
+    primary=engine,
+    replicas=[
+        _create_replica_engine(url, f"replica{i}")
+        for i, url in enumerate(settings.async_database_replica_urls)
+    ],
+    max_lag_seconds=settings.database_replica_max_lag_seconds,
+    check_interval=settings.database_replica_check_interval_seconds,
+)
+
+
+# =============================================================================
+# Sessions
+# =============================================================================
+
+
 async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
     """Dependency for FastAPI to get a database session."""
     async with async_session_factory() as session:
@@ -74,6 +210,74 @@ async def get_db_context() -> AsyncGenerator[AsyncSession, None]:
             raise
 
 
+# Transaction-scoped: reset automatically when the read-only transaction ends.
+SET_STATEMENT_TIMEOUT = text("SELECT set_config('statement_timeout', :timeout, true)")
+
+
+@asynccontextmanager
+async def _read_only_session(
+    statement_timeout_ms: int,
+    use_primary: bool = False,
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Open a session inside a ``READ ONLY`` transaction.
+
+    The session is never flushed nor committed; closing it releases the
+    connection and ends the transaction.
+    """
+    bind = engine if use_primary else replica_router.get_read_engine()
+    async with async_session_factory(bind=bind) as session:
+        conn = await session.connection(execution_options={"postgresql_readonly": True})
+        await conn.execute(SET_STATEMENT_TIMEOUT, {"timeout": f"{statement_timeout_ms}ms"})
+        yield session
+
+
+async def get_read_db_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency for FastAPI to get a read-only database session.
+
+    The session is bound to a healthy replica when one is available, otherwise
+    to the primary, and uses the default read statement timeout.
+    """
+    async with _read_only_session(settings.database_read_statement_timeout_ms) as session:
+        yield session
+
+
+def read_only_session(
+    statement_timeout_ms: int | None = None,
+    use_primary: bool = False,
+) -> Callable[[], AsyncGenerator[AsyncSession, None]]:
+    """
+    Dependency factory for a read-only session with a per-route timeout.
+
+    Set ``use_primary`` for read-your-writes endpoints (data the caller has
+    just written must be visible).
+
+    Usage:
+        @router.get("/{order_id}/tracking")
+        async def track(db: AsyncSession = Depends(read_only_session(2000))):
+            ...
+    """
+    timeout_ms = statement_timeout_ms or settings.database_read_statement_timeout_ms
+
+    async def dependency() -> AsyncGenerator[AsyncSession, None]:
+        async with _read_only_session(timeout_ms, use_primary) as session:
+            yield session
+
+    return dependency
+
+
+@asynccontextmanager
+async def get_read_db_context(
+    statement_timeout_ms: int | None = None,
+    use_primary: bool = False,
+) -> AsyncGenerator[AsyncSession, None]:
+    """Context manager for read-only queries outside FastAPI (e.g. in a service method)."""
+    timeout_ms = statement_timeout_ms or settings.database_read_statement_timeout_ms
+    async with _read_only_session(timeout_ms, use_primary) as session:
+        yield session
+
+
 async def check_db_connection() -> bool:
     """Check database connectivity."""
     try:
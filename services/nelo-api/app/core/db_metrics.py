@@ -0,0 +1,196 @@
+"""SQLAlchemy instrumentation: statement latency, pool usage and slow-query log."""
+
+import logging
+import re
+import sys
+import time
+from functools import lru_cache
+from types import FrameType
+from typing import Any, cast
+
+import greenlet
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, ExceptionContext, ExecutionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry, QueuePool
+
+from app.core.config import get_settings
+from app.core.metrics import Counter, Gauge, Histogram
+from app.core.middleware import current_route
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("app.db.slow_queries")
+
+# Beyond this many distinct statements, new ones are reported as "other"
+# to keep the metric cardinality bounded.
+MAX_TRACKED_STATEMENTS = 500
+MAX_STATEMENT_LENGTH = 1000
+
+DB_QUERY_SECONDS = Histogram(
+    "nelo_db_query_duration_seconds",
+    "SQL statement execution time",
+    ["engine", "statement"],
+)
+DB_SLOW_QUERIES = Counter(
+    "nelo_db_slow_queries_total",
+    "SQL statements slower than the slow-query threshold",
+    ["engine", "route", "origin"],
+)
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "nelo_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    ["engine"],
+)
+DB_POOL_SIZE = Gauge("nelo_db_pool_size", "Configured pool size", ["engine"])
+DB_POOL_CHECKED_OUT = Gauge(
+    "nelo_db_pool_checked_out", "Connections currently in use", ["engine"]
+)
+DB_POOL_OVERFLOW = Gauge(
+    "nelo_db_pool_overflow", "Connections opened beyond the pool size", ["engine"]
+)
+
+# =============================================================================
+# Statement normalization
+# =============================================================================
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = r"(?:\$\d+|\?|%s|%\(\w+\)s|:\w+)"
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})+\s*\)")
+_VALUES_LIST = re.compile(r"(VALUES\s*\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+", re.IGNORECASE)
+
+_tracked_statements: set[str] = set()
+
+
+@lru_cache(maxsize=2048)
+def normalize_statement(statement: str) -> str:
+    """
+    Reduce a statement to its shape so that executions can be grouped.
+
+    Literals become ``?`` and placeholder lists (``IN ($1, $2, ...)``,
+    multi-row ``VALUES``) collapse to ``(...)``.
+    """
+    normalized = _WHITESPACE.sub(" ", statement).strip()
+    normalized = _STRING_LITERAL.sub("?", normalized)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _PLACEHOLDER_LIST.sub("(...)", normalized)
+    normalized = _VALUES_LIST.sub(r"\1", normalized)
+    return normalized[:MAX_STATEMENT_LENGTH]
+
+
+def _statement_label(statement: str) -> str:
+    normalized = normalize_statement(statement)
+    if normalized not in _tracked_statements:
+        if len(_tracked_statements) >= MAX_TRACKED_STATEMENTS:
+            return "other"
+        _tracked_statements.add(normalized)
+    return normalized
+
+
+# =============================================================================
+# Query origin
+# =============================================================================
+
+
+def _caller_frame() -> FrameType | None:
+    """
+    Frame that awaited the statement.
+
+    Async engine calls run the driver in a child greenlet: the application
+    coroutines are on the parent greenlet's stack.
+    """
+    parent = greenlet.getcurrent().parent
+    frame: FrameType | None = parent.gr_frame if parent is not None else None
+    return frame if frame is not None else sys._getframe(1)
+
+
+def find_query_origin() -> str | None:
+    """Innermost application function (service method, handler) on the stack."""
+    frame = _caller_frame()
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("app.modules."):
+            return f"{module}.{frame.f_code.co_qualname}"
+        frame = frame.f_back
+    return None
+
+
+# =============================================================================
+# Engine & pool instrumentation
+# =============================================================================
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long checkouts wait for a connection."""
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.observe(
+                time.perf_counter() - start,
+                engine=self.logging_name or "primary",
+            )
+
+
+def instrument_engine(engine: AsyncEngine, name: str) -> None:
+    """
+    Attach latency, slow-query and pool metrics to ``engine``.
+
+    Create the engine with ``poolclass=InstrumentedQueuePool`` and
+    ``pool_logging_name=name`` to also measure checkout wait time.
+    """
+    sync_engine = engine.sync_engine
+    threshold = settings.database_slow_query_threshold_ms / 1000
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(
+        conn: Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: ExecutionContext | None,
+        executemany: bool,
+    ) -> None:
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(
+        conn: Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: ExecutionContext | None,
+        executemany: bool,
+    ) -> None:
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+        DB_QUERY_SECONDS.observe(elapsed, engine=name, statement=_statement_label(statement))
+
+        if elapsed >= threshold:
+            route = current_route() or "-"
+            origin = find_query_origin() or "-"
+            DB_SLOW_QUERIES.inc(engine=name, route=route, origin=origin)
+            slow_query_logger.warning(
+                f"Slow query ({elapsed * 1000:.0f}ms) on {name} "
+                f"route={route} origin={origin}: {normalize_statement(statement)}"
+            )
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _handle_error(exception_context: ExceptionContext) -> None:
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start_time"):
+            conn.info["query_start_time"].pop()
+
+    if not isinstance(sync_engine.pool, QueuePool):
+        return
+
+    # Read through the engine: dispose() replaces its pool
+    def pool() -> QueuePool:
+        return cast(QueuePool, sync_engine.pool)
+
+    DB_POOL_SIZE.set_function(lambda: pool().size(), engine=name)
+    DB_POOL_CHECKED_OUT.set_function(lambda: pool().checkedout(), engine=name)
+    DB_POOL_OVERFLOW.set_function(lambda: max(pool().overflow(), 0), engine=name)
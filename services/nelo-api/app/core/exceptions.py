@@ -76,3 +76,14 @@ class ValidationError(AppException):
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail=detail,
         )
+
+
+class RateLimitExceeded(AppException):
+    """Too many requests."""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Trop de tentatives. Réessayez dans {retry_after} secondes",
+            headers={"Retry-After": str(retry_after)},
+        )
@@ -0,0 +1,121 @@
+"""Event-loop lag monitor: measures scheduling delay and catches blocking calls."""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+from app.core.config import get_settings
+from app.core.metrics import Counter, Gauge, Histogram
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+LAG_QUANTILES = (0.5, 0.9, 0.99, 1.0)
+
+LOOP_LAG_SECONDS = Histogram(
+    "nelo_event_loop_lag_seconds",
+    "Delay between a timer's due time and its execution",
+)
+LOOP_LAG_QUANTILES = Gauge(
+    "nelo_event_loop_lag_quantile_seconds",
+    "Event loop lag percentiles over the recent window",
+    ["quantile"],
+)
+LOOP_BLOCKED = Counter(
+    "nelo_event_loop_blocked_total",
+    "Times the event loop was blocked longer than the threshold",
+)
+
+
+class LoopMonitor:
+    """
+    Measure event-loop lag and report what blocks the loop.
+
+    A task sleeps ``interval`` seconds in a loop and records how late it wakes
+    up. A watchdog thread checks the task's heartbeat: when the loop has not
+    run it for more than ``threshold`` seconds, the loop thread's current stack
+    (the blocking code) is logged, once per stall.
+    """
+
+    def __init__(self, interval: float, threshold: float, window: int = 1200):
+        self.interval = interval
+        self.threshold = threshold
+        self._lags: deque[float] = deque(maxlen=window)
+        self._heartbeat = time.monotonic()
+        self._beat = 0
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopped = threading.Event()
+        LOOP_LAG_QUANTILES.set_series_function(self._quantiles)
+
+    def _quantiles(self) -> dict[tuple[str, ...], float]:
+        lags = sorted(self._lags)
+        if not lags:
+            return {}
+        return {
+            (str(q),): lags[min(int(q * len(lags)), len(lags) - 1)]
+            for q in LAG_QUANTILES
+        }
+
+    async def _probe(self) -> None:
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(now - start - self.interval, 0.0)
+            self._lags.append(lag)
+            LOOP_LAG_SECONDS.observe(lag)
+            self._heartbeat = now
+            self._beat += 1
+
+    def _watch(self) -> None:
+        reported_beat = -1
+        while not self._stopped.wait(self.threshold / 2):
+            stalled = time.monotonic() - self._heartbeat
+            beat = self._beat
+            if stalled <= self.threshold + self.interval or beat == reported_beat:
+                continue
+            reported_beat = beat
+            thread_id = self._loop_thread_id
+            frame = sys._current_frames().get(thread_id) if thread_id is not None else None
+            if frame is None:
+                continue
+            LOOP_BLOCKED.inc()
+            stack = "".join(traceback.format_stack(frame))
+            logger.warning(
+                f"Event loop blocked for {stalled * 1000:.0f}ms, current stack:\n{stack}"
+            )
+
+    def start(self) -> None:
+        """Start the lag probe and the watchdog (call from the event loop)."""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._probe())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stop the probe and the watchdog."""
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._watchdog = None
+
+
+loop_monitor = LoopMonitor(
+    interval=settings.event_loop_monitor_interval_ms / 1000,
+    threshold=settings.event_loop_lag_threshold_ms / 1000,
+)
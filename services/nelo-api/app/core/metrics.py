@@ -0,0 +1,260 @@
+"""In-process metrics registry exposed in the Prometheus text format."""
+
+import logging
+import math
+import threading
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Sequence
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets in seconds (1ms -> 10s)
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    """Holds every metric of the process and renders them for scraping."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, "_Metric"] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: "_Metric") -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines: list[str] = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+class _Metric:
+    """
+    Base metric: one mutable cell per label set.
+
+    Updates do not take a lock: metrics are written from the event loop
+    thread. The lock only guards series creation and scraping.
+    """
+
+    type_name = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: MetricsRegistry = REGISTRY,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._cells: dict[tuple[str, ...], list[float]] = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _new_cell(self) -> list[float]:
+        return [0.0]
+
+    def _cell(self, labels: dict[str, str]) -> list[float]:
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        cell = self._cells.get(key)
+        if cell is None:
+            with self._lock:
+                cell = self._cells.setdefault(key, self._new_cell())
+        return cell
+
+    def _items(self) -> list[tuple[tuple[str, ...], list[float]]]:
+        with self._lock:
+            return [(key, list(cell)) for key, cell in self._cells.items()]
+
+    def samples(self) -> Iterable[str]:
+        for key, cell in self._items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(cell[0])}"
+
+
+class Counter(_Metric):
+    """Monotonic counter."""
+
+    type_name = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        self._cell(labels)[0] += amount
+
+    def labels(self, **labels: str) -> "BoundCounter":
+        """Bind label values once, for hot paths that update the same series."""
+        return BoundCounter(self._cell(labels))
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, either set directly or read at scrape time."""
+
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: MetricsRegistry = REGISTRY,
+    ) -> None:
+        super().__init__(name, documentation, labelnames, registry)
+        self._functions: dict[tuple[str, ...], Callable[[], float]] = {}
+        self._series_functions: list[Callable[[], dict[tuple[str, ...], float]]] = []
+
+    def set(self, value: float, **labels: str) -> None:
+        self._cell(labels)[0] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        self._cell(labels)[0] += amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self._cell(labels)[0] -= amount
+
+    def labels(self, **labels: str) -> "BoundGauge":
+        """Bind label values once, for hot paths that update the same series."""
+        return BoundGauge(self._cell(labels))
+
+    def set_function(self, fn: Callable[[], float], **labels: str) -> None:
+        """Compute the value with ``fn`` every time the metric is scraped."""
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            self._functions[key] = fn
+
+    def set_series_function(self, fn: Callable[[], dict[tuple[str, ...], float]]) -> None:
+        """Compute several series (label values -> value) at scrape time."""
+        with self._lock:
+            self._series_functions.append(fn)
+
+    def samples(self) -> Iterable[str]:
+        values = {key: cell[0] for key, cell in self._items()}
+        with self._lock:
+            functions = list(self._functions.items())
+            series_functions = list(self._series_functions)
+        for key, function in functions:
+            try:
+                values[key] = float(function())
+            except Exception as e:
+                logger.debug(f"Gauge {self.name} callback failed: {e}")
+        for series_function in series_functions:
+            try:
+                values.update(series_function())
+            except Exception as e:
+                logger.debug(f"Gauge {self.name} callback failed: {e}")
+        for key, value in values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """Distribution of observations over fixed buckets."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: MetricsRegistry = REGISTRY,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_cell(self) -> list[float]:
+        # [sum, bucket counts..., +Inf count]
+        return [0.0] + [0] * (len(self.buckets) + 1)
+
+    def observe(self, value: float, **labels: str) -> None:
+        cell = self._cell(labels)
+        cell[0] += value
+        cell[bisect_left(self.buckets, value) + 1] += 1
+
+    def labels(self, **labels: str) -> "BoundHistogram":
+        """Bind label values once, for hot paths that update the same series."""
+        return BoundHistogram(self._cell(labels), self.buckets)
+
+    def samples(self) -> Iterable[str]:
+        bucket_labels = (*self.labelnames, "le")
+        for key, cell in self._items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), cell[1:]):
+                cumulative += int(count)
+                labels = _format_labels(bucket_labels, (*key, _format_value(bound)))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(cell[0])}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+# =============================================================================
+# Bound series (label values resolved once)
+# =============================================================================
+
+
+class BoundCounter:
+    __slots__ = ("_cell",)
+
+    def __init__(self, cell: list[float]):
+        self._cell = cell
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._cell[0] += amount
+
+
+class BoundGauge(BoundCounter):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._cell[0] -= amount
+
+    def set(self, value: float) -> None:
+        self._cell[0] = value
+
+
+class BoundHistogram:
+    __slots__ = ("_cell", "_buckets")
+
+    def __init__(self, cell: list[float], buckets: tuple[float, ...]):
+        self._cell = cell
+        self._buckets = buckets
+
+    def observe(self, value: float) -> None:
+        cell = self._cell
+        cell[0] += value
+        cell[bisect_left(self._buckets, value) + 1] += 1
+
+
+def render_metrics() -> str:
+    """Render the default registry."""
+    return REGISTRY.render()
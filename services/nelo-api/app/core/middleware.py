@@ -0,0 +1,138 @@
+"""ASGI middlewares shared by the application."""
+
+import time
+from contextvars import ContextVar
+from typing import Any
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import BoundCounter, BoundHistogram, Counter, Gauge, Histogram
+
+HTTP_REQUESTS = Counter(
+    "nelo_http_requests_total",
+    "HTTP requests served",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "nelo_http_request_duration_seconds",
+    "HTTP request latency (handler, dependencies and response)",
+    ["method", "route"],
+)
+HTTP_IN_FLIGHT = Gauge(
+    "nelo_http_requests_in_flight",
+    "HTTP requests currently being served",
+    ["route"],
+)
+
+UNMATCHED = "unmatched"
+
+# ASGI scope of the request being served by the current task
+_request_scope: ContextVar[Scope | None] = ContextVar("request_scope", default=None)
+
+
+def route_template(scope: Scope) -> str | None:
+    """Full route template matched for ``scope``, or None before routing."""
+    # Recent FastAPI versions keep included routers as-is: the effective route
+    # context carries the prefixed path, the APIRoute only its own.
+    fastapi_scope = scope.get("fastapi")
+    route: Any = fastapi_scope and fastapi_scope.get("effective_route_context")
+    if route is None:
+        route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path is None:
+        return None
+    return f"{scope.get('root_path', '')}{path}"
+
+
+def current_route() -> str | None:
+    """
+    Route template of the request being served (e.g. ``/api/v1/orders/{order_id}``).
+
+    Falls back to the raw path before routing has matched, and to None outside
+    of a request (background tasks, event handlers...).
+    """
+    scope = _request_scope.get()
+    if scope is None:
+        return None
+    return route_template(scope) or scope.get("path")
+
+
+def current_client_ip() -> str | None:
+    """Client address of the request being served, or None outside of a request."""
+    scope = _request_scope.get()
+    client = scope.get("client") if scope is not None else None
+    return client[0] if client else None
+
+
+class RequestContextMiddleware:
+    """Expose the current request to code that has no access to it (DB hooks, logs)."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        token = _request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_scope.reset(token)
+
+
+class MetricsMiddleware:
+    """
+    Record request count, latency and in-flight requests per route template.
+
+    Pure ASGI (no request/response objects). The route is read from the scope
+    once the router has matched it; requests that match no route are reported
+    as ``unmatched``. In-flight requests are grouped by route at scrape time.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._active: dict[int, Scope] = {}
+        # (method, route, status) -> (latency histogram, request counter)
+        self._series: dict[tuple[str, str, int], tuple[BoundHistogram, BoundCounter]] = {}
+        HTTP_IN_FLIGHT.set_series_function(self._in_flight)
+
+    def _in_flight(self) -> dict[tuple[str, ...], float]:
+        counts: dict[tuple[str, ...], float] = {}
+        for scope in list(self._active.values()):
+            key = (route_template(scope) or UNMATCHED,)
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        request_id = id(scope)
+        self._active[request_id] = scope
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            del self._active[request_id]
+            key = (scope["method"], route_template(scope) or UNMATCHED, status_code)
+            series = self._series.get(key)
+            if series is None:
+                method, route, _ = key
+                series = self._series[key] = (
+                    HTTP_REQUEST_SECONDS.labels(method=method, route=route),
+                    HTTP_REQUESTS.labels(method=method, route=route, status=str(status_code)),
+                )
+            series[0].observe(elapsed)
+            series[1].inc()
@@ -0,0 +1,322 @@
+"""On-demand sampling profiler for live requests."""
+
+import asyncio
+import hmac
+import json
+import logging
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from types import FrameType
+from typing import Any, cast
+from uuid import uuid4
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import get_settings
+from app.core.middleware import route_template
+from app.core.redis import get_redis_context
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile-token"
+WAITING_FRAME = "(waiting)"
+
+
+@dataclass
+class Profile:
+    """A finished request profile (stacks in collapsed/folded format)."""
+
+    method: str
+    path: str
+    route: str | None
+    status_code: int
+    duration_ms: float
+    interval_ms: float
+    trigger: str
+    stacks: dict[str, int] = field(repr=False)
+    id: str = field(default_factory=lambda: uuid4().hex)
+    created_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def summary(self) -> dict[str, Any]:
+        """Metadata without the stacks."""
+        data = asdict(self)
+        del data["stacks"]
+        data["samples"] = self.samples
+        return data
+
+    def collapsed(self) -> str:
+        """Stacks as ``frame;frame;frame count`` lines (flamegraph.pl, speedscope)."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.items())
+
+
+# =============================================================================
+# Sampler
+# =============================================================================
+
+
+def _frame_label(frame: FrameType) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_qualname}"
+
+
+def _running_stack(frame: FrameType | None, root: FrameType | None) -> list[str]:
+    """Frames of the running task, from its coroutine down to the current line."""
+    labels: list[str] = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        if frame is root:
+            break
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+def _awaiting_stack(coro: Any) -> list[str]:
+    """Coroutine chain of a suspended task, down to what it is waiting on."""
+    labels: list[str] = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        labels.append(_frame_label(frame))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    labels.append(WAITING_FRAME)
+    return labels
+
+
+class SamplingProfiler:
+    """
+    Sample the stacks of selected asyncio tasks from a background thread.
+
+    Samples are wall-clock: a task that is not running is recorded with the
+    coroutine chain it is suspended in, so time spent awaiting the database
+    or Redis shows up too. The thread only runs while a task is profiled.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._tasks: dict[
+            asyncio.Task[Any], tuple[asyncio.AbstractEventLoop, int, Counter[str]]
+        ] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def begin(self, task: asyncio.Task[Any]) -> None:
+        """Start sampling ``task`` (call from the task itself)."""
+        with self._lock:
+            self._tasks[task] = (task.get_loop(), threading.get_ident(), Counter())
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="request-profiler", daemon=True
+                )
+                self._thread.start()
+
+    def end(self, task: asyncio.Task[Any]) -> dict[str, int]:
+        """Stop sampling ``task`` and return its collapsed stacks."""
+        with self._lock:
+            _, _, stacks = self._tasks.pop(task, (None, None, Counter[str]()))
+        return dict(stacks)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._tasks:
+                    self._thread = None
+                    return
+                frames = sys._current_frames()
+                for task, (loop, thread_id, stacks) in self._tasks.items():
+                    self._sample(task, loop, frames.get(thread_id), stacks)
+
+    @staticmethod
+    def _sample(
+        task: asyncio.Task[Any],
+        loop: asyncio.AbstractEventLoop,
+        frame: FrameType | None,
+        stacks: Counter[str],
+    ) -> None:
+        coro = task.get_coro()
+        if asyncio.current_task(loop) is task:
+            labels = _running_stack(frame, getattr(coro, "cr_frame", None))
+        else:
+            labels = _awaiting_stack(coro)
+        if labels:
+            stacks[";".join(labels)] += 1
+
+
+profiler = SamplingProfiler(interval=settings.profiling_interval_ms / 1000)
+
+
+# =============================================================================
+# Storage
+# =============================================================================
+
+
+class RedisProfileStore:
+    """Recent profiles in Redis: an index list plus one key per profile (with TTL)."""
+
+    INDEX_KEY = "profiles:index"
+    PROFILE_KEY = "profiles:{id}"
+
+    def __init__(self, max_profiles: int, ttl_seconds: int):
+        self.max_profiles = max_profiles
+        self.ttl_seconds = ttl_seconds
+
+    async def save(self, profile: Profile) -> None:
+        async with get_redis_context() as client:
+            pipe = client.pipeline()
+            pipe.set(
+                self.PROFILE_KEY.format(id=profile.id),
+                profile.collapsed(),
+                ex=self.ttl_seconds,
+            )
+            pipe.lpush(self.INDEX_KEY, json.dumps(profile.summary()))
+            pipe.ltrim(self.INDEX_KEY, 0, self.max_profiles - 1)
+            pipe.expire(self.INDEX_KEY, self.ttl_seconds)
+            await pipe.execute()
+
+    async def list(self, limit: int) -> list[dict[str, Any]]:
+        async with get_redis_context() as client:
+            items = await client.lrange(self.INDEX_KEY, 0, limit - 1)
+        return [json.loads(item) for item in items]
+
+    async def get(self, profile_id: str) -> str | None:
+        async with get_redis_context() as client:
+            # decode_responses: values are str
+            return cast(str | None, await client.get(self.PROFILE_KEY.format(id=profile_id)))
+
+
+class DiskProfileStore:
+    """Recent profiles on disk: ``<id>.json`` metadata and ``<id>.collapsed`` stacks."""
+
+    def __init__(self, directory: str, max_profiles: int):
+        self.directory = Path(directory)
+        self.max_profiles = max_profiles
+
+    async def save(self, profile: Profile) -> None:
+        await asyncio.to_thread(self._save, profile)
+
+    def _save(self, profile: Profile) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / f"{profile.id}.collapsed").write_text(profile.collapsed())
+        (self.directory / f"{profile.id}.json").write_text(json.dumps(profile.summary()))
+        for stale in self._index()[self.max_profiles:]:
+            stale.unlink(missing_ok=True)
+            stale.with_suffix(".collapsed").unlink(missing_ok=True)
+
+    def _index(self) -> list[Path]:
+        if not self.directory.exists():
+            return []
+        return sorted(
+            self.directory.glob("*.json"),
+            key=lambda p: p.stat().st_mtime,
+            reverse=True,
+        )
+
+    async def list(self, limit: int) -> list[dict[str, Any]]:
+        def _list() -> list[dict[str, Any]]:
+            return [json.loads(p.read_text()) for p in self._index()[:limit]]
+
+        return await asyncio.to_thread(_list)
+
+    async def get(self, profile_id: str) -> str | None:
+        if not profile_id.isalnum():
+            return None
+        path = self.directory / f"{profile_id}.collapsed"
+        return await asyncio.to_thread(lambda: path.read_text() if path.exists() else None)
+
+
+def get_profile_store() -> RedisProfileStore | DiskProfileStore:
+    """Profile store selected by settings (disk when a directory is configured)."""
+    if settings.profiling_storage_dir:
+        return DiskProfileStore(settings.profiling_storage_dir, settings.profiling_max_profiles)
+    return RedisProfileStore(settings.profiling_max_profiles, settings.profiling_ttl_seconds)
+
+
+# =============================================================================
+# Middleware
+# =============================================================================
+
+
+def parse_sample_rules(rules: str) -> list[tuple[str, float]]:
+    """Parse ``/path/prefix=rate,...`` into (prefix, rate) pairs."""
+    parsed = []
+    for rule in rules.split(","):
+        prefix, _, rate = rule.strip().partition("=")
+        if prefix and rate:
+            parsed.append((prefix, float(rate)))
+    return parsed
+
+
+class ProfilingMiddleware:
+    """
+    Profile a request when it carries the profiling token header or matches a
+    sampling rule, then store the profile for the admin endpoints.
+
+    Requests that are not profiled only pay for a header scan.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.token = settings.profiling_token.encode()
+        self.rules = parse_sample_rules(settings.profiling_sample_rules)
+        self.store = get_profile_store()
+
+    def _trigger(self, scope: Scope) -> str | None:
+        if self.token:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    if hmac.compare_digest(value, self.token):
+                        return "header"
+                    break
+        path = scope["path"]
+        for prefix, rate in self.rules:
+            if path.startswith(prefix) and random.random() < rate:
+                return "sampling"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        trigger = self._trigger(scope) if scope["type"] == "http" else None
+        task = asyncio.current_task()
+        if trigger is None or task is None:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        profiler.begin(task)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            profile = Profile(
+                method=scope["method"],
+                path=scope["path"],
+                route=route_template(scope),
+                status_code=status_code,
+                duration_ms=round(duration * 1000, 2),
+                interval_ms=settings.profiling_interval_ms,
+                trigger=trigger,
+                stacks=profiler.end(task),
+            )
+            try:
+                await self.store.save(profile)
+            except Exception as e:
+                logger.warning(f"Could not store profile {profile.id}: {e}")
@@ -0,0 +1,114 @@
+"""Sliding-window rate limiter over several dimensions, one Redis round trip per check."""
+
+import logging
+from collections.abc import Sequence
+from dataclasses import dataclass
+from uuid import uuid4
+
+import redis.asyncio as redis
+
+from app.core.config import get_settings
+from app.core.exceptions import RateLimitExceeded
+from app.core.metrics import Counter
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_REJECTIONS = Counter(
+    "nelo_rate_limit_rejections_total",
+    "Requests rejected by a rate limit",
+    ["action", "dimension"],
+)
+
+# KEYS: one sorted set per limit - ARGV: request id, then (limit, window ms) per key
+# Returns {0, 0} when allowed (the request is recorded in every window),
+# otherwise {retry after ms, index of the exhausted limit}
+SLIDING_WINDOW_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local retry_after, exhausted = 0, 0
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[2 * i])
+    local window = tonumber(ARGV[2 * i + 1])
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+    local count = redis.call('ZCARD', key)
+    if count >= limit then
+        local oldest = redis.call('ZRANGE', key, count - limit, count - limit, 'WITHSCORES')
+        local wait = tonumber(oldest[2]) + window - now
+        if wait > retry_after then
+            retry_after, exhausted = wait, i
+        end
+    end
+end
+if exhausted > 0 then
+    return {math.max(retry_after, 1), exhausted}
+end
+for i, key in ipairs(KEYS) do
+    redis.call('ZADD', key, now, ARGV[1])
+    redis.call('PEXPIRE', key, ARGV[2 * i + 1])
+end
+return {0, 0}
+"""
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """At most ``limit`` requests per ``window_seconds`` for each value of ``dimension``."""
+
+    dimension: str
+    limit: int
+    window_seconds: int
+
+
+class RateLimiter:
+    """
+    Sliding-window log limiter for one action, keyed on several dimensions
+    (phone, IP, device...).
+
+    All the windows are checked, and the request recorded in each of them,
+    by a single script: a request rejected by one dimension does not count
+    against the others. When Redis is unavailable requests are let through.
+    """
+
+    KEY_PREFIX = "rate_limit"
+
+    def __init__(self, redis_client: redis.Redis, action: str, limits: Sequence[RateLimit]):
+        self.action = action
+        self.limits = limits
+        self._script = redis_client.register_script(SLIDING_WINDOW_SCRIPT)
+
+    def _key(self, limit: RateLimit, value: str) -> str:
+        return f"{self.KEY_PREFIX}:{self.action}:{limit.dimension}:{value}"
+
+    async def hit(self, **values: str | None) -> None:
+        """
+        Record a request identified by ``dimension=value`` pairs.
+
+        Dimensions without a value are skipped.
+
+        Raises:
+            RateLimitExceeded: if any of the windows is full
+        """
+        if not settings.rate_limit_enabled:
+            return
+
+        limits = [limit for limit in self.limits if values.get(limit.dimension)]
+        if not limits:
+            return
+
+        keys = [self._key(limit, str(values[limit.dimension])) for limit in limits]
+        args: list[str | int] = [uuid4().hex]
+        for limit in limits:
+            args += [limit.limit, limit.window_seconds * 1000]
+
+        try:
+            retry_after_ms, exhausted = await self._script(keys=keys, args=args)
+        except redis.RedisError as e:
+            logger.warning(f"Rate limiter unavailable for {self.action}: {e}")
+            return
+
+        if exhausted:
+            dimension = limits[int(exhausted) - 1].dimension
+            RATE_LIMIT_REJECTIONS.inc(action=self.action, dimension=dimension)
+            logger.warning(f"Rate limit exceeded for {self.action} ({dimension})")
+            raise RateLimitExceeded(retry_after=-(-int(retry_after_ms) // 1000))
@@ -1,19 +1,60 @@
 """Redis async client configuration."""
 
+import time
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
+from typing import Any
 
 import redis.asyncio as redis
 from redis.asyncio.connection import ConnectionPool
 
 from app.core.config import get_settings
+from app.core.metrics import Counter, Gauge, Histogram
 
 settings = get_settings()
 
+REDIS_COMMAND_SECONDS = Histogram(
+    "nelo_redis_command_duration_seconds",
+    "Redis command round-trip time",
+    ["command"],
+)
+REDIS_COMMAND_ERRORS = Counter(
+    "nelo_redis_command_errors_total",
+    "Redis commands that raised",
+    ["command"],
+)
+REDIS_POOL_IN_USE = Gauge("nelo_redis_pool_in_use", "Redis connections in use")
+REDIS_POOL_IDLE = Gauge("nelo_redis_pool_idle", "Idle Redis connections")
+REDIS_POOL_MAX = Gauge("nelo_redis_pool_max_connections", "Redis pool size limit")
+
 # Connection pool
 _pool: ConnectionPool | None = None
 
 
+class InstrumentedRedis(redis.Redis):
+    """Redis client recording per-command latency and errors."""
+
+    async def execute_command(self, *args: Any, **options: Any) -> Any:
+        command = str(args[0]).upper()
+        start = time.perf_counter()
+        try:
+            return await redis.Redis.execute_command(self, *args, **options)
+        except Exception:
+            REDIS_COMMAND_ERRORS.inc(command=command)
+            raise
+        finally:
+            REDIS_COMMAND_SECONDS.observe(time.perf_counter() - start, command=command)
+
+
+def _pool_stat(attribute: str) -> int:
+    return len(getattr(_pool, attribute, ())) if _pool is not None else 0
+
+
+REDIS_POOL_IN_USE.set_function(lambda: _pool_stat("_in_use_connections"))
+REDIS_POOL_IDLE.set_function(lambda: _pool_stat("_available_connections"))
+REDIS_POOL_MAX.set_function(lambda: _pool.max_connections if _pool is not None else 0)
+
+
 async def get_redis_pool() -> ConnectionPool:
     """Get or create Redis connection pool."""
     global _pool
@@ -29,7 +70,7 @@ async def get_redis_pool() -> ConnectionPool:
 async def get_redis() -> AsyncGenerator[redis.Redis, None]:
     """Dependency for FastAPI to get a Redis client."""
     pool = await get_redis_pool()
-    client = redis.Redis(connection_pool=pool)
+    client = InstrumentedRedis(connection_pool=pool)
     try:
         yield client
     finally:
@@ -40,7 +81,7 @@ async def get_redis() -> AsyncGenerator[redis.Redis, None]:
 async def get_redis_context() -> AsyncGenerator[redis.Redis, None]:
     """Context manager for Redis operations outside FastAPI."""
     pool = await get_redis_pool()
-    client = redis.Redis(connection_pool=pool)
+    client = InstrumentedRedis(connection_pool=pool)
     try:
         yield client
     finally:
@@ -1,28 +1,124 @@
 """Security utilities - JWT and password hashing."""
 
+import asyncio
+import hashlib
+import hmac
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from typing import TypeVar
 
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
 from app.core.config import get_settings
+from app.core.metrics import Gauge, Histogram
 
 settings = get_settings()
 
+T = TypeVar("T")
+
 # Password hashing context
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 
+PASSWORD_HASH_QUEUE_SECONDS = Histogram(
+    "nelo_password_hash_queue_seconds",
+    "Time an Argon2 operation waited for a hashing slot",
+    ["operation"],
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    "nelo_password_hash_duration_seconds",
+    "Argon2 operation execution time",
+    ["operation"],
+)
+PASSWORD_HASH_IN_FLIGHT = Gauge(
+    "nelo_password_hash_in_flight",
+    "Argon2 operations queued or running",
+)
+
+# Argon2 releases the GIL while hashing: a small dedicated pool keeps it off
+# the event loop without competing with the default executor. The semaphore
+# caps concurrent operations so a login burst queues instead of piling up
+# memory-hard hashes (each one uses ~64MB).
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers,
+    thread_name_prefix="argon2",
+)
+_hash_slots = asyncio.Semaphore(settings.password_hash_workers)
+
 
 def hash_password(password: str) -> str:
-    """Hash a password using Argon2."""
+    """Hash a password using Argon2 (blocking: use hash_password_async in handlers)."""
     return pwd_context.hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash."""
+    """Verify a password against its hash (blocking: use verify_password_async in handlers)."""
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def _run_hash_operation(operation: str, fn: Callable[..., T], *args: str) -> T:
+    """Run an Argon2 operation in the hashing pool and record queue/run time."""
+    PASSWORD_HASH_IN_FLIGHT.inc()
+    queued_at = time.perf_counter()
+    try:
+        async with _hash_slots:
+            started_at = time.perf_counter()
+            PASSWORD_HASH_QUEUE_SECONDS.observe(started_at - queued_at, operation=operation)
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(_hash_executor, fn, *args)
+            PASSWORD_HASH_SECONDS.observe(time.perf_counter() - started_at, operation=operation)
+            return result
+    finally:
+        PASSWORD_HASH_IN_FLIGHT.dec()
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password using Argon2 without blocking the event loop."""
+    return await _run_hash_operation("hash", pwd_context.hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash without blocking the event loop."""
+    return await _run_hash_operation("verify", pwd_context.verify, plain_password, hashed_password)
+
+
+def shutdown_password_hasher() -> None:
+    """Stop the hashing pool (application shutdown)."""
+    _hash_executor.shutdown(wait=False, cancel_futures=True)
+
+
+# =============================================================================
+# Refresh token fingerprints
+# =============================================================================
+
+# Refresh tokens are signed JWTs with plenty of entropy: a keyed HMAC is enough
+# to store them, no slow KDF needed. Sessions created before this scheme keep
+# an Argon2 hash ("$argon2...") until their next refresh.
+REFRESH_TOKEN_HASH_PREFIX = "hmac-sha256$"
+
+
+def _refresh_token_key() -> bytes:
+    return (settings.refresh_token_hmac_key or settings.secret_key).encode()
+
+
+def hash_refresh_token(token: str) -> str:
+    """Fingerprint a refresh token for storage (HMAC-SHA256)."""
+    digest = hmac.new(_refresh_token_key(), token.encode(), hashlib.sha256).hexdigest()
+    return f"{REFRESH_TOKEN_HASH_PREFIX}{digest}"
+
+
+def is_legacy_refresh_token_hash(stored_hash: str) -> bool:
+    """Whether the stored fingerprint predates the HMAC scheme."""
+    return not stored_hash.startswith(REFRESH_TOKEN_HASH_PREFIX)
+
+
+def verify_refresh_token_hash(token: str, stored_hash: str) -> bool:
+    """Constant-time check of a refresh token against its stored HMAC fingerprint."""
+    return hmac.compare_digest(hash_refresh_token(token), stored_hash)
+
+
 def create_access_token(
     data: dict,
     expires_delta: timedelta | None = None,
@@ -3,13 +3,23 @@
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import get_settings
-from app.core.database import check_db_connection, engine
+from app.core.database import check_db_connection, engine, replica_router
+from app.core.loop_monitor import loop_monitor
+from app.core.metrics import CONTENT_TYPE, render_metrics
+from app.core.middleware import MetricsMiddleware, RequestContextMiddleware
+from app.core.profiling import ProfilingMiddleware
 from app.core.redis import check_redis_connection, close_redis_pool
-from app.shared.events import register_event_handlers
+from app.core.security import shutdown_password_hasher
+from app.shared.audit import audit_writer
+from app.shared.events import EventBus, register_event_handlers
+from app.shared.jobs import job_scheduler, register_job_handlers, schedule_maintenance_jobs
+from app.shared.realtime import realtime_hub
+from app.modules.auth.services.principals import principal_cache
+from app.modules.auth.services.revocation import revocation_cache
 
 # Import module routers
 from app.modules.auth.router import router as auth_router
@@ -21,6 +31,7 @@ from app.modules.orders.routers.products import router as products_router
 from app.modules.deliveries.router import router as deliveries_router
 from app.modules.payments.router import router as payments_router
 from app.modules.notifications.router import router as notifications_router
+from app.modules.admin.router import router as admin_router
 
 settings = get_settings()
 
@@ -36,11 +47,43 @@ async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
     register_event_handlers()
     print("Event handlers registered")
 
+    # Jobs (notifications, order timers, offer re-dispatch) normally run in
+    # the workers (python -m app.worker)
+    if settings.jobs_run_in_api:
+        register_job_handlers()
+        await schedule_maintenance_jobs()
+        job_scheduler.start()
+
+    # Start read replica health checks (no-op without replicas)
+    await replica_router.start()
+
+    # Write audit records in batches
+    audit_writer.start()
+
+    # Watch for code blocking the event loop
+    loop_monitor.start()
+
+    # Follow token revocations (falls back to Redis lookups until in sync)
+    revocation_cache.start()
+    principal_cache.start()
+
+    # Relay tracking updates to the SSE / WebSocket streams of this process
+    realtime_hub.start()
+
     yield
 
     # Shutdown
+    await job_scheduler.stop()
+    await EventBus.drain()
+    await realtime_hub.stop()
+    await principal_cache.stop()
+    await revocation_cache.stop()
+    await loop_monitor.stop()
+    await audit_writer.stop()
+    await replica_router.stop()
     await engine.dispose()
     await close_redis_pool()
+    shutdown_password_hasher()
     print("Shutdown complete")
 
 
@@ -65,6 +108,15 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # Current request for DB hooks and logs (slow-query origin)
+    app.add_middleware(RequestContextMiddleware)
+
+    # On-demand request profiler (token header or sampling rules)
+    app.add_middleware(ProfilingMiddleware)
+
+    # Per-route request metrics (count, latency, in-flight)
+    app.add_middleware(MetricsMiddleware)
+
     # Health check endpoints
     @app.get("/health", tags=["Health"])
     async def health_check() -> dict:
@@ -92,6 +144,12 @@ def create_app() -> FastAPI:
         """Liveness check for Kubernetes."""
         return {"status": "alive"}
 
+    # Metrics endpoint (Prometheus text format)
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics() -> Response:
+        """Process metrics: HTTP, DB, Redis and event bus."""
+        return Response(content=render_metrics(), media_type=CONTENT_TYPE)
+
     # Include API routers
     app.include_router(auth_router, prefix=settings.api_v1_prefix)
     app.include_router(users_router, prefix=settings.api_v1_prefix)
@@ -102,6 +160,7 @@ def create_app() -> FastAPI:
     app.include_router(deliveries_router, prefix=settings.api_v1_prefix)
     app.include_router(payments_router, prefix=settings.api_v1_prefix)
     app.include_router(notifications_router, prefix=settings.api_v1_prefix)
+    app.include_router(admin_router, prefix=settings.api_v1_prefix)
 
     return app
 
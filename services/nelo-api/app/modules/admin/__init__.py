@@ -0,0 +1 @@
+"""Admin module - Operations tooling (profiles)."""
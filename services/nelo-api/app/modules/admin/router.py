@@ -0,0 +1,95 @@
+"""Admin module API routes."""
+
+from datetime import date
+from typing import Annotated, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_read_db_session
+from app.core.profiling import get_profile_store
+from app.modules.admin.schemas import ProfileListResponse, ProfileSummary
+from app.modules.auth.dependencies import AdminUser
+from app.modules.orders.schemas import SalesReportResponse
+from app.modules.orders.services.provider_sales import ProviderSalesService
+from app.shared.audit import audit_writer
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+# =============================================================================
+# Profiles
+# =============================================================================
+
+@router.get(
+    "/profiles",
+    response_model=ProfileListResponse,
+    summary="Profils récents",
+    description="Liste les derniers profils de requêtes enregistrés.",
+)
+async def list_profiles(
+    current_user: AdminUser,
+    limit: int = Query(50, ge=1, le=500),
+) -> ProfileListResponse:
+    """List recent request profiles."""
+    profiles = await get_profile_store().list(limit)
+    return ProfileListResponse(
+        profiles=[ProfileSummary.model_validate(p) for p in profiles]
+    )
+
+
+@router.get(
+    "/profiles/{profile_id}",
+    response_class=PlainTextResponse,
+    summary="Télécharger un profil",
+    description="Piles au format 'collapsed' (flamegraph.pl, speedscope).",
+)
+async def get_profile(
+    profile_id: str,
+    current_user: AdminUser,
+) -> PlainTextResponse:
+    """Get a profile as collapsed stacks."""
+    stacks = await get_profile_store().get(profile_id)
+    if stacks is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profil non trouvé",
+        )
+    audit_writer.record("admin.profile.download", user_id=current_user.id)
+    return PlainTextResponse(stacks)
+
+
+# =============================================================================
+# Sales
+# =============================================================================
+
+@router.get(
+    "/sales",
+    response_model=SalesReportResponse,
+    summary="Ventes de la plateforme",
+    description="Ventes de tous les prestataires, ou d'un seul, par heure ou par jour (UTC).",
+)
+async def get_sales(
+    current_user: AdminUser,
+    db: Annotated[AsyncSession, Depends(get_read_db_session)],
+    start: date = Query(..., description="Premier jour (inclus)"),
+    end: date = Query(..., description="Dernier jour (inclus)"),
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    provider_id: Optional[UUID] = None,
+) -> SalesReportResponse:
+    """Get platform (or one provider's) sales report."""
+    try:
+        report = await ProviderSalesService(db).get_report(
+            start=start,
+            end=end,
+            granularity=granularity,
+            provider_id=provider_id,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    return SalesReportResponse(**report)
@@ -0,0 +1,31 @@
+"""Admin module Pydantic schemas."""
+
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+# =============================================================================
+# Profiling schemas
+# =============================================================================
+
+class ProfileSummary(BaseModel):
+    """Recorded request profile (metadata)."""
+
+    id: str
+    created_at: datetime
+    method: str
+    path: str
+    route: Optional[str] = None
+    status_code: int
+    duration_ms: float
+    interval_ms: float
+    samples: int
+    trigger: str
+
+
+class ProfileListResponse(BaseModel):
+    """List of recent profiles."""
+
+    profiles: list[ProfileSummary]
@@ -3,16 +3,17 @@
 from typing import Annotated, Optional
 from uuid import UUID
 
-from fastapi import Depends, Header, HTTPException, status
+from fastapi import Depends, Header, HTTPException, Query, WebSocketException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 import redis.asyncio as redis
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db_session
-from app.core.redis import get_redis
+from app.core.database import get_db_session, get_read_db_context
+from app.core.redis import get_redis, get_redis_context
 from app.modules.auth.models import User, UserRole
 from app.modules.auth.services.jwt_service import JWTService
+from app.modules.auth.services.principals import Principal, principal_cache
 
 # HTTP Bearer scheme for Swagger UI
 security = HTTPBearer(auto_error=False)
@@ -39,27 +40,47 @@ async def get_current_user_id(
     if not payload:
         return None
 
-    # Check blacklist
-    if await jwt_service.is_blacklisted(token):
-        return None
-
-    # Check user-level blacklist (logout all)
+    # Check token and user-level blacklists (logout, logout all)
     user_id = payload.get("sub")
-    token_iat = payload.get("iat")
-    if user_id and token_iat:
-        if not await jwt_service.is_user_token_valid(user_id, token_iat):
-            return None
+    if await jwt_service.is_revoked(token, user_id, payload.get("iat")):
+        return None
 
     return UUID(user_id) if user_id else None
 
 
-async def get_current_user(
+def _check_principal(principal: Optional[Principal]) -> Principal:
+    """Reject missing, deactivated or blocked accounts."""
+    if not principal:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Utilisateur non trouvé",
+        )
+
+    if not principal.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Compte désactivé",
+        )
+
+    if principal.is_blocked:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Compte bloqué: {principal.blocked_reason or 'Contactez le support'}",
+        )
+
+    return principal
+
+
+async def get_current_principal(
     credentials: Annotated[Optional[HTTPAuthorizationCredentials], Depends(security)],
     db: Annotated[AsyncSession, Depends(get_db_session)],
     redis_client: Annotated[redis.Redis, Depends(get_redis)],
-) -> User:
+) -> Principal:
     """
-    Get the current authenticated user.
+    Get the current authenticated principal (id, role, contact, status).
+
+    Served from the principal cache: use it instead of get_current_user when
+    the endpoint does not need the ORM User.
 
     Raises:
         HTTPException: If token is invalid or user not found
@@ -79,26 +100,84 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # Get user from database
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
+    return _check_principal(await principal_cache.get(user_id, db))
 
-    if not user:
+
+async def authenticate_token(token: str) -> Optional[Principal]:
+    """
+    Principal of an access token, or None if the token is invalid or revoked.
+
+    Opens its own short-lived Redis client and read session, for long-lived
+    connections (streams, WebSockets) that must not hold them.
+    """
+    async with get_redis_context() as redis_client:
+        user_id = await get_current_user_id(token, redis_client)
+    if not user_id:
+        return None
+    async with get_read_db_context() as db:
+        return await principal_cache.get(user_id, db)
+
+
+async def get_stream_principal(
+    credentials: Annotated[Optional[HTTPAuthorizationCredentials], Depends(security)],
+    access_token: Annotated[Optional[str], Query(include_in_schema=False)] = None,
+) -> Principal:
+    """
+    Get the principal of a streaming request (SSE).
+
+    Accepts the token as a Bearer header or an ``access_token`` query
+    parameter (browsers' EventSource cannot set headers). Nothing is held
+    open for the duration of the stream.
+    """
+    token = credentials.credentials if credentials else access_token
+    if not token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Utilisateur non trouvé",
+            detail="Token d'authentification requis",
+            headers={"WWW-Authenticate": "Bearer"},
         )
 
-    if not user.is_active:
+    principal = await authenticate_token(token)
+    if principal is None:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Compte désactivé",
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token invalide ou expiré",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    return _check_principal(principal)
+
+
+async def get_websocket_principal(
+    access_token: Annotated[Optional[str], Query()] = None,
+) -> Principal:
+    """Get the principal of a WebSocket (token in the ``access_token`` query parameter)."""
+    principal = await authenticate_token(access_token) if access_token else None
+    if principal is None or not principal.is_active or principal.is_blocked:
+        raise WebSocketException(
+            code=status.WS_1008_POLICY_VIOLATION,
+            reason="Token invalide ou expiré",
         )
+    return principal
 
-    if user.is_blocked:
+
+async def get_current_user(
+    principal: Annotated[Principal, Depends(get_current_principal)],
+    db: Annotated[AsyncSession, Depends(get_db_session)],
+) -> User:
+    """
+    Get the current authenticated user (ORM object).
+
+    Raises:
+        HTTPException: If token is invalid or user not found
+    """
+    result = await db.execute(select(User).where(User.id == principal.id))
+    user = result.scalar_one_or_none()
+
+    if not user:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=f"Compte bloqué: {user.blocked_reason or 'Contactez le support'}",
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Utilisateur non trouvé",
         )
 
     return user
@@ -145,15 +224,17 @@ def require_role(*allowed_roles: UserRole):
     """
     Dependency factory for role-based access control.
 
+    Checks the cached principal, so the returned value is a Principal.
+
     Usage:
         @router.get("/admin")
-        async def admin_endpoint(user: User = Depends(require_role(UserRole.ADMIN))):
+        async def admin_endpoint(user: Principal = Depends(require_role(UserRole.ADMIN))):
             ...
     """
 
     async def role_checker(
-        current_user: Annotated[User, Depends(get_current_user)],
-    ) -> User:
+        current_user: Annotated[Principal, Depends(get_current_principal)],
+    ) -> Principal:
         if current_user.role not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -189,7 +270,11 @@ def require_driver():
 # =============================================================================
 
 CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentPrincipal = Annotated[Principal, Depends(get_current_principal)]
+StreamPrincipal = Annotated[Principal, Depends(get_stream_principal)]
+WebSocketPrincipal = Annotated[Principal, Depends(get_websocket_principal)]
 OptionalUser = Annotated[Optional[User], Depends(get_optional_user)]
-AdminUser = Annotated[User, Depends(require_admin())]
-ProviderUser = Annotated[User, Depends(require_provider())]
-DriverUser = Annotated[User, Depends(require_driver())]
+# Role checks only need the principal (no ORM User loaded)
+AdminUser = Annotated[Principal, Depends(require_admin())]
+ProviderUser = Annotated[Principal, Depends(require_provider())]
+DriverUser = Annotated[Principal, Depends(require_driver())]
@@ -53,11 +53,15 @@ AuthServiceDep = Annotated[AuthService, Depends(get_auth_service)]
 async def send_otp(
     request: SendOTPRequest,
     auth_service: AuthServiceDep,
+    http_request: Request,
+    x_device_id: Annotated[str | None, Header()] = None,
 ) -> OTPSentResponse:
     """Send OTP to phone number."""
     success, message, wait_time = await auth_service.send_otp(
         phone=request.phone,
         purpose=request.purpose,
+        ip_address=http_request.client.host if http_request.client else None,
+        device_id=x_device_id,
     )
 
     if not success:
@@ -318,6 +322,7 @@ async def verify_pin(
     request: VerifyPINRequest,
     auth_service: AuthServiceDep,
     authorization: Annotated[str, Header()],
+    http_request: Request,
 ) -> MessageResponse:
     """Verify user PIN."""
     from app.modules.auth.dependencies import get_current_user_id
@@ -337,7 +342,11 @@ async def verify_pin(
             detail="Token invalide",
         )
 
-    valid = await auth_service.verify_pin(user_id, request.pin)
+    valid = await auth_service.verify_pin(
+        user_id,
+        request.pin,
+        ip_address=http_request.client.host if http_request.client else None,
+    )
 
     if not valid:
         raise HTTPException(
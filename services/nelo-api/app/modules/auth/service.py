@@ -4,17 +4,37 @@ import secrets
 import string
 from datetime import datetime, timedelta, timezone
 from typing import Optional
-from uuid import UUID
+from uuid import UUID, uuid4
 
 import redis.asyncio as redis
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import get_settings
-from app.core.security import hash_password, verify_password
+from app.core.database import get_db_context
+from app.core.rate_limit import RateLimiter
+from app.core.security import (
+    hash_password_async,
+    hash_refresh_token,
+    is_legacy_refresh_token_hash,
+    verify_password_async,
+    verify_refresh_token_hash,
+)
 from app.modules.auth.models import KycLevel, Session, User, UserRole
 from app.modules.auth.services.jwt_service import JWTService
+from app.modules.auth.services.login_attempts import (
+    LOGIN_LOCK_SECONDS,
+    MAX_FAILED_LOGIN_ATTEMPTS,
+    LoginAttemptTracker,
+)
 from app.modules.auth.services.otp_service import OTPService, SMSProvider
+from app.modules.auth.services.rate_limits import (
+    LOGIN_PASSWORD_LIMITS,
+    SEND_OTP_LIMITS,
+    VERIFY_PIN_LIMITS,
+    phone_prefix,
+)
+from app.shared.audit import audit_writer
 
 settings = get_settings()
 
@@ -32,6 +52,10 @@ class AuthService:
         self.otp_service = OTPService(redis_client)
         self.jwt_service = JWTService(redis_client)
         self.sms_provider = SMSProvider()
+        self.login_attempts = LoginAttemptTracker(redis_client)
+        self.send_otp_limiter = RateLimiter(redis_client, "send_otp", SEND_OTP_LIMITS)
+        self.login_limiter = RateLimiter(redis_client, "login_password", LOGIN_PASSWORD_LIMITS)
+        self.verify_pin_limiter = RateLimiter(redis_client, "verify_pin", VERIFY_PIN_LIMITS)
 
     # =========================================================================
     # User operations
@@ -62,7 +86,7 @@ class AuthService:
         user = User(
             phone=phone,
             email=email,
-            password_hash=hash_password(password) if password else None,
+            password_hash=await hash_password_async(password) if password else None,
             role=role,
             phone_verified=True,  # Verified via OTP before registration
         )
@@ -78,22 +102,30 @@ class AuthService:
         self,
         phone: str,
         purpose: str = "verify",
+        ip_address: Optional[str] = None,
+        device_id: Optional[str] = None,
     ) -> tuple[bool, str, int]:
         """
         Send OTP to phone number.
 
         Returns:
             Tuple of (success, message, wait_time)
+
+        Raises:
+            RateLimitExceeded: too many codes requested for this phone,
+                number range, IP or device
         """
-        # Check rate limit
-        can_send, wait_time = await self.otp_service.can_send_otp(phone, purpose)
-        if not can_send:
-            return False, f"Veuillez attendre {wait_time} secondes", wait_time
+        await self.send_otp_limiter.hit(
+            phone=phone,
+            phone_prefix=phone_prefix(phone),
+            ip=ip_address,
+            device=device_id,
+        )
 
-        # Generate and store OTP
-        code, success = await self.otp_service.generate_and_store(phone, purpose)
-        if not success:
-            return False, "Erreur lors de la génération du code", 0
+        # Generate and store OTP (rate limited)
+        code, wait_time = await self.otp_service.generate_and_store(phone, purpose)
+        if not code:
+            return False, f"Veuillez attendre {wait_time} secondes", wait_time
 
         # Send SMS
         sms_sent = await self.sms_provider.send_otp(phone, code)
@@ -189,6 +221,9 @@ class AuthService:
             device_type=device_type,
             ip_address=ip_address,
         )
+        audit_writer.record(
+            "auth.login", user_id=user.id, ip_address=ip_address, session=self.db
+        )
 
         return user, access_token, refresh_token
 
@@ -205,24 +240,33 @@ class AuthService:
 
         Returns:
             Tuple of (user, access_token, refresh_token)
+
+        Raises:
+            RateLimitExceeded: too many attempts for this phone, IP or device
         """
+        await self.login_limiter.hit(phone=phone, ip=ip_address, device=device_id)
+
+        # Lock windows live in Redis: no database or Argon2 work while locked
+        if await self.login_attempts.is_locked(phone):
+            raise ValueError("Compte temporairement verrouillé. Réessayez plus tard.")
+
         user = await self.get_user_by_phone(phone)
         if not user:
+            await self.login_attempts.record_failure(phone)
             raise ValueError("Identifiants invalides")
 
-        # Check if locked
+        # Durable lock (set when a lock was triggered)
         if user.locked_until and user.locked_until > datetime.now(timezone.utc):
             raise ValueError("Compte temporairement verrouillé. Réessayez plus tard.")
 
         # Check password
-        if not user.password_hash or not verify_password(password, user.password_hash):
-            user.failed_login_attempts += 1
-
-            # Lock after 5 failed attempts
-            if user.failed_login_attempts >= 5:
-                user.locked_until = datetime.now(timezone.utc) + timedelta(minutes=30)
-
-            await self.db.flush()
+        password_ok = bool(
+            user.password_hash and await verify_password_async(password, user.password_hash)
+        )
+        if not password_ok:
+            # Failures are counted in Redis; the row is only written on lock
+            if await self.login_attempts.record_failure(phone):
+                await self._lock_account(user.id, ip_address)
             raise ValueError("Identifiants invalides")
 
         if not user.is_active:
@@ -232,6 +276,7 @@ class AuthService:
             raise ValueError(f"Compte bloqué: {user.blocked_reason or 'Contactez le support'}")
 
         # Reset failed attempts and update last login
+        await self.login_attempts.reset(phone)
         user.failed_login_attempts = 0
         user.locked_until = None
         user.last_login_at = datetime.now(timezone.utc)
@@ -243,9 +288,33 @@ class AuthService:
             device_type=device_type,
             ip_address=ip_address,
         )
+        audit_writer.record(
+            "auth.login", user_id=user.id, ip_address=ip_address, session=self.db
+        )
 
         return user, access_token, refresh_token
 
+    async def _lock_account(self, user_id: UUID, ip_address: Optional[str]) -> None:
+        """
+        Persist a login lock on the user row.
+
+        Committed in its own transaction: the request transaction is rolled
+        back by the error that follows.
+        """
+        async with get_db_context() as db:
+            await db.execute(
+                update(User)
+                .where(User.id == user_id)
+                .values(
+                    failed_login_attempts=MAX_FAILED_LOGIN_ATTEMPTS,
+                    locked_until=datetime.now(timezone.utc)
+                    + timedelta(seconds=LOGIN_LOCK_SECONDS),
+                )
+            )
+            audit_writer.record(
+                "auth.account_locked", user_id=user_id, ip_address=ip_address, session=db
+            )
+
     # =========================================================================
     # Token operations
     # =========================================================================
@@ -272,11 +341,13 @@ class AuthService:
         user_id = UUID(payload["sub"])
         session_id = UUID(payload.get("sid")) if payload.get("sid") else None
 
-        # Verify session exists and is active
+        # Verify session exists, is active and was issued this token
+        session = None
         if session_id:
             result = await self.db.execute(
                 select(Session).where(
                     Session.id == session_id,
+                    Session.user_id == user_id,
                     Session.is_active == True,
                 )
             )
@@ -284,6 +355,13 @@ class AuthService:
             if not session:
                 raise ValueError("Session expirée")
 
+            # Legacy Argon2 fingerprints were never rotated on refresh, so they
+            # cannot be checked: the session is upgraded to HMAC below.
+            stored_hash = session.refresh_token_hash
+            legacy = is_legacy_refresh_token_hash(stored_hash)
+            if not legacy and not verify_refresh_token_hash(refresh_token, stored_hash):
+                raise ValueError("Token révoqué")
+
         # Get user
         user = await self.get_user_by_id(user_id)
         if not user or not user.is_active:
@@ -302,6 +380,10 @@ class AuthService:
             session_id=session_id,
         )
 
+        # Rotate the stored fingerprint
+        if session:
+            session.refresh_token_hash = hash_refresh_token(new_refresh_token)
+
         return new_access_token, new_refresh_token
 
     async def logout(
@@ -332,6 +414,7 @@ class AuthService:
         """Logout from all sessions."""
         # Blacklist all tokens for user
         await self.jwt_service.blacklist_user_tokens(user_id)
+        audit_writer.record("auth.logout_all", user_id=user_id, session=self.db)
 
         # Deactivate all sessions
         result = await self.db.execute(
@@ -351,15 +434,27 @@ class AuthService:
         if not user:
             raise ValueError("Utilisateur non trouvé")
 
-        user.pin_hash = hash_password(pin)
+        user.pin_hash = await hash_password_async(pin)
+
+    async def verify_pin(
+        self,
+        user_id: UUID,
+        pin: str,
+        ip_address: Optional[str] = None,
+    ) -> bool:
+        """
+        Verify user PIN.
+
+        Raises:
+            RateLimitExceeded: too many attempts for this user or IP
+        """
+        await self.verify_pin_limiter.hit(user=str(user_id), ip=ip_address)
 
-    async def verify_pin(self, user_id: UUID, pin: str) -> bool:
-        """Verify user PIN."""
         user = await self.get_user_by_id(user_id)
         if not user or not user.pin_hash:
             return False
 
-        return verify_password(pin, user.pin_hash)
+        return await verify_password_async(pin, user.pin_hash)
 
     # =========================================================================
     # Private helpers
@@ -373,12 +468,17 @@ class AuthService:
         ip_address: Optional[str] = None,
     ) -> tuple[str, str]:
         """Create session and return tokens."""
-        # Create session record
-        refresh_token, expires_at = self.jwt_service.create_refresh_token(user.id)
+        # Session ID generated here so the refresh token is only signed once
+        session_id = uuid4()
+        refresh_token, expires_at = self.jwt_service.create_refresh_token(
+            user_id=user.id,
+            session_id=session_id,
+        )
 
         session = Session(
+            id=session_id,
             user_id=user.id,
-            refresh_token_hash=hash_password(refresh_token),
+            refresh_token_hash=hash_refresh_token(refresh_token),
             device_id=device_id,
             device_type=device_type,
             ip_address=ip_address,
@@ -393,15 +493,6 @@ class AuthService:
             role=user.role.value,
         )
 
-        # Re-create refresh token with session ID
-        refresh_token, _ = self.jwt_service.create_refresh_token(
-            user_id=user.id,
-            session_id=session.id,
-        )
-
-        # Update session with new hash
-        session.refresh_token_hash = hash_password(refresh_token)
-
         return access_token, refresh_token
 
     def _generate_referral_code(self) -> str:
@@ -2,5 +2,21 @@
 
 from app.modules.auth.services.otp_service import OTPService, SMSProvider
 from app.modules.auth.services.jwt_service import JWTService
+from app.modules.auth.services.login_attempts import LoginAttemptTracker
+from app.modules.auth.services.revocation import RevocationCache, revocation_cache
+from app.modules.auth.services.principals import Principal, PrincipalCache, principal_cache
+from app.modules.auth.services.token_cache import VerifiedTokenCache, verified_token_cache
 
-__all__ = ["OTPService", "SMSProvider", "JWTService"]
+__all__ = [
+    "OTPService",
+    "SMSProvider",
+    "JWTService",
+    "LoginAttemptTracker",
+    "RevocationCache",
+    "revocation_cache",
+    "Principal",
+    "PrincipalCache",
+    "principal_cache",
+    "VerifiedTokenCache",
+    "verified_token_cache",
+]
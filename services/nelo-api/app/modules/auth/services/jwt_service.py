@@ -1,6 +1,6 @@
 """JWT service with token blacklisting."""
 
-import hashlib
+import json
 import logging
 from datetime import datetime, timedelta, timezone
 from typing import Any
@@ -10,24 +10,59 @@ import redis.asyncio as redis
 from jose import JWTError, jwt
 
 from app.core.config import get_settings
+from app.core.metrics import Counter
+from app.modules.auth.services.revocation import (
+    REFRESH_TOKEN_BLACKLIST_PREFIX,
+    TOKEN_BLACKLIST_PREFIX,
+    USER_BLACKLIST_PREFIX,
+    RevocationCache,
+    revocation_cache,
+)
+from app.modules.auth.services.token_cache import (
+    JTI_LENGTH,
+    VerifiedTokenCache,
+    token_digest,
+    verified_token_cache,
+)
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+REVOCATION_CHECKS = Counter(
+    "nelo_token_revocation_checks_total",
+    "Token revocation checks by source (local cache or Redis)",
+    ["source"],
+)
+
 
 class JWTService:
     """Service for JWT token operations with Redis blacklist."""
 
-    def __init__(self, redis_client: redis.Redis):
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        cache: RevocationCache = revocation_cache,
+        verified_cache: VerifiedTokenCache = verified_token_cache,
+    ):
         self.redis = redis_client
+        self.cache = cache
+        self.verified_cache = verified_cache
 
     def _get_blacklist_key(self, jti: str) -> str:
         """Generate Redis key for token blacklist."""
-        return f"token_blacklist:{jti}"
+        return f"{TOKEN_BLACKLIST_PREFIX}{jti}"
+
+    def _get_refresh_blacklist_key(self, jti: str) -> str:
+        """Generate Redis key for the refresh token blacklist."""
+        return f"{REFRESH_TOKEN_BLACKLIST_PREFIX}{jti}"
+
+    def _get_user_blacklist_key(self, user_id: UUID | str) -> str:
+        """Generate Redis key for the user-level blacklist timestamp."""
+        return f"{USER_BLACKLIST_PREFIX}{user_id}"
 
     def _hash_token(self, token: str) -> str:
         """Create a short hash of the token for the JTI."""
-        return hashlib.sha256(token.encode()).hexdigest()[:16]
+        return token_digest(token)[:JTI_LENGTH]
 
     def create_access_token(
         self,
@@ -97,23 +132,33 @@ class JWTService:
         """
         Decode and validate a JWT token.
 
+        Claims of already verified tokens are served from the verified token
+        cache until the token expires.
+
         Args:
             token: JWT token string
 
         Returns:
-            Token payload if valid, None otherwise
+            Token payload if valid, None otherwise (do not mutate it)
         """
+        digest = token_digest(token)
+        payload = self.verified_cache.get(digest)
+        if payload is not None:
+            return payload
+
         try:
             payload = jwt.decode(
                 token,
                 settings.secret_key,
                 algorithms=[settings.jwt_algorithm],
             )
-            return payload
         except JWTError as e:
             logger.debug(f"Token decode error: {e}")
             return None
 
+        self.verified_cache.put(digest, payload)
+        return payload
+
     def verify_access_token(self, token: str) -> dict[str, Any] | None:
         """
         Verify an access token.
@@ -154,7 +199,10 @@ class JWTService:
 
     async def is_blacklisted(self, token: str) -> bool:
         """
-        Check if a token is blacklisted.
+        Check if a refresh token is blacklisted, in Redis.
+
+        Refresh tokens revoked before they had keys of their own are under
+        the access token blacklist: both keys are checked.
 
         Args:
             token: JWT token string
@@ -163,14 +211,53 @@ class JWTService:
             True if blacklisted, False otherwise
         """
         jti = self._hash_token(token)
-        key = self._get_blacklist_key(jti)
-        return await self.redis.exists(key) > 0
+        keys = (self._get_refresh_blacklist_key(jti), self._get_blacklist_key(jti))
+        return await self.redis.exists(*keys) > 0
+
+    async def is_revoked(
+        self,
+        token: str,
+        user_id: str | None,
+        token_iat: int | None,
+    ) -> bool:
+        """
+        Check the token blacklist and the user-level blacklist at once.
+
+        Answered from the in-process cache when it is in sync, otherwise with
+        a single pipelined Redis round trip.
+
+        Args:
+            token: JWT token string
+            user_id: User UUID string (``sub`` claim)
+            token_iat: Token issued-at timestamp
+
+        Returns:
+            True if the token must be rejected
+        """
+        jti = self._hash_token(token)
+        if self.cache.ready:
+            REVOCATION_CHECKS.inc(source="cache")
+            return self.cache.is_revoked(jti, user_id, token_iat)
+
+        REVOCATION_CHECKS.inc(source="redis")
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.exists(self._get_blacklist_key(jti))
+        pipe.get(self._get_user_blacklist_key(user_id or ""))
+        blacklisted, blacklist_ts = await pipe.execute()
+
+        if blacklisted:
+            return True
+        if user_id and token_iat and blacklist_ts:
+            return token_iat < int(blacklist_ts)
+        return False
 
     async def blacklist_token(self, token: str) -> None:
         """
         Add a token to the blacklist.
 
-        The token is stored until its original expiration time.
+        The token is stored until its original expiration time. Access
+        tokens are also published to the revocation caches of every process;
+        refresh tokens are only stored in Redis.
 
         Args:
             token: JWT token to blacklist
@@ -180,7 +267,7 @@ class JWTService:
             return
 
         jti = self._hash_token(token)
-        key = self._get_blacklist_key(jti)
+        self.verified_cache.discard(token_digest(token))
 
         # Calculate TTL until token expiration
         exp = payload.get("exp")
@@ -189,8 +276,16 @@ class JWTService:
             exp_dt = datetime.fromtimestamp(exp, tz=timezone.utc)
             ttl = int((exp_dt - now).total_seconds())
 
-            if ttl > 0:
-                await self.redis.setex(key, ttl, "1")
+            if ttl > 0 and payload.get("type") == "refresh":
+                await self.redis.setex(self._get_refresh_blacklist_key(jti), ttl, "1")
+                logger.info(f"Refresh token blacklisted (jti: {jti}, ttl: {ttl}s)")
+            elif ttl > 0:
+                message = {"type": "token", "jti": jti, "exp": exp}
+                pipe = self.redis.pipeline(transaction=False)
+                pipe.setex(self._get_blacklist_key(jti), ttl, "1")
+                pipe.publish(RevocationCache.CHANNEL, json.dumps(message))
+                await pipe.execute()
+                self.cache.apply(message)
                 logger.info(f"Token blacklisted (jti: {jti}, ttl: {ttl}s)")
 
     async def blacklist_user_tokens(self, user_id: UUID) -> None:
@@ -202,11 +297,16 @@ class JWTService:
         Args:
             user_id: User UUID
         """
-        key = f"user_token_blacklist:{user_id}"
+        key = self._get_user_blacklist_key(user_id)
         timestamp = int(datetime.now(timezone.utc).timestamp())
         # Keep for max token lifetime (refresh token duration)
         ttl = settings.refresh_token_expire_days * 24 * 3600
-        await self.redis.setex(key, ttl, str(timestamp))
+        message = {"type": "user", "user_id": str(user_id), "ts": timestamp}
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.setex(key, ttl, str(timestamp))
+        pipe.publish(RevocationCache.CHANNEL, json.dumps(message))
+        await pipe.execute()
+        self.cache.apply(message)
         logger.info(f"All tokens blacklisted for user {user_id}")
 
     async def is_user_token_valid(self, user_id: str, token_iat: int) -> bool:
@@ -220,7 +320,10 @@ class JWTService:
         Returns:
             True if token is valid, False if issued before blacklist
         """
-        key = f"user_token_blacklist:{user_id}"
+        if self.cache.ready:
+            return not self.cache.is_issued_before_cutoff(user_id, token_iat)
+
+        key = self._get_user_blacklist_key(user_id)
         blacklist_ts = await self.redis.get(key)
 
         if blacklist_ts:
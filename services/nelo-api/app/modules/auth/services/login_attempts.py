@@ -0,0 +1,56 @@
+"""Failed password login accounting in Redis."""
+
+import redis.asyncio as redis
+
+# Lock a phone number after this many bad passwords within the window
+MAX_FAILED_LOGIN_ATTEMPTS = 5
+FAILED_LOGIN_WINDOW_SECONDS = 900  # 15 minutes
+LOGIN_LOCK_SECONDS = 1800  # 30 minutes
+
+# KEYS: failures, lock - ARGV: max attempts, window ttl, lock ttl
+# Returns 1 when this failure locks the account, 0 otherwise
+RECORD_FAILURE_SCRIPT = """
+local failures = redis.call('INCR', KEYS[1])
+if failures == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+if failures >= tonumber(ARGV[1]) then
+    redis.call('SET', KEYS[2], 1, 'EX', ARGV[3])
+    redis.call('DEL', KEYS[1])
+    return 1
+end
+return 0
+"""
+
+
+class LoginAttemptTracker:
+    """
+    Count bad passwords per phone number and hold lock windows, with TTLs.
+
+    Checked before any database or Argon2 work, so repeated bad passwords
+    cost one Redis call each instead of a row update.
+    """
+
+    def __init__(self, redis_client: redis.Redis):
+        self.redis = redis_client
+        self._record_failure = redis_client.register_script(RECORD_FAILURE_SCRIPT)
+
+    def _get_failures_key(self, phone: str) -> str:
+        return f"login_failures:{phone}"
+
+    def _get_lock_key(self, phone: str) -> str:
+        return f"login_lock:{phone}"
+
+    async def is_locked(self, phone: str) -> bool:
+        return bool(await self.redis.exists(self._get_lock_key(phone)))
+
+    async def record_failure(self, phone: str) -> bool:
+        """Count a bad password. Returns True when it triggers a lock."""
+        locked = await self._record_failure(
+            keys=[self._get_failures_key(phone), self._get_lock_key(phone)],
+            args=[MAX_FAILED_LOGIN_ATTEMPTS, FAILED_LOGIN_WINDOW_SECONDS, LOGIN_LOCK_SECONDS],
+        )
+        return bool(locked)
+
+    async def reset(self, phone: str) -> None:
+        await self.redis.delete(self._get_failures_key(phone))
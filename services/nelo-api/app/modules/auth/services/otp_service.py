@@ -3,7 +3,6 @@
 import hashlib
 import logging
 import secrets
-from datetime import timedelta
 
 import redis.asyncio as redis
 
@@ -18,12 +17,60 @@ OTP_TTL_SECONDS = 300  # 5 minutes
 OTP_MAX_ATTEMPTS = 3
 OTP_RATE_LIMIT_SECONDS = 60  # 1 minute between requests
 
+# =============================================================================
+# Lua scripts (each OTP operation is a single atomic round trip)
+# =============================================================================
+
+# KEYS: otp, attempts, rate - ARGV: code hash, otp ttl, rate limit ttl
+# Returns 0 when stored, otherwise the seconds to wait before a new code
+GENERATE_SCRIPT = """
+local wait = redis.call('TTL', KEYS[3])
+if wait > 0 then
+    return wait
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+redis.call('SET', KEYS[2], 0, 'EX', ARGV[2])
+redis.call('SET', KEYS[3], 1, 'EX', ARGV[3])
+return 0
+"""
+
+# KEYS: otp, attempts - ARGV: code hash, max attempts
+# Returns -1 (expired), -2 (max attempts reached), -3 (verified),
+# or the attempts left after a wrong code
+VERIFY_SCRIPT = """
+local stored = redis.call('GET', KEYS[1])
+if not stored then
+    return -1
+end
+local max_attempts = tonumber(ARGV[2])
+local attempts = tonumber(redis.call('GET', KEYS[2]) or '0')
+if attempts >= max_attempts then
+    redis.call('DEL', KEYS[1], KEYS[2])
+    return -2
+end
+if stored == ARGV[1] then
+    redis.call('DEL', KEYS[1], KEYS[2])
+    return -3
+end
+attempts = redis.call('INCR', KEYS[2])
+if attempts == 1 then
+    redis.call('PEXPIRE', KEYS[2], math.max(redis.call('PTTL', KEYS[1]), 1))
+end
+return max_attempts - attempts
+"""
+
+OTP_EXPIRED = -1
+OTP_MAX_ATTEMPTS_REACHED = -2
+OTP_VERIFIED = -3
+
 
 class OTPService:
     """Service for generating and verifying OTP codes."""
 
     def __init__(self, redis_client: redis.Redis):
         self.redis = redis_client
+        self._generate_script = redis_client.register_script(GENERATE_SCRIPT)
+        self._verify_script = redis_client.register_script(VERIFY_SCRIPT)
 
     def _generate_code(self) -> str:
         """Generate a random 6-digit OTP code."""
@@ -49,6 +96,8 @@ class OTPService:
         """
         Check if we can send a new OTP (rate limiting).
 
+        Only a hint: ``generate_and_store`` enforces the limit atomically.
+
         Returns:
             Tuple of (can_send, seconds_until_retry)
         """
@@ -64,44 +113,38 @@ class OTPService:
         self,
         phone: str,
         purpose: str = "verify",
-    ) -> tuple[str, bool]:
+    ) -> tuple[str, int]:
         """
-        Generate OTP and store in Redis.
+        Generate OTP and store in Redis, unless one was sent too recently.
+
+        The rate limit check, the OTP, the attempts reset and the rate limit
+        key are applied by one script, so concurrent requests cannot both
+        get a code.
 
         Args:
             phone: Phone number
             purpose: Purpose of OTP (verify, login, reset_pin)
 
         Returns:
-            Tuple of (otp_code, success)
+            Tuple of (otp_code, seconds_until_retry); the code is empty when
+            rate limited
         """
-        # Check rate limit
-        can_send, wait_time = await self.can_send_otp(phone, purpose)
-        if not can_send:
-            logger.warning(f"OTP rate limited for {phone}, wait {wait_time}s")
-            return "", False
-
-        # Generate code
         code = self._generate_code()
-        code_hash = self._hash_code(code)
-
-        # Store in Redis
-        otp_key = self._get_otp_key(phone, purpose)
-        attempts_key = self._get_attempts_key(phone, purpose)
-        rate_key = self._get_rate_limit_key(phone, purpose)
-
-        # Use pipeline for atomic operations
-        async with self.redis.pipeline() as pipe:
-            # Store OTP hash
-            pipe.setex(otp_key, OTP_TTL_SECONDS, code_hash)
-            # Reset attempts
-            pipe.setex(attempts_key, OTP_TTL_SECONDS, "0")
-            # Set rate limit
-            pipe.setex(rate_key, OTP_RATE_LIMIT_SECONDS, "1")
-            await pipe.execute()
+        wait_time = await self._generate_script(
+            keys=[
+                self._get_otp_key(phone, purpose),
+                self._get_attempts_key(phone, purpose),
+                self._get_rate_limit_key(phone, purpose),
+            ],
+            args=[self._hash_code(code), OTP_TTL_SECONDS, OTP_RATE_LIMIT_SECONDS],
+        )
+        wait_time = int(wait_time)
+        if wait_time > 0:
+            logger.warning(f"OTP rate limited for {phone}, wait {wait_time}s")
+            return "", wait_time
 
         logger.info(f"OTP generated for {phone} (purpose: {purpose})")
-        return code, True
+        return code, 0
 
     async def verify(
         self,
@@ -112,6 +155,9 @@ class OTPService:
         """
         Verify OTP code.
 
+        Attempts are counted by the verification script itself, so parallel
+        guesses cannot exceed ``OTP_MAX_ATTEMPTS``.
+
         Args:
             phone: Phone number
             code: OTP code to verify
@@ -120,33 +166,23 @@ class OTPService:
         Returns:
             Tuple of (success, error_message)
         """
-        otp_key = self._get_otp_key(phone, purpose)
-        attempts_key = self._get_attempts_key(phone, purpose)
-
-        # Get stored hash
-        stored_hash = await self.redis.get(otp_key)
-        if not stored_hash:
+        result = int(
+            await self._verify_script(
+                keys=[
+                    self._get_otp_key(phone, purpose),
+                    self._get_attempts_key(phone, purpose),
+                ],
+                args=[self._hash_code(code), OTP_MAX_ATTEMPTS],
+            )
+        )
+
+        if result == OTP_EXPIRED:
             return False, "Code expiré ou invalide"
-
-        # Check attempts
-        attempts = await self.redis.get(attempts_key)
-        attempts = int(attempts) if attempts else 0
-
-        if attempts >= OTP_MAX_ATTEMPTS:
-            # Delete OTP after max attempts
-            await self.redis.delete(otp_key, attempts_key)
+        if result == OTP_MAX_ATTEMPTS_REACHED:
             return False, "Nombre maximum de tentatives atteint"
+        if result != OTP_VERIFIED:
+            return False, f"Code incorrect. {result} tentative(s) restante(s)"
 
-        # Verify code
-        code_hash = self._hash_code(code)
-        if code_hash != stored_hash:
-            # Increment attempts
-            await self.redis.incr(attempts_key)
-            remaining = OTP_MAX_ATTEMPTS - attempts - 1
-            return False, f"Code incorrect. {remaining} tentative(s) restante(s)"
-
-        # Success - delete OTP
-        await self.redis.delete(otp_key, attempts_key)
         logger.info(f"OTP verified for {phone} (purpose: {purpose})")
         return True, ""
 
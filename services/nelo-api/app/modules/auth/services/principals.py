@@ -0,0 +1,214 @@
+"""Cache of authenticated principals (the user fields auth checks need)."""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional, cast
+from uuid import UUID
+
+from redis.typing import EncodableT, FieldT
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session as OrmSession, UOWTransaction
+
+from app.core.config import get_settings
+from app.core.redis import get_redis_context
+from app.modules.auth.models import User, UserRole
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# User columns copied into the principal: a change to any of them invalidates it
+PRINCIPAL_FIELDS = ("role", "phone", "email", "is_active", "is_blocked", "blocked_reason")
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """Authenticated user as seen by the auth dependencies (no ORM object)."""
+
+    id: UUID
+    role: UserRole
+    phone: str
+    email: Optional[str]
+    is_active: bool
+    is_blocked: bool
+    blocked_reason: Optional[str]
+
+    def to_redis(self) -> dict[FieldT, EncodableT]:
+        return {
+            "role": self.role.value,
+            "phone": self.phone,
+            "email": self.email or "",
+            "is_active": "1" if self.is_active else "0",
+            "is_blocked": "1" if self.is_blocked else "0",
+            "blocked_reason": self.blocked_reason or "",
+        }
+
+    @classmethod
+    def from_redis(cls, user_id: UUID, data: dict[str, str]) -> "Principal":
+        return cls(
+            id=user_id,
+            role=UserRole(data["role"]),
+            phone=data["phone"],
+            email=data["email"] or None,
+            is_active=data["is_active"] == "1",
+            is_blocked=data["is_blocked"] == "1",
+            blocked_reason=data["blocked_reason"] or None,
+        )
+
+
+class PrincipalCache:
+    """
+    Two-level principal cache: in-process (short TTL) then a Redis hash.
+
+    On a miss, only the principal columns are selected. Invalidation deletes
+    the Redis hash and is published on ``CHANNEL`` so every process drops its
+    local copy; the local level is only used while that subscription is up.
+    """
+
+    CHANNEL = "auth:principals"
+    KEY = "principal:{user_id}"
+    RETRY_DELAY = 5.0
+
+    def __init__(self, local_ttl: float, redis_ttl: int):
+        self.local_ttl = local_ttl
+        self.redis_ttl = redis_ttl
+        self._local: dict[UUID, tuple[Principal, float]] = {}
+        self._subscribed = False
+        self._task: asyncio.Task[None] | None = None
+        self._pending: set[asyncio.Task[None]] = set()
+
+    async def get(self, user_id: UUID, db: AsyncSession) -> Optional[Principal]:
+        """Principal for ``user_id``, or None if the user does not exist."""
+        if self._subscribed:
+            cached = self._local.get(user_id)
+            if cached and cached[1] > time.monotonic():
+                return cached[0]
+
+        key = self.KEY.format(user_id=user_id)
+        principal = None
+        try:
+            async with get_redis_context() as client:
+                # decode_responses: keys and values are str
+                data = cast(dict[str, str], await client.hgetall(key))
+                if data:
+                    principal = Principal.from_redis(user_id, data)
+                else:
+                    principal = await self._load(user_id, db)
+                    if principal:
+                        pipe = client.pipeline(transaction=False)
+                        pipe.hset(key, mapping=principal.to_redis())
+                        pipe.expire(key, self.redis_ttl)
+                        await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Principal cache unavailable: {e}")
+            principal = await self._load(user_id, db)
+
+        if principal and self._subscribed:
+            self._local[user_id] = (principal, time.monotonic() + self.local_ttl)
+        return principal
+
+    async def _load(self, user_id: UUID, db: AsyncSession) -> Optional[Principal]:
+        columns = [User.id] + [getattr(User, name) for name in PRINCIPAL_FIELDS]
+        result = await db.execute(select(*columns).where(User.id == user_id))
+        row = result.one_or_none()
+        return Principal(**row._mapping) if row else None
+
+    def forget_local(self, user_id: UUID) -> None:
+        self._local.pop(user_id, None)
+
+    async def invalidate(self, user_id: UUID) -> None:
+        """Drop a principal everywhere (call after the user change is committed)."""
+        self.forget_local(user_id)
+        async with get_redis_context() as client:
+            pipe = client.pipeline(transaction=False)
+            pipe.delete(self.KEY.format(user_id=user_id))
+            pipe.publish(self.CHANNEL, str(user_id))
+            await pipe.execute()
+
+    def schedule_invalidation(self, user_id: UUID) -> None:
+        """Invalidate from sync code running on the event loop (ORM events)."""
+        self.forget_local(user_id)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(self.invalidate(user_id))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with get_redis_context() as client:
+                    pubsub = client.pubsub()
+                    try:
+                        await pubsub.subscribe(self.CHANNEL)
+                        self._local.clear()
+                        self._subscribed = True
+                        async for message in pubsub.listen():
+                            if message["type"] == "message":
+                                self.forget_local(UUID(message["data"]))
+                    finally:
+                        self._subscribed = False
+                        await pubsub.aclose()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Principal cache subscription lost: {e}")
+                await asyncio.sleep(self.RETRY_DELAY)
+
+    def start(self) -> None:
+        """Start following invalidations (call from the event loop)."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._subscribed = False
+        self._local.clear()
+
+
+principal_cache = PrincipalCache(
+    local_ttl=settings.principal_cache_local_ttl_seconds,
+    redis_ttl=settings.principal_cache_redis_ttl_seconds,
+)
+
+
+# =============================================================================
+# Invalidation on user changes
+# =============================================================================
+
+# Changes made through the ORM (blocking, deactivation, role change...) are
+# picked up automatically. Bulk UPDATE statements must call
+# principal_cache.invalidate() themselves.
+
+
+@event.listens_for(OrmSession, "after_flush")
+def _collect_principal_changes(session: OrmSession, flush_context: UOWTransaction) -> None:
+    for obj in list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, User):
+            continue
+        state = inspect(obj)
+        if obj in session.deleted or any(
+            state.attrs[name].history.has_changes() for name in PRINCIPAL_FIELDS
+        ):
+            session.info.setdefault("principal_changes", set()).add(obj.id)
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _invalidate_changed_principals(session: OrmSession) -> None:
+    for user_id in session.info.pop("principal_changes", ()):
+        principal_cache.schedule_invalidation(user_id)
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _discard_principal_changes(session: OrmSession) -> None:
+    session.info.pop("principal_changes", None)
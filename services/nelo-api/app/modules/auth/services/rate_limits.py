@@ -0,0 +1,30 @@
+"""Rate limits of the authentication endpoints."""
+
+from app.core.rate_limit import RateLimit
+
+# Numbers sharing everything but their last digits (a block of 10,000 numbers):
+# SMS pumping goes through whole ranges of premium numbers.
+PHONE_PREFIX_HIDDEN_DIGITS = 4
+
+SEND_OTP_LIMITS = (
+    RateLimit("phone", limit=5, window_seconds=3600),
+    RateLimit("phone_prefix", limit=30, window_seconds=3600),
+    RateLimit("ip", limit=20, window_seconds=3600),
+    RateLimit("device", limit=10, window_seconds=3600),
+)
+
+LOGIN_PASSWORD_LIMITS = (
+    RateLimit("phone", limit=10, window_seconds=900),
+    RateLimit("ip", limit=50, window_seconds=900),
+    RateLimit("device", limit=20, window_seconds=900),
+)
+
+VERIFY_PIN_LIMITS = (
+    RateLimit("user", limit=5, window_seconds=900),
+    RateLimit("ip", limit=30, window_seconds=900),
+)
+
+
+def phone_prefix(phone: str) -> str:
+    """Range a phone number belongs to."""
+    return phone[:-PHONE_PREFIX_HIDDEN_DIGITS]
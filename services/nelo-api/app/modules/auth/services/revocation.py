@@ -0,0 +1,158 @@
+"""In-process token revocation cache kept in sync through Redis pub/sub."""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any
+
+import redis.asyncio as redis
+
+from app.core.config import get_settings
+from app.core.redis import get_redis_context
+from app.modules.auth.services.token_cache import verified_token_cache
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+TOKEN_BLACKLIST_PREFIX = "token_blacklist:"
+USER_BLACKLIST_PREFIX = "user_token_blacklist:"
+# Refresh tokens are revoked on every refresh: checked in Redis, never cached
+REFRESH_TOKEN_BLACKLIST_PREFIX = "refresh_token_blacklist:"
+
+
+class RevocationCache:
+    """
+    Local copy of the access token blacklist and user cutoffs.
+
+    Each process subscribes to ``CHANNEL``, then loads the existing blacklist
+    keys from Redis. Once both are done the cache is ``ready`` and revocation
+    checks no longer touch Redis. While the subscription is down the cache is
+    not ready and callers fall back to Redis.
+
+    Revoked refresh tokens (one per refresh) are not kept here: they are
+    only presented to the refresh endpoint, which checks them in Redis.
+    """
+
+    CHANNEL = "auth:revocations"
+    PRUNE_INTERVAL = 60.0
+    RETRY_DELAY = 5.0
+
+    def __init__(self) -> None:
+        self._tokens: dict[str, float] = {}  # jti -> expiry (epoch seconds)
+        self._users: dict[str, int] = {}  # user id -> tokens issued before are revoked
+        self._ready = False
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def is_token_revoked(self, jti: str) -> bool:
+        expires_at = self._tokens.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def is_issued_before_cutoff(self, user_id: str | None, token_iat: int | None) -> bool:
+        if not user_id or not token_iat:
+            return False
+        cutoff = self._users.get(user_id)
+        return cutoff is not None and token_iat < cutoff
+
+    def is_revoked(self, jti: str, user_id: str | None, token_iat: int | None) -> bool:
+        """Whether a token is blacklisted, or issued before its user's cutoff."""
+        return self.is_token_revoked(jti) or self.is_issued_before_cutoff(user_id, token_iat)
+
+    def add_token(self, jti: str, expires_at: float) -> None:
+        self._tokens[jti] = max(expires_at, self._tokens.get(jti, 0.0))
+        verified_token_cache.discard_jti(jti)
+
+    def add_user_cutoff(self, user_id: str, timestamp: int) -> None:
+        self._users[user_id] = max(timestamp, self._users.get(user_id, 0))
+
+    def apply(self, message: dict[str, Any]) -> None:
+        """Apply a revocation published by any process."""
+        if message.get("type") == "token":
+            self.add_token(message["jti"], float(message["exp"]))
+        elif message.get("type") == "user":
+            self.add_user_cutoff(message["user_id"], int(message["ts"]))
+
+    def prune(self) -> None:
+        """Drop entries that can no longer match a valid token."""
+        now = time.time()
+        self._tokens = {jti: exp for jti, exp in self._tokens.items() if exp > now}
+        max_age = settings.refresh_token_expire_days * 24 * 3600
+        self._users = {uid: ts for uid, ts in self._users.items() if ts + max_age > now}
+
+    async def _load(self, client: redis.Redis) -> None:
+        """Load the blacklist keys already in Redis."""
+        now = time.time()
+        jtis = [
+            key async for key in client.scan_iter(match=f"{TOKEN_BLACKLIST_PREFIX}*", count=1000)
+        ]
+        if jtis:
+            pipe = client.pipeline(transaction=False)
+            for key in jtis:
+                pipe.ttl(key)
+            for key, ttl in zip(jtis, await pipe.execute()):
+                if ttl > 0:
+                    self.add_token(key[len(TOKEN_BLACKLIST_PREFIX):], now + ttl)
+
+        users = [
+            key async for key in client.scan_iter(match=f"{USER_BLACKLIST_PREFIX}*", count=1000)
+        ]
+        if users:
+            for key, value in zip(users, await client.mget(users)):
+                if value:
+                    self.add_user_cutoff(key[len(USER_BLACKLIST_PREFIX):], int(value))
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with get_redis_context() as client:
+                    pubsub = client.pubsub()
+                    try:
+                        # Subscribe before loading so nothing published in between is lost
+                        await pubsub.subscribe(self.CHANNEL)
+                        await self._load(client)
+                        self._ready = True
+                        logger.info(
+                            f"Revocation cache ready ({len(self._tokens)} tokens, "
+                            f"{len(self._users)} users)"
+                        )
+                        last_prune = time.monotonic()
+                        while True:
+                            message = await pubsub.get_message(
+                                ignore_subscribe_messages=True,
+                                timeout=self.PRUNE_INTERVAL,
+                            )
+                            if message and message["type"] == "message":
+                                self.apply(json.loads(message["data"]))
+                            if time.monotonic() - last_prune > self.PRUNE_INTERVAL:
+                                self.prune()
+                                last_prune = time.monotonic()
+                    finally:
+                        self._ready = False
+                        await pubsub.aclose()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Revocation cache subscription lost: {e}")
+                await asyncio.sleep(self.RETRY_DELAY)
+
+    def start(self) -> None:
+        """Start following revocations (call from the event loop)."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._ready = False
+
+
+revocation_cache = RevocationCache()
@@ -0,0 +1,73 @@
+"""LRU cache of verified JWT claims."""
+
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+# Length of the token id (jti) used by the blacklist: a prefix of the digest
+JTI_LENGTH = 16
+
+
+def token_digest(token: str) -> str:
+    """SHA-256 hex digest of a token (its first JTI_LENGTH chars are the jti)."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class VerifiedTokenCache:
+    """
+    Claims of tokens whose signature has already been verified.
+
+    Keyed by the full token digest. Entries are dropped once the token
+    expires, when it is revoked, and in LRU order beyond ``maxsize``
+    (0 disables the cache). Returned claims are shared: do not mutate them.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._claims: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._digests: dict[str, str] = {}  # jti -> digest
+
+    def __len__(self) -> int:
+        return len(self._claims)
+
+    def get(self, digest: str) -> dict[str, Any] | None:
+        claims = self._claims.get(digest)
+        if claims is None:
+            return None
+        if claims.get("exp", 0) <= time.time():
+            self.discard(digest)
+            return None
+        self._claims.move_to_end(digest)
+        return claims
+
+    def put(self, digest: str, claims: dict[str, Any]) -> None:
+        if self.maxsize <= 0 or "exp" not in claims:
+            return
+        self._claims[digest] = claims
+        self._claims.move_to_end(digest)
+        self._digests[digest[:JTI_LENGTH]] = digest
+        while len(self._claims) > self.maxsize:
+            oldest, _ = self._claims.popitem(last=False)
+            self._digests.pop(oldest[:JTI_LENGTH], None)
+
+    def discard(self, digest: str) -> None:
+        self._claims.pop(digest, None)
+        self._digests.pop(digest[:JTI_LENGTH], None)
+
+    def discard_jti(self, jti: str) -> None:
+        """Drop a revoked token known only by its blacklist id."""
+        digest = self._digests.get(jti)
+        if digest:
+            self.discard(digest)
+
+    def clear(self) -> None:
+        self._claims.clear()
+        self._digests.clear()
+
+
+verified_token_cache = VerifiedTokenCache(maxsize=settings.jwt_verified_cache_size)
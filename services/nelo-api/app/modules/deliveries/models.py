@@ -150,9 +150,12 @@ class Driver(Base):
     vehicle_plate: Mapped[Optional[str]] = mapped_column(String(20))
     vehicle_photo_url: Mapped[Optional[str]] = mapped_column(Text)
     max_orders: Mapped[int] = mapped_column(Integer, default=2)
+    # Running aggregates: updated with each rating / finished delivery
     average_rating: Mapped[Optional[Decimal]] = mapped_column(Numeric(3, 2))
+    rating_sum: Mapped[int] = mapped_column(Integer, server_default="0", nullable=False)
     rating_count: Mapped[int] = mapped_column(Integer, default=0)
     total_deliveries: Mapped[int] = mapped_column(Integer, default=0)
+    failed_deliveries: Mapped[int] = mapped_column(Integer, server_default="0", nullable=False)
     total_earnings: Mapped[int] = mapped_column(Integer, default=0)  # In smallest unit (FCFA)
     completion_rate: Mapped[Decimal] = mapped_column(Numeric(5, 2), default=100)
     status: Mapped[str] = mapped_column(String(20), default="pending")
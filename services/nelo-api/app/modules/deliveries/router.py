@@ -1,15 +1,26 @@
 """Deliveries module API routes - Drivers and Deliveries."""
 
-from typing import Annotated, Optional
+from typing import Annotated, Any, Optional
 from uuid import UUID
 
-import redis.asyncio as redis
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db_session
-from app.core.redis import get_redis
-from app.modules.auth.dependencies import CurrentUser, require_role
+from app.core.database import (
+    get_db_session,
+    get_read_db_context,
+    get_read_db_session,
+    read_only_session,
+)
+from app.modules.auth.dependencies import (
+    CurrentPrincipal,
+    StreamPrincipal,
+    WebSocketPrincipal,
+    require_role,
+)
+from app.modules.auth.models import UserRole
+from app.modules.auth.services.principals import Principal
 from app.modules.deliveries.schemas import (
     DeliveryConfirmation,
     DeliveryListResponse,
@@ -34,19 +45,59 @@ from app.modules.deliveries.schemas import (
     DriverVehicleUpdate,
 )
 from app.modules.deliveries.service import DeliveryService
+from app.shared.audit import audit_writer
+from app.shared.realtime import Subscription, realtime_hub
+from app.shared.realtime.tracking import (
+    DELIVERY_FINAL_EVENTS,
+    delivery_channel,
+    serve_websocket,
+    sse_response,
+    tracking_channels,
+)
 
 router = APIRouter(tags=["Drivers & Deliveries"])
 
 
 def get_delivery_service(
     db: Annotated[AsyncSession, Depends(get_db_session)],
-    redis_client: Annotated[redis.Redis, Depends(get_redis)],
 ) -> DeliveryService:
     """Dependency to get delivery service."""
-    return DeliveryService(db, redis_client)
+    return DeliveryService(db)
+
+
+# Tracking is polled by clients: keep its queries short.
+TRACKING_STATEMENT_TIMEOUT_MS = 2000
+
+
+def get_delivery_read_service(
+    db: Annotated[AsyncSession, Depends(get_read_db_session)],
+) -> DeliveryService:
+    """Dependency to get delivery service on a read-only (replica) session."""
+    return DeliveryService(db)
+
+
+def get_delivery_primary_read_service(
+    db: Annotated[AsyncSession, Depends(read_only_session(use_primary=True))],
+) -> DeliveryService:
+    """Dependency to get delivery service on a read-only primary session (read-your-writes)."""
+    return DeliveryService(db)
+
+
+def get_delivery_tracking_service(
+    db: Annotated[
+        AsyncSession, Depends(read_only_session(TRACKING_STATEMENT_TIMEOUT_MS))
+    ],
+) -> DeliveryService:
+    """Dependency to get delivery service for tracking polls."""
+    return DeliveryService(db)
 
 
 DeliveryServiceDep = Annotated[DeliveryService, Depends(get_delivery_service)]
+DeliveryReadServiceDep = Annotated[DeliveryService, Depends(get_delivery_read_service)]
+DeliveryPrimaryReadServiceDep = Annotated[
+    DeliveryService, Depends(get_delivery_primary_read_service)
+]
+DeliveryTrackingServiceDep = Annotated[DeliveryService, Depends(get_delivery_tracking_service)]
 
 
 # =============================================================================
@@ -63,7 +114,7 @@ DeliveryServiceDep = Annotated[DeliveryService, Depends(get_delivery_service)]
 )
 async def register_driver(
     request: DriverRegister,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     delivery_service: DeliveryServiceDep,
 ) -> DriverResponse:
     """Register as a driver."""
@@ -102,8 +153,8 @@ async def register_driver(
     description="Retourne le profil du livreur connecte.",
 )
 async def get_my_driver_profile(
-    current_user: CurrentUser,
-    delivery_service: DeliveryServiceDep,
+    current_user: CurrentPrincipal,
+    delivery_service: DeliveryPrimaryReadServiceDep,
 ) -> DriverResponse:
     """Get current driver profile."""
     driver = await delivery_service.get_driver_by_user_id(current_user.id)
@@ -125,7 +176,7 @@ async def get_my_driver_profile(
 )
 async def update_my_driver_profile(
     request: DriverUpdate,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     delivery_service: DeliveryServiceDep,
 ) -> DriverResponse:
     """Update driver profile."""
@@ -155,7 +206,7 @@ async def update_my_driver_profile(
 )
 async def update_my_vehicle(
     request: DriverVehicleUpdate,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     delivery_service: DeliveryServiceDep,
 ) -> DriverResponse:
     """Update driver vehicle."""
@@ -191,7 +242,7 @@ async def update_my_vehicle(
 )
 async def update_driver_status(
     request: DriverStatusUpdate,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     delivery_service: DeliveryServiceDep,
 ) -> DriverResponse:
     """Toggle driver online/offline status."""
@@ -217,7 +268,7 @@ async def update_driver_status(
 )
 async def update_driver_location(
     request: DriverLocationUpdate,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     delivery_service: DeliveryServiceDep,
 ) -> dict:
     """Update driver GPS location."""
@@ -250,8 +301,8 @@ async def update_driver_location(
     description="Retourne les horaires de disponibilite du livreur.",
 )
 async def get_my_availability(
-    current_user: CurrentUser,
-    delivery_service: DeliveryServiceDep,
+    current_user: CurrentPrincipal,
+    delivery_service: DeliveryReadServiceDep,
 ) -> list[DriverAvailabilityResponse]:
     """Get driver availability schedules."""
     schedules = await delivery_service.get_driver_availability(current_user.id)
@@ -267,7 +318,7 @@ async def get_my_availability(
 async def update_my_availability(
     day_of_week: int,
     request: DriverAvailabilityCreate,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     delivery_service: DeliveryServiceDep,
 ) -> DriverAvailabilityResponse:
     """Update availability for a day."""
@@ -306,8 +357,8 @@ async def update_my_availability(
     description="Retourne les documents KYC du livreur.",
 )
 async def get_my_documents(
-    current_user: CurrentUser,
-    delivery_service: DeliveryServiceDep,
+    current_user: CurrentPrincipal,
+    delivery_service: DeliveryReadServiceDep,
 ) -> list[DriverDocumentResponse]:
     """Get driver documents."""
     documents = await delivery_service.get_driver_documents(current_user.id)
@@ -323,7 +374,7 @@ async def get_my_documents(
 )
 async def upload_document(
     request: DriverDocumentCreate,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     delivery_service: DeliveryServiceDep,
 ) -> DriverDocumentResponse:
     """Upload a KYC document."""
@@ -355,8 +406,8 @@ async def upload_document(
     description="Retourne le resume des gains du livreur.",
 )
 async def get_my_earnings(
-    current_user: CurrentUser,
-    delivery_service: DeliveryServiceDep,
+    current_user: CurrentPrincipal,
+    delivery_service: DeliveryReadServiceDep,
 ) -> DriverEarningsResponse:
     """Get driver earnings summary."""
     earnings = await delivery_service.get_driver_earnings(current_user.id)
@@ -382,8 +433,8 @@ async def get_my_earnings(
     description="Retourne les offres de courses en attente.",
 )
 async def get_available_offers(
-    current_user: CurrentUser,
-    delivery_service: DeliveryServiceDep,
+    current_user: CurrentPrincipal,
+    delivery_service: DeliveryPrimaryReadServiceDep,
 ) -> list[DeliveryOfferResponse]:
     """Get available delivery offers for driver."""
     offers = await delivery_service.get_pending_offers(current_user.id)
@@ -398,7 +449,7 @@ async def get_available_offers(
 )
 async def accept_offer(
     offer_id: UUID,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     delivery_service: DeliveryServiceDep,
 ) -> DeliveryResponse:
     """Accept a delivery offer."""
@@ -426,7 +477,7 @@ async def accept_offer(
 async def reject_offer(
     offer_id: UUID,
     request: DeliveryOfferAction,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     delivery_service: DeliveryServiceDep,
 ) -> dict:
     """Reject a delivery offer."""
@@ -458,8 +509,8 @@ async def reject_offer(
     description="Retourne l'historique des livraisons du livreur.",
 )
 async def get_my_deliveries(
-    current_user: CurrentUser,
-    delivery_service: DeliveryServiceDep,
+    current_user: CurrentPrincipal,
+    delivery_service: DeliveryReadServiceDep,
     delivery_status: Optional[str] = Query(None, alias="status"),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
@@ -488,8 +539,8 @@ async def get_my_deliveries(
     description="Retourne la livraison en cours du livreur.",
 )
 async def get_current_delivery(
-    current_user: CurrentUser,
-    delivery_service: DeliveryServiceDep,
+    current_user: CurrentPrincipal,
+    delivery_service: DeliveryPrimaryReadServiceDep,
 ) -> Optional[DeliveryResponse]:
     """Get current active delivery."""
     delivery = await delivery_service.get_active_delivery(current_user.id)
@@ -514,7 +565,7 @@ async def get_current_delivery(
 async def update_delivery_status(
     delivery_id: UUID,
     request: DeliveryStatusUpdate,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     delivery_service: DeliveryServiceDep,
 ) -> DeliveryResponse:
     """Update delivery status."""
@@ -546,7 +597,7 @@ async def update_delivery_status(
 async def confirm_delivery(
     delivery_id: UUID,
     request: DeliveryConfirmation,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     delivery_service: DeliveryServiceDep,
 ) -> DeliveryResponse:
     """Confirm delivery with code."""
@@ -576,10 +627,11 @@ async def confirm_delivery(
 )
 async def track_delivery(
     delivery_id: UUID,
-    current_user: CurrentUser,
-    delivery_service: DeliveryServiceDep,
+    current_user: CurrentPrincipal,
+    delivery_service: DeliveryTrackingServiceDep,
 ) -> DeliveryTrackingResponse:
     """Get delivery tracking information."""
+    await _check_delivery_viewer(delivery_service, delivery_id, current_user)
     tracking = await delivery_service.get_delivery_tracking(delivery_id)
 
     if not tracking:
@@ -591,6 +643,86 @@ async def track_delivery(
     return DeliveryTrackingResponse(**tracking)
 
 
+async def _check_delivery_viewer(
+    delivery_service: DeliveryService, delivery_id: UUID, principal: Principal
+) -> None:
+    """Raise 404/403 unless ``principal`` is the customer, the assigned driver or an admin."""
+    participants = await delivery_service.get_delivery_participants(delivery_id)
+    if participants is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Livraison non trouvee",
+        )
+    if principal.id not in participants and principal.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acces non autorise",
+        )
+
+
+async def _open_delivery_tracking(
+    delivery_id: UUID, principal: Principal
+) -> tuple[Subscription, dict[str, Any]]:
+    """
+    Subscribe to a delivery's updates, then load its current state.
+
+    Subscribing first means no update is lost in between. The read session
+    is closed before streaming starts.
+    """
+    subscription = await realtime_hub.subscribe([delivery_channel(delivery_id)])
+    try:
+        async with get_read_db_context(TRACKING_STATEMENT_TIMEOUT_MS) as db:
+            delivery_service = DeliveryService(db)
+            await _check_delivery_viewer(delivery_service, delivery_id, principal)
+            tracking = await delivery_service.get_delivery_tracking(delivery_id)
+        for channel in tracking_channels(tracking):
+            await subscription.add(channel)
+    except ValueError as e:
+        await subscription.close()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        )
+    except BaseException:
+        await subscription.close()
+        raise
+    return subscription, tracking
+
+
+@router.get(
+    "/deliveries/{delivery_id}/tracking/stream",
+    response_class=StreamingResponse,
+    summary="Suivi livraison en direct",
+    description=(
+        "Flux Server-Sent Events: etat de suivi initial (`snapshot`), puis "
+        "changements de statut et positions du livreur."
+    ),
+)
+async def stream_delivery_tracking(
+    delivery_id: UUID,
+    current_user: StreamPrincipal,
+) -> StreamingResponse:
+    """Stream delivery tracking updates (SSE)."""
+    subscription, tracking = await _open_delivery_tracking(delivery_id, current_user)
+    return sse_response(subscription, tracking, DELIVERY_FINAL_EVENTS)
+
+
+@router.websocket("/deliveries/{delivery_id}/tracking/ws")
+async def delivery_tracking_websocket(
+    websocket: WebSocket,
+    delivery_id: UUID,
+    current_user: WebSocketPrincipal,
+) -> None:
+    """Stream delivery tracking updates over a WebSocket."""
+    try:
+        subscription, tracking = await _open_delivery_tracking(delivery_id, current_user)
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail)
+        return
+    await websocket.accept()
+    await serve_websocket(websocket, subscription, tracking, DELIVERY_FINAL_EVENTS)
+
+
 # =============================================================================
 # Admin: Driver Management
 # =============================================================================
@@ -603,8 +735,8 @@ async def track_delivery(
     description="Liste tous les livreurs (admin uniquement).",
 )
 async def list_drivers(
-    current_user: Annotated[CurrentUser, Depends(require_role("admin"))],
-    delivery_service: DeliveryServiceDep,
+    current_user: Annotated[Principal, Depends(require_role("admin"))],
+    delivery_service: DeliveryReadServiceDep,
     driver_status: Optional[str] = Query(None, alias="status"),
     city_id: Optional[UUID] = Query(None),
     is_online: Optional[bool] = Query(None),
@@ -638,7 +770,7 @@ async def list_drivers(
 async def update_driver_admin_status(
     driver_id: UUID,
     new_status: str = Query(..., pattern="^(pending|active|suspended|deactivated)$"),
-    current_user: Annotated[CurrentUser, Depends(require_role("admin"))] = None,
+    current_user: Annotated[Principal, Depends(require_role("admin"))] = None,
     delivery_service: DeliveryServiceDep = None,
 ) -> DriverResponse:
     """Update driver status (admin only)."""
@@ -650,6 +782,14 @@ async def update_driver_admin_status(
             detail="Livreur non trouve",
         )
 
+    audit_writer.record(
+        f"admin.driver.status.{new_status}",
+        user_id=current_user.id,
+        resource_type="driver",
+        resource_id=driver_id,
+        session=delivery_service.db,
+    )
+
     return DriverResponse.model_validate(driver)
 
 
@@ -664,7 +804,7 @@ async def verify_document(
     document_id: UUID,
     approved: bool = Query(...),
     rejection_reason: Optional[str] = Query(None),
-    current_user: Annotated[CurrentUser, Depends(require_role("admin"))] = None,
+    current_user: Annotated[Principal, Depends(require_role("admin"))] = None,
     delivery_service: DeliveryServiceDep = None,
 ) -> DriverDocumentResponse:
     """Verify driver document (admin only)."""
@@ -682,4 +822,12 @@ async def verify_document(
             detail="Document non trouve",
         )
 
+    audit_writer.record(
+        "admin.driver.document.approved" if approved else "admin.driver.document.rejected",
+        user_id=current_user.id,
+        resource_type="driver_document",
+        resource_id=document_id,
+        session=delivery_service.db,
+    )
+
     return DriverDocumentResponse.model_validate(document)
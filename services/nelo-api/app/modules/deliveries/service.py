@@ -8,7 +8,7 @@ from typing import Optional
 from uuid import UUID
 
 from geoalchemy2.functions import ST_Distance, ST_DWithin, ST_SetSRID, ST_MakePoint, ST_Transform
-from sqlalchemy import and_, func, select, text
+from sqlalchemy import Numeric, and_, cast, func, select, text, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -22,7 +22,9 @@ from app.modules.deliveries.models import (
     DriverDocument,
     OfferStatus,
 )
+from app.shared.audit import audit_writer
 from app.shared.events.event_bus import EventBus, Event
+from app.shared.realtime.tracking import publish_driver_location
 
 
 class DriverMatchingAlgorithm:
@@ -188,8 +190,10 @@ class DeliveryService:
         user_id: UUID,
         latitude: Decimal,
         longitude: Decimal,
+        heading: Optional[float] = None,
+        speed: Optional[float] = None,
     ) -> Optional[Driver]:
-        """Update driver's current location."""
+        """Update driver's current location and push it to live tracking streams."""
         driver = await self.get_driver_by_user_id(user_id)
         if not driver:
             return None
@@ -210,6 +214,10 @@ class DeliveryService:
         )
 
         await self.db.flush()
+
+        await publish_driver_location(
+            driver.id, float(latitude), float(longitude), heading, speed
+        )
         return driver
 
     # =========================================================================
@@ -322,12 +330,12 @@ class DeliveryService:
                 "order_id": str(order_id),
                 "reference": reference,
             }
-        ))
+        ), session=self.db)
 
         return delivery
 
     async def find_and_offer_drivers(
-        self, delivery_id: UUID, order_value: int = 0
+        self, delivery_id: UUID, order_value: int = 0, dispatch_round: int = 1
     ) -> list[DeliveryOffer]:
         """Find nearby available drivers and create offers."""
         delivery = await self.get_delivery(delivery_id)
@@ -380,8 +388,11 @@ class DeliveryService:
             data={
                 "delivery_id": str(delivery_id),
                 "offer_count": len(offers),
+                "order_value": order_value,
+                "dispatch_round": dispatch_round,
+                "expires_at": expires_at.isoformat(),
             }
-        ))
+        ), session=self.db)
 
         return offers
 
@@ -431,25 +442,26 @@ class DeliveryService:
 
         # Assign driver to delivery
         delivery = await self.get_delivery(offer.delivery_id)
-        if delivery:
-            delivery.driver_id = driver.id
-            delivery.status = DeliveryStatus.ACCEPTED.value
-            delivery.assigned_at = datetime.now(timezone.utc)
-            delivery.matching_score = offer.matching_score
-            delivery.driver_earnings = offer.estimated_earnings
-
-            # Calculate ETA (rough estimate: 5 min/km + 10 min pickup)
-            distance = float(offer.distance_km or 0)
-            eta_minutes = int(distance * 5 + 10)
-            delivery.eta_minutes = eta_minutes
-
-            # Record status change
-            await self._record_status_change(
-                delivery.id,
-                DeliveryStatus.PENDING,
-                DeliveryStatus.ACCEPTED,
-                driver.id,
-            )
+        if not delivery:
+            raise ValueError("Livraison non trouvee")
+        delivery.driver_id = driver.id
+        delivery.status = DeliveryStatus.ACCEPTED.value
+        delivery.assigned_at = datetime.now(timezone.utc)
+        delivery.matching_score = offer.matching_score
+        delivery.driver_earnings = offer.estimated_earnings
+
+        # Calculate ETA (rough estimate: 5 min/km + 10 min pickup)
+        distance = float(offer.distance_km or 0)
+        eta_minutes = int(distance * 5 + 10)
+        delivery.eta_minutes = eta_minutes
+
+        # Record status change
+        await self._record_status_change(
+            delivery.id,
+            DeliveryStatus.PENDING,
+            DeliveryStatus.ACCEPTED,
+            driver.id,
+        )
 
         # Update driver availability
         driver.is_available = False
@@ -463,11 +475,27 @@ class DeliveryService:
                 "delivery_id": str(delivery.id),
                 "driver_id": str(driver.id),
                 "order_id": str(delivery.order_id),
+                "status": delivery.status,
+                "eta_minutes": delivery.eta_minutes,
             }
-        ))
+        ), session=self.db)
 
         return delivery
 
+    async def expire_pending_offers(self, delivery_id: UUID) -> list[DeliveryOffer]:
+        """Expire the offers of a delivery that are still pending."""
+        result = await self.db.execute(
+            select(DeliveryOffer).where(
+                DeliveryOffer.delivery_id == delivery_id,
+                DeliveryOffer.status == OfferStatus.PENDING.value,
+            )
+        )
+        offers = list(result.scalars().all())
+        for offer in offers:
+            offer.status = OfferStatus.EXPIRED.value
+        await self.db.flush()
+        return offers
+
     async def reject_offer(
         self, offer_id: UUID, driver_user_id: UUID
     ) -> bool:
@@ -536,14 +564,23 @@ class DeliveryService:
             delivery.delivered_at = now
             # Make driver available again
             driver.is_available = True
-            driver.total_deliveries += 1
 
         await self.db.flush()
 
+        if new_status in (DeliveryStatus.DELIVERED, DeliveryStatus.FAILED):
+            await self._record_driver_outcome(driver.id, new_status == DeliveryStatus.DELIVERED)
+
         # Record status change
         await self._record_status_change(
             delivery_id, current_status, new_status, driver.id, latitude, longitude
         )
+        audit_writer.record(
+            f"delivery.status.{new_status.value}",
+            user_id=driver_user_id,
+            resource_type="delivery",
+            resource_id=delivery_id,
+            session=self.db,
+        )
 
         # Publish event
         await EventBus.publish(Event(
@@ -552,11 +589,28 @@ class DeliveryService:
                 "delivery_id": str(delivery_id),
                 "order_id": str(delivery.order_id),
                 "driver_id": str(driver.id),
+                "status": new_status.value,
             }
-        ))
+        ), session=self.db)
 
         return delivery
 
+    async def _record_driver_outcome(self, driver_id: UUID, delivered: bool) -> None:
+        """Count a finished delivery and update the completion rate, in one statement."""
+        total = func.coalesce(Driver.total_deliveries, 0) + int(delivered)
+        failed = Driver.failed_deliveries + int(not delivered)
+        await self.db.execute(
+            update(Driver)
+            .where(Driver.id == driver_id)
+            .values(
+                total_deliveries=total,
+                failed_deliveries=failed,
+                completion_rate=func.round(
+                    cast(total * 100, Numeric) / func.greatest(total + failed, 1), 2
+                ),
+            )
+        )
+
     async def confirm_delivery(
         self,
         delivery_id: UUID,
@@ -608,6 +662,23 @@ class DeliveryService:
         await self.db.flush()
         return location
 
+    async def get_delivery_participants(self, delivery_id: UUID) -> Optional[set[UUID]]:
+        """User ids of the order's customer and of the assigned driver (None if no delivery)."""
+        result = await self.db.execute(
+            text("""
+                SELECT o.user_id AS customer_id, dr.user_id AS driver_user_id
+                FROM deliveries.deliveries d
+                LEFT JOIN orders.orders o ON o.id = d.order_id
+                LEFT JOIN deliveries.drivers dr ON dr.id = d.driver_id
+                WHERE d.id = :delivery_id
+            """),
+            {"delivery_id": delivery_id},
+        )
+        row = result.first()
+        if row is None:
+            return None
+        return {user_id for user_id in row if user_id is not None}
+
     async def get_delivery_tracking(self, delivery_id: UUID) -> dict:
         """Get delivery tracking information."""
         delivery = await self.get_delivery(delivery_id)
@@ -1,6 +1,6 @@
 """Orders module models - providers, products, orders."""
 
-from datetime import time
+from datetime import datetime, time
 from decimal import Decimal
 from enum import Enum as PyEnum
 from typing import TYPE_CHECKING, Optional
@@ -10,16 +10,21 @@ from geoalchemy2 import Geometry
 from sqlalchemy import (
     ARRAY,
     Boolean,
+    Column,
     DateTime,
     ForeignKey,
     Index,
     Integer,
+    MetaData,
     Numeric,
     SmallInteger,
     String,
+    Table,
     Text,
     Time,
+    UniqueConstraint,
     func,
+    text,
 )
 from sqlalchemy.dialects.postgresql import JSONB, UUID as PG_UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
@@ -159,7 +164,7 @@ class PricingRule(Base):
     free_delivery_threshold: Mapped[Optional[int]] = mapped_column(Integer)
     surge_multiplier: Mapped[Decimal] = mapped_column(Numeric(3, 2), default=1.00)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
-    created_at: Mapped[DateTime] = mapped_column(
+    created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
 
@@ -241,16 +246,21 @@ class Provider(Base):
     average_prep_time: Mapped[int] = mapped_column(Integer, default=30)
     delivery_radius_km: Mapped[Decimal] = mapped_column(Numeric(5, 2), default=5)
     commission_rate: Mapped[Decimal] = mapped_column(Numeric(5, 4), default=0.15)
+    # Running aggregates: updated with each rating / delivered order
     average_rating: Mapped[Optional[Decimal]] = mapped_column(Numeric(3, 2))
+    rating_sum: Mapped[int] = mapped_column(Integer, server_default="0", nullable=False)
     rating_count: Mapped[int] = mapped_column(Integer, default=0)
     total_orders: Mapped[int] = mapped_column(Integer, default=0)
+    archived_orders: Mapped[int] = mapped_column(  # Part of total_orders already archived
+        Integer, server_default="0", nullable=False
+    )
     status: Mapped[str] = mapped_column(String(20), default="pending")
     is_open: Mapped[bool] = mapped_column(Boolean, default=False)
     is_featured: Mapped[bool] = mapped_column(Boolean, default=False)
-    created_at: Mapped[DateTime] = mapped_column(
+    created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
-    updated_at: Mapped[DateTime] = mapped_column(
+    updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
 
@@ -358,10 +368,10 @@ class Product(Base):
     is_spicy: Mapped[bool] = mapped_column(Boolean, default=False)
     prep_time: Mapped[Optional[int]] = mapped_column(Integer)
     display_order: Mapped[int] = mapped_column(Integer, default=0)
-    created_at: Mapped[DateTime] = mapped_column(
+    created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
-    updated_at: Mapped[DateTime] = mapped_column(
+    updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
 
@@ -443,10 +453,10 @@ class GasProduct(Base):
     exchange_price: Mapped[Optional[int]] = mapped_column(Integer)
     quantity_available: Mapped[int] = mapped_column(Integer, default=0)
     is_available: Mapped[bool] = mapped_column(Boolean, default=True)
-    created_at: Mapped[DateTime] = mapped_column(
+    created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
-    updated_at: Mapped[DateTime] = mapped_column(
+    updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
 
@@ -463,24 +473,37 @@ class Order(Base):
     """Order model."""
 
     __tablename__ = "orders"
+    # Partitioned by month of created_at (see migration 0003_order_partitions):
+    # the database key is (id, created_at) and other tables have no foreign
+    # key to it. References are only unique per created_at in the database;
+    # OrderService checks new ones against the archive too.
     __table_args__ = (
-        Index("idx_orders_orders_user", "user_id"),
-        Index("idx_orders_orders_provider", "provider_id"),
-        Index("idx_orders_orders_status", "status"),
+        UniqueConstraint("reference", "created_at"),
+        Index("idx_orders_orders_user", "user_id", "created_at"),
+        Index("idx_orders_orders_provider", "provider_id", "created_at"),
         Index("idx_orders_orders_reference", "reference"),
+        Index(
+            "idx_orders_orders_active",
+            "provider_id",
+            "created_at",
+            postgresql_where=text(
+                "status IN ('pending', 'confirmed', 'preparing', 'ready', 'picked_up', 'delivering')"
+            ),
+        ),
         {"schema": "orders"},
     )
 
     id: Mapped[UUID] = mapped_column(
         PG_UUID(as_uuid=True), primary_key=True, server_default=func.uuid_generate_v4()
     )
-    reference: Mapped[str] = mapped_column(String(20), unique=True, nullable=False)
+    reference: Mapped[str] = mapped_column(String(20), nullable=False)
     user_id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), nullable=False)
     provider_id: Mapped[UUID] = mapped_column(
         PG_UUID(as_uuid=True), ForeignKey("orders.providers.id"), nullable=False
     )
     service_type: Mapped[str] = mapped_column(String(20), nullable=False)
     status: Mapped[str] = mapped_column(String(20), default="pending", nullable=False)
+    version: Mapped[int] = mapped_column(Integer, server_default="1", nullable=False)
     delivery_address_id: Mapped[Optional[UUID]] = mapped_column(PG_UUID(as_uuid=True))
     delivery_address_snapshot: Mapped[dict] = mapped_column(JSONB, nullable=False)
     special_instructions: Mapped[Optional[str]] = mapped_column(Text)
@@ -494,26 +517,26 @@ class Order(Base):
     promotion_code: Mapped[Optional[str]] = mapped_column(String(50))
     payment_method: Mapped[str] = mapped_column(String(20), nullable=False)
     payment_status: Mapped[str] = mapped_column(String(20), default="pending")
-    paid_at: Mapped[Optional[DateTime]] = mapped_column(DateTime(timezone=True))
+    paid_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
     transaction_id: Mapped[Optional[UUID]] = mapped_column(PG_UUID(as_uuid=True))
     is_scheduled: Mapped[bool] = mapped_column(Boolean, default=False)
-    scheduled_for: Mapped[Optional[DateTime]] = mapped_column(DateTime(timezone=True))
+    scheduled_for: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
     estimated_prep_time: Mapped[Optional[int]] = mapped_column(Integer)
     estimated_delivery_time: Mapped[Optional[int]] = mapped_column(Integer)
-    confirmed_at: Mapped[Optional[DateTime]] = mapped_column(DateTime(timezone=True))
-    ready_at: Mapped[Optional[DateTime]] = mapped_column(DateTime(timezone=True))
-    picked_up_at: Mapped[Optional[DateTime]] = mapped_column(DateTime(timezone=True))
-    delivered_at: Mapped[Optional[DateTime]] = mapped_column(DateTime(timezone=True))
-    cancelled_at: Mapped[Optional[DateTime]] = mapped_column(DateTime(timezone=True))
+    confirmed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    ready_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    picked_up_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    delivered_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    cancelled_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
     cancellation_reason: Mapped[Optional[str]] = mapped_column(Text)
     cancelled_by: Mapped[Optional[str]] = mapped_column(String(20))
     is_rated: Mapped[bool] = mapped_column(Boolean, default=False)
     provider_rating: Mapped[Optional[int]] = mapped_column(SmallInteger)
     driver_rating: Mapped[Optional[int]] = mapped_column(SmallInteger)
-    created_at: Mapped[DateTime] = mapped_column(
+    created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
-    updated_at: Mapped[DateTime] = mapped_column(
+    updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
 
@@ -524,6 +547,20 @@ class Order(Base):
     )
 
 
+# Closed orders moved out of orders.orders by the worker (same columns, see
+# OrderPartitionMaintenance). Kept out of Base.metadata: the table is managed
+# by migrations only. OrderService reads it as Order objects.
+orders_archive = Table(
+    "orders_archive",
+    MetaData(),
+    *(
+        Column(column.name, column.type, primary_key=column.primary_key)
+        for column in Order.__table__.columns
+    ),
+    schema="orders",
+)
+
+
 class OrderItem(Base):
     """Order item model."""
 
@@ -580,6 +617,6 @@ class Rating(Base):
     tags: Mapped[list] = mapped_column(ARRAY(Text), default=list)
     is_visible: Mapped[bool] = mapped_column(Boolean, default=True)
     provider_response: Mapped[Optional[str]] = mapped_column(Text)
-    created_at: Mapped[DateTime] = mapped_column(
+    created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
@@ -3,12 +3,24 @@
 from typing import Annotated, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db_session
-from app.modules.auth.dependencies import CurrentUser
+from app.core.database import (
+    get_db_session,
+    get_read_db_context,
+    get_read_db_session,
+    read_only_session,
+)
+from app.modules.auth.dependencies import CurrentPrincipal, StreamPrincipal, WebSocketPrincipal
+from app.modules.auth.services.principals import Principal
+from app.modules.orders.models import OrderStatus, Provider
 from app.modules.orders.schemas import (
+    BulkOrderStatusResponse,
+    BulkOrderStatusResult,
+    BulkOrderStatusUpdate,
     OrderCreate,
     OrderListResponse,
     OrderRatingCreate,
@@ -19,6 +31,16 @@ from app.modules.orders.schemas import (
     OrderTrackingResponse,
 )
 from app.modules.orders.service import OrderService
+from app.modules.orders.services.provider_queue import provider_channel, provider_order_queue
+from app.modules.orders.services.tracking_store import order_tracking_store
+from app.shared.realtime import Subscription, realtime_hub
+from app.shared.realtime.tracking import (
+    ORDER_FINAL_EVENTS,
+    order_channel,
+    serve_websocket,
+    sse_response,
+    tracking_channels,
+)
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
@@ -30,7 +52,23 @@ def get_order_service(
     return OrderService(db)
 
 
+def get_order_read_service(
+    db: Annotated[AsyncSession, Depends(get_read_db_session)],
+) -> OrderService:
+    """Dependency to get order service on a read-only (replica) session."""
+    return OrderService(db)
+
+
+def get_order_detail_service(
+    db: Annotated[AsyncSession, Depends(read_only_session(use_primary=True))],
+) -> OrderService:
+    """Dependency to get order service on a read-only primary session (read-your-writes)."""
+    return OrderService(db)
+
+
 OrderServiceDep = Annotated[OrderService, Depends(get_order_service)]
+OrderReadServiceDep = Annotated[OrderService, Depends(get_order_read_service)]
+OrderDetailServiceDep = Annotated[OrderService, Depends(get_order_detail_service)]
 
 
 # =============================================================================
@@ -47,7 +85,7 @@ OrderServiceDep = Annotated[OrderService, Depends(get_order_service)]
 )
 async def create_order(
     request: OrderCreate,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     order_service: OrderServiceDep,
 ) -> OrderResponse:
     """Create a new order."""
@@ -104,18 +142,20 @@ async def create_order(
     description="Liste les commandes de l'utilisateur connecte.",
 )
 async def list_orders(
-    current_user: CurrentUser,
-    order_service: OrderServiceDep,
+    current_user: CurrentPrincipal,
+    order_service: OrderReadServiceDep,
     order_status: Optional[str] = Query(None, alias="status"),
+    archived: bool = Query(False, description="Commandes archivees (anciennes)"),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
 ) -> OrderListResponse:
     """List user's orders."""
-    orders, total = await order_service.get_user_orders(
+    orders, total = await order_service.list_user_orders(
         user_id=current_user.id,
         status=order_status,
         page=page,
         page_size=page_size,
+        archived=archived,
     )
 
     return OrderListResponse(
@@ -124,12 +164,12 @@ async def list_orders(
                 id=o.id,
                 reference=o.reference,
                 provider_id=o.provider_id,
-                provider_name=o.provider_name or "Prestataire",
-                provider_logo_url=o.provider_logo_url,
+                provider_name=o.provider.name if o.provider else "Prestataire",
+                provider_logo_url=o.provider.logo_url if o.provider else None,
                 status=o.status.value if hasattr(o.status, "value") else o.status,
                 subtotal=o.subtotal,
                 delivery_fee=o.delivery_fee,
-                total_amount=o.total_amount,
+                total_amount=o.total,
                 item_count=len(o.items) if o.items else 0,
                 created_at=o.created_at,
                 estimated_delivery_time=o.estimated_delivery_time,
@@ -156,8 +196,8 @@ async def list_orders(
 )
 async def get_order(
     order_id: UUID,
-    current_user: CurrentUser,
-    order_service: OrderServiceDep,
+    current_user: CurrentPrincipal,
+    order_service: OrderDetailServiceDep,
 ) -> OrderResponse:
     """Get order details."""
     order = await order_service.get_order(order_id)
@@ -178,6 +218,26 @@ async def get_order(
     return await _build_order_response(order, order_service)
 
 
+async def _load_order_tracking(order_id: UUID, principal: Principal) -> dict:
+    """Tracking document of an order owned by ``principal`` (one Redis read when cached)."""
+    try:
+        tracking = await order_tracking_store.load(order_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Commande non trouvee",
+        )
+
+    # Verify ownership
+    if tracking.get("user_id") != str(principal.id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acces non autorise",
+        )
+
+    return tracking
+
+
 @router.get(
     "/{order_id}/tracking",
     response_model=OrderTrackingResponse,
@@ -186,27 +246,64 @@ async def get_order(
 )
 async def track_order(
     order_id: UUID,
-    current_user: CurrentUser,
-    order_service: OrderServiceDep,
+    current_user: CurrentPrincipal,
 ) -> OrderTrackingResponse:
     """Get order tracking information."""
-    tracking = await order_service.get_order_tracking(order_id)
+    tracking = await _load_order_tracking(order_id, current_user)
+    return OrderTrackingResponse(**tracking)
 
-    if not tracking:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Commande non trouvee",
-        )
 
-    # Verify ownership
-    order = await order_service.get_order(order_id)
-    if order and order.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Acces non autorise",
-        )
+async def _open_order_tracking(
+    order_id: UUID, principal: Principal
+) -> tuple[Subscription, dict]:
+    """
+    Subscribe to an order's updates, then load its current state.
 
-    return OrderTrackingResponse(**tracking)
+    Subscribing first means no update is lost in between.
+    """
+    subscription = await realtime_hub.subscribe([order_channel(order_id)])
+    try:
+        tracking = await _load_order_tracking(order_id, principal)
+        for channel in tracking_channels(tracking):
+            await subscription.add(channel)
+    except BaseException:
+        await subscription.close()
+        raise
+    return subscription, tracking
+
+
+@router.get(
+    "/{order_id}/tracking/stream",
+    response_class=StreamingResponse,
+    summary="Suivi commande en direct",
+    description=(
+        "Flux Server-Sent Events: etat de suivi initial (`snapshot`), puis "
+        "changements de statut et positions du livreur."
+    ),
+)
+async def stream_order_tracking(
+    order_id: UUID,
+    current_user: StreamPrincipal,
+) -> StreamingResponse:
+    """Stream order tracking updates (SSE)."""
+    subscription, tracking = await _open_order_tracking(order_id, current_user)
+    return sse_response(subscription, tracking, ORDER_FINAL_EVENTS)
+
+
+@router.websocket("/{order_id}/tracking/ws")
+async def order_tracking_websocket(
+    websocket: WebSocket,
+    order_id: UUID,
+    current_user: WebSocketPrincipal,
+) -> None:
+    """Stream order tracking updates over a WebSocket."""
+    try:
+        subscription, tracking = await _open_order_tracking(order_id, current_user)
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail)
+        return
+    await websocket.accept()
+    await serve_websocket(websocket, subscription, tracking, ORDER_FINAL_EVENTS)
 
 
 @router.put(
@@ -218,7 +315,7 @@ async def track_order(
 async def update_order_status(
     order_id: UUID,
     request: OrderStatusUpdate,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     order_service: OrderServiceDep,
 ) -> OrderResponse:
     """Update order status."""
@@ -234,14 +331,15 @@ async def update_order_status(
     # TODO: Add proper authorization check
 
     try:
-        updated_order = await order_service.update_order_status(
+        await order_service.update_order_status(
             order_id=order_id,
-            new_status=request.status,
-            changed_by_id=current_user.id,
-            notes=request.notes,
-            cancellation_reason=request.cancellation_reason,
+            new_status=OrderStatus(request.status),
+            changed_by=current_user.id,
+            reason=request.cancellation_reason or request.notes,
+            expected_version=request.version,
         )
 
+        updated_order = await order_service.get_order(order_id)
         return await _build_order_response(updated_order, order_service)
 
     except ValueError as e:
@@ -259,7 +357,7 @@ async def update_order_status(
 )
 async def cancel_order(
     order_id: UUID,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     order_service: OrderServiceDep,
     reason: Optional[str] = Query(None, max_length=500),
 ) -> OrderResponse:
@@ -280,13 +378,14 @@ async def cancel_order(
         )
 
     try:
-        cancelled_order = await order_service.update_order_status(
+        await order_service.update_order_status(
             order_id=order_id,
-            new_status="cancelled",
-            changed_by_id=current_user.id,
-            cancellation_reason=reason or "Annulee par le client",
+            new_status=OrderStatus.CANCELLED,
+            changed_by=current_user.id,
+            reason=reason or "Annulee par le client",
         )
 
+        cancelled_order = await order_service.get_order(order_id)
         return await _build_order_response(cancelled_order, order_service)
 
     except ValueError as e:
@@ -311,7 +410,7 @@ async def cancel_order(
 async def rate_order(
     order_id: UUID,
     request: OrderRatingCreate,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     order_service: OrderServiceDep,
 ) -> OrderRatingResponse:
     """Rate an order."""
@@ -370,20 +469,22 @@ async def rate_order(
 )
 async def list_provider_orders(
     provider_id: UUID,
-    current_user: CurrentUser,
-    order_service: OrderServiceDep,
+    current_user: CurrentPrincipal,
+    order_service: OrderReadServiceDep,
     order_status: Optional[str] = Query(None, alias="status"),
+    archived: bool = Query(False, description="Commandes archivees (anciennes)"),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
 ) -> OrderListResponse:
     """List orders for a provider."""
     # TODO: Verify provider ownership
 
-    orders, total = await order_service.get_provider_orders(
+    orders, total = await order_service.list_provider_orders(
         provider_id=provider_id,
         status=order_status,
         page=page,
         page_size=page_size,
+        archived=archived,
     )
 
     return OrderListResponse(
@@ -392,12 +493,12 @@ async def list_provider_orders(
                 id=o.id,
                 reference=o.reference,
                 provider_id=o.provider_id,
-                provider_name=o.provider_name or "Prestataire",
-                provider_logo_url=o.provider_logo_url,
+                provider_name=o.provider.name if o.provider else "Prestataire",
+                provider_logo_url=o.provider.logo_url if o.provider else None,
                 status=o.status.value if hasattr(o.status, "value") else o.status,
                 subtotal=o.subtotal,
                 delivery_fee=o.delivery_fee,
-                total_amount=o.total_amount,
+                total_amount=o.total,
                 item_count=len(o.items) if o.items else 0,
                 created_at=o.created_at,
                 estimated_delivery_time=o.estimated_delivery_time,
@@ -411,6 +512,77 @@ async def list_provider_orders(
     )
 
 
+async def _check_provider_owner(
+    db: AsyncSession, provider_id: UUID, principal: Principal
+) -> None:
+    """Raise 404/403 unless ``principal`` owns the provider."""
+    owner_id = await db.scalar(select(Provider.user_id).where(Provider.id == provider_id))
+    if owner_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Prestataire non trouve",
+        )
+    if owner_id != principal.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acces non autorise",
+        )
+
+
+async def _open_provider_queue(
+    provider_id: UUID, principal: Principal
+) -> tuple[Subscription, dict]:
+    """
+    Subscribe to a provider's order changes, then read its active orders.
+
+    Subscribing first means no change is lost in between.
+    """
+    async with get_read_db_context() as db:
+        await _check_provider_owner(db, provider_id, principal)
+
+    subscription = await realtime_hub.subscribe([provider_channel(provider_id)])
+    try:
+        orders = await provider_order_queue.snapshot(provider_id)
+    except BaseException:
+        await subscription.close()
+        raise
+    return subscription, {"provider_id": str(provider_id), "orders": orders}
+
+
+@router.get(
+    "/provider/{provider_id}/stream",
+    response_class=StreamingResponse,
+    summary="File de commandes en direct",
+    description=(
+        "Flux Server-Sent Events: commandes actives du prestataire (`snapshot`), "
+        "puis chaque nouvelle commande et changement de statut."
+    ),
+)
+async def stream_provider_orders(
+    provider_id: UUID,
+    current_user: StreamPrincipal,
+) -> StreamingResponse:
+    """Stream a provider's order queue (SSE)."""
+    subscription, snapshot = await _open_provider_queue(provider_id, current_user)
+    return sse_response(subscription, snapshot, set())
+
+
+@router.websocket("/provider/{provider_id}/ws")
+async def provider_orders_websocket(
+    websocket: WebSocket,
+    provider_id: UUID,
+    current_user: WebSocketPrincipal,
+) -> None:
+    """Stream a provider's order queue over a WebSocket."""
+    try:
+        subscription, snapshot = await _open_provider_queue(provider_id, current_user)
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail)
+        return
+    await websocket.accept()
+    await serve_websocket(websocket, subscription, snapshot, set())
+
+
 # =============================================================================
 # Helper Functions
 # =============================================================================
@@ -438,6 +610,7 @@ async def _build_order_response(
         provider_phone=order.provider_phone,
         provider_logo_url=order.provider_logo_url,
         status=order.status.value if hasattr(order.status, "value") else order.status,
+        version=order.version,
         payment_status=order.payment_status,
         payment_method=order.payment_method,
         subtotal=order.subtotal,
@@ -492,3 +665,45 @@ async def _build_order_response(
             for h in status_history
         ],
     )
+
+
+@router.post(
+    "/provider/{provider_id}/status",
+    response_model=BulkOrderStatusResponse,
+    summary="Changer statut de plusieurs commandes",
+    description=(
+        "Confirme, passe en preparation, marque pretes ou annule plusieurs commandes "
+        "du prestataire en une fois. Les commandes dont le statut ne le permet pas "
+        "sont ignorees (`skipped`)."
+    ),
+)
+async def bulk_update_order_status(
+    provider_id: UUID,
+    request: BulkOrderStatusUpdate,
+    current_user: CurrentPrincipal,
+    order_service: OrderServiceDep,
+) -> BulkOrderStatusResponse:
+    """Apply a status change to several orders of a provider."""
+    await _check_provider_owner(order_service.db, provider_id, current_user)
+
+    transitions, skipped = await order_service.bulk_update_order_status(
+        provider_id=provider_id,
+        order_ids=request.order_ids,
+        new_status=OrderStatus(request.status),
+        changed_by=current_user.id,
+        reason=request.reason,
+    )
+
+    return BulkOrderStatusResponse(
+        updated=[
+            BulkOrderStatusResult(
+                order_id=transition["order_id"],
+                reference=transition["reference"],
+                from_status=transition["from_status"],
+                status=transition["to_status"],
+                version=transition["version"],
+            )
+            for transition in transitions
+        ],
+        skipped=skipped,
+    )
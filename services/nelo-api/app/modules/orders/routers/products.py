@@ -9,7 +9,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db_session
 from app.core.redis import get_redis
-from app.modules.auth.dependencies import CurrentUser
+from app.modules.auth.dependencies import CurrentPrincipal
 from app.modules.orders.schemas import (
     GasProductCreate,
     GasProductListResponse,
@@ -53,7 +53,7 @@ ProviderServiceDep = Annotated[ProviderService, Depends(get_provider_service)]
 
 async def verify_provider_ownership(
     provider_id: UUID,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     provider_service: ProviderServiceDep,
 ) -> None:
     """Verify that current user owns the provider."""
@@ -100,7 +100,7 @@ async def list_categories(
 async def create_category(
     provider_id: UUID,
     request: ProductCategoryCreate,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     product_service: ProductServiceDep,
     provider_service: ProviderServiceDep,
 ) -> ProductCategoryResponse:
@@ -127,7 +127,7 @@ async def update_category(
     provider_id: UUID,
     category_id: UUID,
     request: ProductCategoryUpdate,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     product_service: ProductServiceDep,
     provider_service: ProviderServiceDep,
 ) -> ProductCategoryResponse:
@@ -160,7 +160,7 @@ async def update_category(
 async def delete_category(
     provider_id: UUID,
     category_id: UUID,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     product_service: ProductServiceDep,
     provider_service: ProviderServiceDep,
 ) -> None:
@@ -237,7 +237,7 @@ async def get_product(
 async def create_product(
     provider_id: UUID,
     request: ProductCreate,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     product_service: ProductServiceDep,
     provider_service: ProviderServiceDep,
 ) -> ProductResponse:
@@ -295,7 +295,7 @@ async def update_product(
     provider_id: UUID,
     product_id: UUID,
     request: ProductUpdate,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     product_service: ProductServiceDep,
     provider_service: ProviderServiceDep,
 ) -> ProductResponse:
@@ -337,7 +337,7 @@ async def update_product(
 async def delete_product(
     provider_id: UUID,
     product_id: UUID,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     product_service: ProductServiceDep,
     provider_service: ProviderServiceDep,
 ) -> None:
@@ -362,7 +362,7 @@ async def toggle_product_availability(
     provider_id: UUID,
     product_id: UUID,
     is_available: bool = Query(..., description="Disponible ou non"),
-    current_user: CurrentUser = None,
+    current_user: CurrentPrincipal = None,
     product_service: ProductServiceDep = None,
     provider_service: ProviderServiceDep = None,
 ) -> ProductResponse:
@@ -398,7 +398,7 @@ async def add_product_option(
     provider_id: UUID,
     product_id: UUID,
     request: ProductOptionCreate,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     product_service: ProductServiceDep,
     provider_service: ProviderServiceDep,
 ) -> ProductOptionResponse:
@@ -443,7 +443,7 @@ async def delete_product_option(
     provider_id: UUID,
     product_id: UUID,
     option_id: UUID,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     product_service: ProductServiceDep,
     provider_service: ProviderServiceDep,
 ) -> None:
@@ -517,7 +517,7 @@ async def get_gas_product(
 async def create_gas_product(
     provider_id: UUID,
     request: GasProductCreate,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     product_service: ProductServiceDep,
     provider_service: ProviderServiceDep,
 ) -> GasProductResponse:
@@ -547,7 +547,7 @@ async def update_gas_product(
     provider_id: UUID,
     gas_product_id: UUID,
     request: GasProductUpdate,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     product_service: ProductServiceDep,
     provider_service: ProviderServiceDep,
 ) -> GasProductResponse:
@@ -583,7 +583,7 @@ async def update_gas_product(
 async def delete_gas_product(
     provider_id: UUID,
     gas_product_id: UUID,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     product_service: ProductServiceDep,
     provider_service: ProviderServiceDep,
 ) -> None:
@@ -608,7 +608,7 @@ async def update_gas_stock(
     provider_id: UUID,
     gas_product_id: UUID,
     quantity: int = Query(..., ge=0, description="Nouvelle quantite en stock"),
-    current_user: CurrentUser = None,
+    current_user: CurrentPrincipal = None,
     product_service: ProductServiceDep = None,
     provider_service: ProviderServiceDep = None,
 ) -> GasProductResponse:
@@ -1,5 +1,6 @@
 """Providers API routes."""
 
+from datetime import date
 from decimal import Decimal
 from typing import Annotated, Optional
 from uuid import UUID
@@ -8,9 +9,10 @@ import redis.asyncio as redis
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db_session
+from app.core.database import get_db_session, get_read_db_session, read_only_session
 from app.core.redis import get_redis
-from app.modules.auth.dependencies import CurrentUser, require_role
+from app.modules.auth.dependencies import CurrentPrincipal, require_role
+from app.modules.auth.services.principals import Principal
 from app.modules.orders.schemas import (
     CityResponse,
     NearbyProviderRequest,
@@ -22,9 +24,12 @@ from app.modules.orders.schemas import (
     ProviderScheduleResponse,
     ProviderSummary,
     ProviderUpdate,
+    SalesReportResponse,
     ZoneResponse,
 )
+from app.modules.orders.services.provider_sales import ProviderSalesService
 from app.modules.orders.services.provider_service import ProviderService
+from app.shared.audit import audit_writer
 
 router = APIRouter(prefix="/providers", tags=["Providers"])
 
@@ -37,7 +42,39 @@ def get_provider_service(
     return ProviderService(db, redis_client)
 
 
+# Geospatial search runs on every home screen load: fail fast.
+NEARBY_STATEMENT_TIMEOUT_MS = 2000
+
+
+def get_provider_read_service(
+    db: Annotated[AsyncSession, Depends(get_read_db_session)],
+    redis_client: Annotated[redis.Redis, Depends(get_redis)],
+) -> ProviderService:
+    """Dependency to get provider service on a read-only (replica) session."""
+    return ProviderService(db, redis_client)
+
+
+def get_provider_nearby_service(
+    db: Annotated[
+        AsyncSession, Depends(read_only_session(NEARBY_STATEMENT_TIMEOUT_MS))
+    ],
+    redis_client: Annotated[redis.Redis, Depends(get_redis)],
+) -> ProviderService:
+    """Dependency to get provider service for nearby searches."""
+    return ProviderService(db, redis_client)
+
+
+def get_provider_sales_service(
+    db: Annotated[AsyncSession, Depends(get_read_db_session)],
+) -> ProviderSalesService:
+    """Dependency to get the sales report service on a read-only session."""
+    return ProviderSalesService(db)
+
+
 ProviderServiceDep = Annotated[ProviderService, Depends(get_provider_service)]
+ProviderReadServiceDep = Annotated[ProviderService, Depends(get_provider_read_service)]
+ProviderNearbyServiceDep = Annotated[ProviderService, Depends(get_provider_nearby_service)]
+ProviderSalesServiceDep = Annotated[ProviderSalesService, Depends(get_provider_sales_service)]
 
 
 # =============================================================================
@@ -52,7 +89,7 @@ ProviderServiceDep = Annotated[ProviderService, Depends(get_provider_service)]
     description="Retourne la liste des villes disponibles.",
 )
 async def list_cities(
-    provider_service: ProviderServiceDep,
+    provider_service: ProviderReadServiceDep,
     is_active_only: bool = Query(True, description="Filtrer les villes actives"),
 ) -> list[CityResponse]:
     """Get all available cities."""
@@ -68,7 +105,7 @@ async def list_cities(
 )
 async def get_city(
     city_id: UUID,
-    provider_service: ProviderServiceDep,
+    provider_service: ProviderReadServiceDep,
 ) -> CityResponse:
     """Get city details."""
     city = await provider_service.get_city(city_id)
@@ -88,7 +125,7 @@ async def get_city(
 )
 async def list_zones(
     city_id: UUID,
-    provider_service: ProviderServiceDep,
+    provider_service: ProviderReadServiceDep,
     is_active_only: bool = Query(True, description="Filtrer les zones actives"),
 ) -> list[ZoneResponse]:
     """Get zones for a city."""
@@ -108,7 +145,7 @@ async def list_zones(
     description="Liste les prestataires avec filtres et pagination.",
 )
 async def list_providers(
-    provider_service: ProviderServiceDep,
+    provider_service: ProviderReadServiceDep,
     city_id: UUID = Query(..., description="ID de la ville"),
     provider_type: Optional[str] = Query(None, description="Type de prestataire"),
     is_open_only: bool = Query(False, description="Seulement les prestataires ouverts"),
@@ -162,7 +199,7 @@ async def list_providers(
 )
 async def find_nearby_providers(
     request: NearbyProviderRequest,
-    provider_service: ProviderServiceDep,
+    provider_service: ProviderNearbyServiceDep,
 ) -> list[ProviderSummary]:
     """Find providers within radius using geospatial search."""
     results = await provider_service.find_nearby_providers(
@@ -207,7 +244,7 @@ async def find_nearby_providers(
 )
 async def get_provider(
     provider_id: UUID,
-    provider_service: ProviderServiceDep,
+    provider_service: ProviderReadServiceDep,
 ) -> ProviderResponse:
     """Get provider details."""
     provider = await provider_service.get_provider(provider_id)
@@ -227,7 +264,7 @@ async def get_provider(
 )
 async def get_provider_menu(
     provider_id: UUID,
-    provider_service: ProviderServiceDep,
+    provider_service: ProviderReadServiceDep,
 ) -> ProviderMenuResponse:
     """Get provider's full menu."""
     menu = await provider_service.get_provider_menu(provider_id)
@@ -247,7 +284,7 @@ async def get_provider_menu(
 )
 async def get_provider_schedules(
     provider_id: UUID,
-    provider_service: ProviderServiceDep,
+    provider_service: ProviderReadServiceDep,
 ) -> list[ProviderScheduleResponse]:
     """Get provider schedules."""
     provider = await provider_service.get_provider(provider_id)
@@ -274,7 +311,7 @@ async def get_provider_schedules(
 )
 async def create_provider(
     request: ProviderCreate,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     provider_service: ProviderServiceDep,
 ) -> ProviderResponse:
     """Create a new provider."""
@@ -325,7 +362,7 @@ async def create_provider(
 async def update_provider(
     provider_id: UUID,
     request: ProviderUpdate,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     provider_service: ProviderServiceDep,
 ) -> ProviderResponse:
     """Update provider (owner only)."""
@@ -368,7 +405,7 @@ async def update_provider(
 )
 async def update_provider_status(
     provider_id: UUID,
-    current_user: Annotated[CurrentUser, Depends(require_role("admin"))],
+    current_user: Annotated[Principal, Depends(require_role("admin"))],
     provider_service: ProviderServiceDep,
     new_status: str = Query(..., pattern="^(pending|active|suspended|closed)$"),
 ) -> ProviderResponse:
@@ -379,6 +416,13 @@ async def update_provider_status(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Prestataire non trouve",
         )
+    audit_writer.record(
+        f"admin.provider.status.{new_status}",
+        user_id=current_user.id,
+        resource_type="provider",
+        resource_id=provider_id,
+        session=provider_service.db,
+    )
     return ProviderResponse.model_validate(provider)
 
 
@@ -390,7 +434,7 @@ async def update_provider_status(
 )
 async def toggle_provider_open(
     provider_id: UUID,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     provider_service: ProviderServiceDep,
     is_open: bool = Query(..., description="Etat ouvert ou ferme"),
 ) -> ProviderResponse:
@@ -416,7 +460,7 @@ async def update_provider_schedule(
     provider_id: UUID,
     day_of_week: int,
     request: ProviderScheduleCreate,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     provider_service: ProviderServiceDep,
 ) -> ProviderScheduleResponse:
     """Update schedule for a specific day."""
@@ -437,3 +481,49 @@ async def update_provider_schedule(
     )
 
     return ProviderScheduleResponse.model_validate(schedule)
+
+
+# =============================================================================
+# Provider Sales (dashboard)
+# =============================================================================
+
+
+@router.get(
+    "/{provider_id}/sales",
+    response_model=SalesReportResponse,
+    summary="Ventes du prestataire",
+    description=(
+        "Commandes, ventes, temps de preparation et annulations par heure ou "
+        "par jour (UTC), calcules a partir des agregats (proprietaire uniquement)."
+    ),
+)
+async def get_provider_sales(
+    provider_id: UUID,
+    current_user: CurrentPrincipal,
+    provider_service: ProviderReadServiceDep,
+    sales_service: ProviderSalesServiceDep,
+    start: date = Query(..., description="Premier jour (inclus)"),
+    end: date = Query(..., description="Dernier jour (inclus)"),
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+) -> SalesReportResponse:
+    """Get provider sales report (owner only)."""
+    provider = await provider_service.get_provider(provider_id)
+    if not provider or provider.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Prestataire non trouve ou non autorise",
+        )
+
+    try:
+        report = await sales_service.get_report(
+            start=start,
+            end=end,
+            granularity=granularity,
+            provider_id=provider_id,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    return SalesReportResponse(**report)
@@ -1,6 +1,6 @@
 """Orders module Pydantic schemas - providers, products, orders."""
 
-from datetime import datetime, time
+from datetime import date, datetime, time
 from decimal import Decimal
 from typing import Optional
 from uuid import UUID
@@ -581,6 +581,7 @@ class OrderResponse(BaseModel):
     provider_phone: Optional[str] = None
     provider_logo_url: Optional[str] = None
     status: str
+    version: int = 1
     payment_status: str
     payment_method: str
     subtotal: int
@@ -625,6 +626,34 @@ class OrderStatusUpdate(BaseModel):
     )
     notes: Optional[str] = Field(None, max_length=500)
     cancellation_reason: Optional[str] = Field(None, max_length=500)
+    # Version the client displayed: rejected (409) if the order changed since
+    version: Optional[int] = Field(None, ge=1)
+
+
+class BulkOrderStatusUpdate(BaseModel):
+    """Status change applied to several orders of a provider."""
+
+    order_ids: list[UUID] = Field(..., min_length=1, max_length=100)
+    status: str = Field(..., pattern="^(confirmed|preparing|ready|cancelled)$")
+    reason: Optional[str] = Field(None, max_length=500)
+
+
+class BulkOrderStatusResult(BaseModel):
+    """One order changed by a bulk status update."""
+
+    order_id: UUID
+    reference: str
+    from_status: str
+    status: str
+    version: int
+
+
+class BulkOrderStatusResponse(BaseModel):
+    """Bulk status update result."""
+
+    updated: list[BulkOrderStatusResult]
+    # Orders not found, of another provider, or whose status forbids the change
+    skipped: list[UUID]
 
 
 class OrderTrackingResponse(BaseModel):
@@ -672,3 +701,38 @@ class OrderRatingResponse(BaseModel):
     delivery_rating: Optional[int] = None
     comment: Optional[str] = None
     created_at: datetime
+
+
+# =============================================================================
+# Sales Report Schemas
+# =============================================================================
+
+
+class SalesFigures(BaseModel):
+    """Order and sales figures of a period."""
+
+    orders_count: int
+    delivered_count: int
+    cancelled_count: int
+    sales_amount: int  # Items subtotal of delivered orders
+    gross_amount: int  # Total paid for delivered orders (fees and tips included)
+    average_prep_time: Optional[float] = None  # Minutes from confirmation to ready
+    cancellation_rate: float  # Percent of orders
+
+
+class SalesPoint(SalesFigures):
+    """Figures of one hour or day."""
+
+    bucket: datetime  # Start of the hour/day (UTC)
+
+
+class SalesReportResponse(BaseModel):
+    """Sales report of a provider (or of all providers) over a period."""
+
+    provider_id: Optional[UUID] = None
+    granularity: str
+    start: date
+    end: date
+    refreshed_at: Optional[datetime] = None  # Orders updated after this are not counted yet
+    totals: SalesFigures
+    points: list[SalesPoint]
@@ -3,13 +3,15 @@
 import random
 import string
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Any, NoReturn, Optional
 from uuid import UUID
 
-from sqlalchemy import func, select
+from sqlalchemy import ColumnElement, exists, func, select, true, union_all
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import aliased, selectinload
+from sqlalchemy.orm.util import AliasedClass
 
+from app.core.exceptions import ConflictError
 from app.modules.orders.models import (
     GasProduct,
     Order,
@@ -17,7 +19,12 @@ from app.modules.orders.models import (
     OrderStatus,
     Product,
     Provider,
+    orders_archive,
 )
+from app.modules.orders.services.partitions import order_partitions
+from app.modules.orders.services.provider_queue import queue_entry
+from app.modules.orders.services.tracking_store import STATUS_TIMESTAMPS
+from app.shared.audit import audit_writer
 from app.shared.events.event_bus import EventBus, Event
 
 
@@ -48,6 +55,15 @@ class OrderStateMachine:
         """Get allowed next statuses."""
         return cls.TRANSITIONS.get(status, [])
 
+    @classmethod
+    def get_previous_statuses(cls, status: OrderStatus) -> list[OrderStatus]:
+        """Get statuses from which ``status`` can be reached."""
+        return [
+            from_status
+            for from_status, allowed in cls.TRANSITIONS.items()
+            if status in allowed
+        ]
+
 
 class OrderService:
     """Service for order operations."""
@@ -112,7 +128,7 @@ class OrderService:
         total = subtotal + delivery_fee + service_fee - discount_amount + tip_amount
 
         # Generate reference
-        reference = self._generate_reference()
+        reference = await self._generate_reference()
 
         # Create order
         order = Order(
@@ -170,8 +186,11 @@ class OrderService:
                 "user_id": str(user_id),
                 "provider_id": str(provider_id),
                 "total": total,
+                "queue_entry": queue_entry(
+                    order, len(order_items), datetime.now(timezone.utc)
+                ),
             }
-        ))
+        ), session=self.db)
 
         return await self.get_order(order.id)
 
@@ -289,11 +308,24 @@ class OrderService:
         # For now, return no discount
         return 0, None
 
-    def _generate_reference(self) -> str:
-        """Generate unique order reference."""
+    async def _generate_reference(self) -> str:
+        """
+        Generate unique order reference.
+
+        The partitioned table only enforces unique (reference, created_at):
+        references are checked against the hot and archive tables.
+        """
         chars = string.ascii_uppercase + string.digits
-        suffix = "".join(random.choices(chars, k=8))
-        return f"ORD-{suffix}"
+        while True:
+            reference = "ORD-" + "".join(random.choices(chars, k=8))
+            taken = await self.db.scalar(
+                select(
+                    exists().where(Order.reference == reference)
+                    | exists().where(orders_archive.c.reference == reference)
+                )
+            )
+            if not taken:
+                return reference
 
     # =========================================================================
     # Order Status Management
@@ -303,61 +335,229 @@ class OrderService:
         self,
         order_id: UUID,
         new_status: OrderStatus,
-        changed_by: UUID,
+        changed_by: Optional[UUID],
         reason: Optional[str] = None,
-    ) -> Order:
-        """Update order status with validation."""
-        order = await self.get_order(order_id)
-        if not order:
-            raise ValueError("Commande non trouvee")
+        expected_version: Optional[int] = None,
+    ) -> dict[str, Any]:
+        """
+        Update order status with validation (``changed_by=None`` for system changes).
+
+        The transition is a single statement: the order row is updated only if
+        its current status may lead to ``new_status`` (and, when given, its
+        version is still ``expected_version``), and the history entry is
+        inserted in the same round trip. Concurrent transitions are therefore
+        serialized by the row lock instead of overwriting each other.
+
+        Returns the transition (order fields, new version and history entry).
+
+        Raises:
+            ValueError: If the order does not exist or the transition is invalid
+            ConflictError: If the order version is no longer ``expected_version``
+        """
+        conditions = "id = :order_id"
+        params: dict[str, Any] = {"order_id": order_id}
+        if expected_version is not None:
+            conditions += " AND version = :expected_version"
+            params["expected_version"] = expected_version
+
+        transitions = await self._transition_orders(
+            new_status, changed_by, reason, conditions, params
+        )
+        if not transitions:
+            await self._raise_transition_error(order_id, new_status, expected_version)
+        transition = transitions[0]
 
-        current_status = OrderStatus(order.status)
+        # Publish event
+        await EventBus.publish(Event(
+            name=f"order.{new_status.value}",
+            data=transition,
+        ), session=self.db)
 
-        # Validate transition
-        if not self.state_machine.can_transition(current_status, new_status):
-            raise ValueError(
-                f"Transition invalide: {current_status.value} -> {new_status.value}"
-            )
+        return transition
 
-        # Update status
-        order.status = new_status.value
+    async def bulk_update_order_status(
+        self,
+        provider_id: UUID,
+        order_ids: list[UUID],
+        new_status: OrderStatus,
+        changed_by: UUID,
+        reason: Optional[str] = None,
+    ) -> tuple[list[dict[str, Any]], list[UUID]]:
+        """
+        Apply the same status change to several orders of a provider.
+
+        One set-based update (orders of other providers, or whose status
+        cannot lead to ``new_status``, are left untouched), one multi-row
+        history insert and one ``order.<status>.batch`` event.
+
+        Returns the transitions (as update_order_status) and the skipped order ids.
+        """
+        transitions = await self._transition_orders(
+            new_status,
+            changed_by,
+            reason,
+            "id = ANY(:order_ids) AND provider_id = :provider_id",
+            {"order_ids": list(order_ids), "provider_id": provider_id},
+        )
+        updated = {transition["order_id"] for transition in transitions}
+        skipped = [order_id for order_id in order_ids if str(order_id) not in updated]
+
+        if transitions:
+            await EventBus.publish(Event(
+                name=f"order.{new_status.value}.batch",
+                data={
+                    "provider_id": str(provider_id),
+                    "to_status": new_status.value,
+                    "orders": transitions,
+                },
+            ), session=self.db)
+
+        return transitions, skipped
+
+    async def _transition_orders(
+        self,
+        new_status: OrderStatus,
+        changed_by: Optional[UUID],
+        reason: Optional[str],
+        conditions: str,
+        params: dict[str, Any],
+    ) -> list[dict[str, Any]]:
+        """
+        Move the orders matching ``conditions`` whose status may lead to
+        ``new_status``, and record their history, in one statement.
+
+        Returns one transition per order actually changed.
+        """
+        from sqlalchemy import text
 
-        # Update timestamps based on status
         now = datetime.now(timezone.utc)
-        if new_status == OrderStatus.CONFIRMED:
-            order.confirmed_at = now
-        elif new_status == OrderStatus.READY:
-            order.ready_at = now
-        elif new_status == OrderStatus.PICKED_UP:
-            order.picked_up_at = now
-        elif new_status == OrderStatus.DELIVERED:
-            order.delivered_at = now
-        elif new_status == OrderStatus.CANCELLED:
-            order.cancelled_at = now
-            order.cancellation_reason = reason
-            order.cancelled_by = str(changed_by)
-
-        await self.db.flush()
+        changed_by_type = "user" if changed_by else "system"
+        params = {
+            **params,
+            "from_statuses": [
+                status.value for status in self.state_machine.get_previous_statuses(new_status)
+            ],
+            "to_status": new_status.value,
+            "changed_at": now,
+            "changed_by": changed_by,
+            "changed_by_type": changed_by_type,
+            "reason": reason,
+        }
 
-        # Record status change
-        await self._record_status_change(
-            order_id, current_status, new_status, changed_by, reason
+        # Timestamps based on status
+        timestamps = ""
+        if new_status.value in STATUS_TIMESTAMPS:
+            timestamps = f", {STATUS_TIMESTAMPS[new_status.value]} = :changed_at"
+        elif new_status == OrderStatus.CANCELLED:
+            timestamps = (
+                ", cancelled_at = :changed_at, cancellation_reason = :reason"
+                ", cancelled_by = :cancelled_by"
+            )
+            params["cancelled_by"] = str(changed_by) if changed_by else "system"
+
+        # Delivered orders count towards their provider's total
+        provider_counts = ""
+        if new_status == OrderStatus.DELIVERED:
+            provider_counts = """,
+                provider_counts AS (
+                    UPDATE orders.providers p
+                    SET total_orders = COALESCE(p.total_orders, 0) + delivered.count
+                    FROM (
+                        SELECT provider_id, count(*) AS count FROM updated GROUP BY provider_id
+                    ) delivered
+                    WHERE p.id = delivered.provider_id
+                )"""
+
+        # Rows are locked in id order, so concurrent batches cannot deadlock
+        result = await self.db.execute(
+            text(f"""
+                WITH previous AS (
+                    SELECT id, status FROM orders.orders
+                    WHERE {conditions}
+                      AND status::text = ANY(:from_statuses)
+                    ORDER BY id
+                    FOR UPDATE
+                ),
+                updated AS (
+                    UPDATE orders.orders o
+                    SET status = CAST(:to_status AS orders.order_status),
+                        version = o.version + 1,
+                        updated_at = :changed_at
+                        {timestamps}
+                    FROM previous
+                    WHERE o.id = previous.id
+                    RETURNING o.id, o.provider_id, o.reference, o.estimated_prep_time,
+                              o.version, previous.status AS from_status
+                ),
+                history AS (
+                    INSERT INTO orders.order_status_history
+                    (order_id, from_status, to_status, changed_by, changed_by_type, reason)
+                    SELECT id, from_status, CAST(:to_status AS orders.order_status),
+                           CAST(:changed_by AS uuid), :changed_by_type, CAST(:reason AS text)
+                    FROM updated
+                    RETURNING id, order_id, created_at
+                ){provider_counts}
+                SELECT updated.*, history.id AS history_id,
+                       history.created_at AS history_created_at
+                FROM updated JOIN history ON history.order_id = updated.id
+            """),
+            params,
         )
-
-        # Publish event
-        await EventBus.publish(Event(
-            name=f"order.{new_status.value}",
-            data={
-                "order_id": str(order_id),
-                "reference": order.reference,
-                "from_status": current_status.value,
+        rows = result.all()
+
+        transitions = []
+        for row in rows:
+            # Objects already loaded in this session no longer match the row
+            loaded = self.db.identity_map.get(self.db.identity_key(Order, row.id))
+            if loaded is not None:
+                self.db.expire(loaded)
+
+            audit_writer.record(
+                f"order.status.{new_status.value}",
+                user_id=changed_by,
+                resource_type="order",
+                resource_id=row.id,
+                session=self.db,
+            )
+            transitions.append({
+                "order_id": str(row.id),
+                "provider_id": str(row.provider_id),
+                "reference": row.reference,
+                "from_status": row.from_status,
                 "to_status": new_status.value,
-            }
-        ))
-
-        return order
+                "estimated_prep_time": row.estimated_prep_time,
+                "changed_at": now.isoformat(),
+                "history_entry": {
+                    "id": str(row.history_id),
+                    "from_status": row.from_status,
+                    "to_status": new_status.value,
+                    "changed_by": str(changed_by) if changed_by else None,
+                    "changed_by_type": changed_by_type,
+                    "reason": reason,
+                    "created_at": row.history_created_at.isoformat(),
+                },
+                "version": row.version,
+            })
+        return transitions
+
+    async def _raise_transition_error(
+        self,
+        order_id: UUID,
+        new_status: OrderStatus,
+        expected_version: Optional[int],
+    ) -> NoReturn:
+        """Explain why a transition matched no row."""
+        result = await self.db.execute(
+            select(Order.status, Order.version).where(Order.id == order_id)
+        )
+        row = result.one_or_none()
+        if row is None:
+            raise ValueError("Commande non trouvee")
+        if expected_version is not None and row.version != expected_version:
+            raise ConflictError("Commande modifiee entre-temps, veuillez recharger")
+        raise ValueError(f"Transition invalide: {row.status} -> {new_status.value}")
 
-    async def confirm_order(self, order_id: UUID, provider_user_id: UUID) -> Order:
+    async def confirm_order(self, order_id: UUID, provider_user_id: UUID) -> dict[str, Any]:
         """Confirm an order (provider action)."""
         order = await self.get_order(order_id)
         if not order:
@@ -374,7 +574,7 @@ class OrderService:
 
     async def cancel_order(
         self, order_id: UUID, cancelled_by: UUID, reason: str
-    ) -> Order:
+    ) -> dict[str, Any]:
         """Cancel an order."""
         return await self.update_order_status(
             order_id, OrderStatus.CANCELLED, cancelled_by, reason
@@ -385,56 +585,213 @@ class OrderService:
         order_id: UUID,
         from_status: Optional[OrderStatus],
         to_status: OrderStatus,
-        changed_by: UUID,
+        changed_by: Optional[UUID],
         reason: Optional[str] = None,
-    ) -> None:
-        """Record status change in history."""
+    ) -> dict[str, Any]:
+        """Record status change in history and return the entry (as in get_order_status_history)."""
         from sqlalchemy import text
 
+        changed_by_type = "user" if changed_by else "system"
+
         # Insert into order_status_history table
-        await self.db.execute(
+        result = await self.db.execute(
             text("""
                 INSERT INTO orders.order_status_history
                 (order_id, from_status, to_status, changed_by, changed_by_type, reason)
                 VALUES (:order_id, :from_status, :to_status, :changed_by, :changed_by_type, :reason)
+                RETURNING id, created_at
             """),
             {
                 "order_id": order_id,
                 "from_status": from_status.value if from_status else None,
                 "to_status": to_status.value,
                 "changed_by": changed_by,
-                "changed_by_type": "user",  # Could be user, system, admin
+                "changed_by_type": changed_by_type,
                 "reason": reason,
             }
         )
+        row = result.one()
+
+        return {
+            "id": str(row.id),
+            "from_status": from_status.value if from_status else None,
+            "to_status": to_status.value,
+            "changed_by": str(changed_by) if changed_by else None,
+            "changed_by_type": changed_by_type,
+            "reason": reason,
+            "created_at": row.created_at.isoformat(),
+        }
 
     # =========================================================================
-    # Order Queries
+    # Order Rating
     # =========================================================================
 
-    async def get_order(self, order_id: UUID) -> Optional[Order]:
-        """Get order by ID with items."""
+    async def rate_order(
+        self,
+        order_id: UUID,
+        user_id: UUID,
+        overall_rating: int,
+        food_rating: Optional[int] = None,
+        delivery_rating: Optional[int] = None,
+        comment: Optional[str] = None,
+    ) -> dict[str, Any]:
+        """
+        Rate a delivered order, in one statement.
+
+        Marks the order as rated (in orders.orders, or in the archive for
+        old orders), inserts the provider rating (and the food
+        and driver ratings when given), and adds them to the running sums and
+        counts of the provider and the driver: ranking reads use
+        ``average_rating`` and never aggregate the ratings table.
+
+        Raises:
+            ValueError: If the order is not a delivered order of the user, or is already rated
+        """
+        from sqlalchemy import text
+
+        rate = """
+            SET is_rated = true,
+                provider_rating = CAST(:overall_rating AS smallint),
+                driver_rating = CAST(:delivery_rating AS smallint)
+            WHERE id = :order_id
+              AND user_id = :user_id
+              AND status = 'delivered'
+              AND NOT COALESCE(is_rated, false)
+            RETURNING id, provider_id
+        """
         result = await self.db.execute(
-            select(Order)
-            .where(Order.id == order_id)
-            .options(
-                selectinload(Order.items),
-                selectinload(Order.provider),
-            )
+            text(f"""
+                WITH rated_hot AS (
+                    UPDATE orders.orders {rate}
+                ),
+                rated_archived AS (
+                    UPDATE orders.orders_archive {rate}
+                ),
+                rated AS (
+                    SELECT id, provider_id FROM rated_hot
+                    UNION ALL
+                    SELECT id, provider_id FROM rated_archived
+                ),
+                driver AS (
+                    SELECT d.driver_id
+                    FROM deliveries.deliveries d JOIN rated ON d.order_id = rated.id
+                    WHERE d.status = 'delivered' AND d.driver_id IS NOT NULL
+                    LIMIT 1
+                ),
+                inserted AS (
+                    INSERT INTO orders.ratings
+                    (order_id, user_id, rating_type, provider_id, driver_id, rating, comment)
+                    SELECT id, CAST(:user_id AS uuid), 'provider', provider_id, NULL,
+                           CAST(:overall_rating AS smallint), CAST(:comment AS text)
+                    FROM rated
+                    UNION ALL
+                    SELECT id, CAST(:user_id AS uuid), 'food', provider_id, NULL,
+                           CAST(:food_rating AS smallint), NULL
+                    FROM rated WHERE CAST(:food_rating AS smallint) IS NOT NULL
+                    UNION ALL
+                    SELECT rated.id, CAST(:user_id AS uuid), 'driver', NULL, driver.driver_id,
+                           CAST(:delivery_rating AS smallint), NULL
+                    FROM rated, driver WHERE CAST(:delivery_rating AS smallint) IS NOT NULL
+                    RETURNING id, rating_type, provider_id, driver_id, rating, created_at
+                ),
+                provider_totals AS (
+                    UPDATE orders.providers p
+                    SET rating_sum = p.rating_sum + i.rating,
+                        rating_count = COALESCE(p.rating_count, 0) + 1,
+                        average_rating = round(
+                            (p.rating_sum + i.rating)::numeric / (COALESCE(p.rating_count, 0) + 1), 2
+                        )
+                    FROM inserted i
+                    WHERE i.rating_type = 'provider' AND p.id = i.provider_id
+                ),
+                driver_totals AS (
+                    UPDATE deliveries.drivers d
+                    SET rating_sum = d.rating_sum + i.rating,
+                        rating_count = COALESCE(d.rating_count, 0) + 1,
+                        average_rating = round(
+                            (d.rating_sum + i.rating)::numeric / (COALESCE(d.rating_count, 0) + 1), 2
+                        )
+                    FROM inserted i
+                    WHERE i.rating_type = 'driver' AND d.id = i.driver_id
+                )
+                SELECT id, created_at FROM inserted WHERE rating_type = 'provider'
+            """),
+            {
+                "order_id": order_id,
+                "user_id": user_id,
+                "overall_rating": overall_rating,
+                "food_rating": food_rating,
+                "delivery_rating": delivery_rating,
+                "comment": comment,
+            },
         )
-        return result.scalar_one_or_none()
+        row = result.one_or_none()
+        if row is None:
+            raise ValueError("Commande deja notee ou non livree")
+
+        return {
+            "id": row.id,
+            "order_id": order_id,
+            "user_id": user_id,
+            "overall_rating": overall_rating,
+            "food_rating": food_rating,
+            "delivery_rating": delivery_rating,
+            "comment": comment,
+            "created_at": row.created_at,
+        }
+
+    # =========================================================================
+    # Order Queries
+    # =========================================================================
+
+    async def get_order(self, order_id: UUID) -> Optional[Order]:
+        """Get order by ID with items (archived orders included)."""
+        return await self._find_order("id", order_id)
 
     async def get_order_by_reference(self, reference: str) -> Optional[Order]:
-        """Get order by reference."""
-        result = await self.db.execute(
-            select(Order)
-            .where(Order.reference == reference)
-            .options(
-                selectinload(Order.items),
-                selectinload(Order.provider),
+        """Get order by reference (archived orders included)."""
+        return await self._find_order("reference", reference)
+
+    async def _find_order(self, column: str, value: Any) -> Optional[Order]:
+        """Order whose ``column`` is ``value``, from orders.orders or else the archive."""
+        for entity in (Order, aliased(Order, orders_archive, adapt_on_names=True)):
+            result = await self.db.execute(
+                select(entity)
+                .where(getattr(entity, column) == value)
+                .options(
+                    selectinload(entity.items),
+                    selectinload(entity.provider),
+                )
             )
+            order = result.scalar_one_or_none()
+            if order is not None:
+                return order
+        return None
+
+    def _orders_entity(
+        self, archived: bool, created_after: Optional[datetime]
+    ) -> tuple[type[Order] | AliasedClass[Order], ColumnElement[bool]]:
+        """
+        Entity and date filter of order listings.
+
+        Recent orders are read from the partitions created after
+        ``created_after`` (by default the archive cutoff). Archived ones are
+        the orders created before the cutoff: moved to orders.orders_archive,
+        or still in orders.orders until the worker moves them.
+        """
+        cutoff = order_partitions.archive_cutoff()
+        if not archived:
+            return Order, Order.created_at >= (created_after or cutoff)
+
+        entity = aliased(
+            Order,
+            union_all(
+                select(*Order.__table__.c).where(Order.created_at < cutoff),
+                select(*orders_archive.c),
+            ).subquery("archived_orders"),
+            adapt_on_names=True,
         )
-        return result.scalar_one_or_none()
+        return entity, entity.created_at >= created_after if created_after else true()
 
     async def list_user_orders(
         self,
@@ -442,12 +799,19 @@ class OrderService:
         status: Optional[str] = None,
         page: int = 1,
         page_size: int = 20,
+        created_after: Optional[datetime] = None,
+        archived: bool = False,
     ) -> tuple[list[Order], int]:
-        """List orders for a user."""
-        query = select(Order).where(Order.user_id == user_id)
+        """
+        List orders for a user, created after ``created_after`` (by default
+        the archive cutoff: only the partitions of recent months are scanned),
+        or the archived ones.
+        """
+        entity, created_filter = self._orders_entity(archived, created_after)
+        query = select(entity).where(entity.user_id == user_id, created_filter)
 
         if status:
-            query = query.where(Order.status == status)
+            query = query.where(entity.status == status)
 
         # Count total
         count_query = select(func.count()).select_from(query.subquery())
@@ -456,8 +820,8 @@ class OrderService:
 
         # Apply pagination
         query = (
-            query.options(selectinload(Order.items), selectinload(Order.provider))
-            .order_by(Order.created_at.desc())
+            query.options(selectinload(entity.items), selectinload(entity.provider))
+            .order_by(entity.created_at.desc())
             .offset((page - 1) * page_size)
             .limit(page_size)
         )
@@ -473,12 +837,19 @@ class OrderService:
         status: Optional[str] = None,
         page: int = 1,
         page_size: int = 20,
+        created_after: Optional[datetime] = None,
+        archived: bool = False,
     ) -> tuple[list[Order], int]:
-        """List orders for a provider."""
-        query = select(Order).where(Order.provider_id == provider_id)
+        """
+        List orders for a provider, created after ``created_after`` (by default
+        the archive cutoff: only the partitions of recent months are scanned),
+        or the archived ones.
+        """
+        entity, created_filter = self._orders_entity(archived, created_after)
+        query = select(entity).where(entity.provider_id == provider_id, created_filter)
 
         if status:
-            query = query.where(Order.status == status)
+            query = query.where(entity.status == status)
 
         # Count total
         count_query = select(func.count()).select_from(query.subquery())
@@ -487,8 +858,8 @@ class OrderService:
 
         # Apply pagination
         query = (
-            query.options(selectinload(Order.items))
-            .order_by(Order.created_at.desc())
+            query.options(selectinload(entity.items), selectinload(entity.provider))
+            .order_by(entity.created_at.desc())
             .offset((page - 1) * page_size)
             .limit(page_size)
         )
@@ -499,7 +870,7 @@ class OrderService:
         return orders, total
 
     async def get_order_status_history(self, order_id: UUID) -> list[dict]:
-        """Get order status history."""
+        """Get order status history (archived with the order once it is archived)."""
         from sqlalchemy import text
 
         result = await self.db.execute(
@@ -507,6 +878,10 @@ class OrderService:
                 SELECT id, from_status, to_status, changed_by, changed_by_type, reason, created_at
                 FROM orders.order_status_history
                 WHERE order_id = :order_id
+                UNION ALL
+                SELECT id, from_status, to_status, changed_by, changed_by_type, reason, created_at
+                FROM orders.order_status_history_archive
+                WHERE order_id = :order_id
                 ORDER BY created_at ASC
             """),
             {"order_id": order_id}
@@ -544,8 +919,10 @@ class OrderService:
 
         return {
             "order_id": str(order.id),
+            "user_id": str(order.user_id),
             "reference": order.reference,
             "status": order.status,
+            "version": order.version,
             "provider": {
                 "id": str(order.provider.id),
                 "name": order.provider.name,
@@ -569,7 +946,9 @@ class OrderService:
         result = await self.db.execute(
             text("""
                 SELECT d.id, d.reference, d.status, d.driver_id,
-                       dr.first_name, dr.last_name, dr.phone, dr.avatar_url,
+                       COALESCE(NULLIF(dr.display_name, ''), dr.first_name || ' ' || dr.last_name)
+                           AS driver_name,
+                       dr.phone, dr.avatar_url,
                        dr.vehicle_type, dr.vehicle_plate,
                        d.eta_minutes, d.delivery_code
                 FROM deliveries.deliveries d
@@ -591,7 +970,7 @@ class OrderService:
             "delivery_code": row.delivery_code,
             "driver": {
                 "id": str(row.driver_id),
-                "name": f"{row.first_name} {row.last_name}",
+                "name": row.driver_name,
                 "phone": row.phone,
                 "avatar_url": row.avatar_url,
                 "vehicle_type": row.vehicle_type,
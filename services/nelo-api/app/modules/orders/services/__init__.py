@@ -2,5 +2,31 @@
 
 from app.modules.orders.services.provider_service import ProviderService
 from app.modules.orders.services.product_service import ProductService
+from app.modules.orders.services.aggregates import (
+    AggregateReconciliation,
+    aggregate_reconciliation,
+)
+from app.modules.orders.services.partitions import OrderPartitionMaintenance, order_partitions
+from app.modules.orders.services.provider_sales import (
+    ProviderSalesRollup,
+    ProviderSalesService,
+    provider_sales_rollup,
+)
+from app.modules.orders.services.provider_queue import ProviderOrderQueue, provider_order_queue
+from app.modules.orders.services.tracking_store import OrderTrackingStore, order_tracking_store
 
-__all__ = ["ProviderService", "ProductService"]
+__all__ = [
+    "ProviderService",
+    "ProductService",
+    "AggregateReconciliation",
+    "aggregate_reconciliation",
+    "OrderPartitionMaintenance",
+    "order_partitions",
+    "ProviderSalesRollup",
+    "ProviderSalesService",
+    "provider_sales_rollup",
+    "ProviderOrderQueue",
+    "provider_order_queue",
+    "OrderTrackingStore",
+    "order_tracking_store",
+]
@@ -0,0 +1,198 @@
+"""Reconciliation of the running provider and driver aggregates."""
+
+import logging
+import time
+from typing import Any, Optional, cast
+
+from sqlalchemy import CursorResult, text
+
+from app.core.config import get_settings
+from app.core.database import get_db_context
+from app.core.metrics import Counter
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+AGGREGATES_CORRECTED = Counter(
+    "nelo_aggregates_corrected_total",
+    "Provider and driver aggregates found out of date by the reconciliation",
+    ["entity"],
+)
+
+# Batches start after this id (UUIDs sort after it)
+FIRST_ID = "00000000-0000-0000-0000-000000000000"
+
+# Locks the next batch of providers. Ratings and delivered orders update the
+# provider row in the statement that adds them: once locked, none of them
+# can commit until the batch is reconciled.
+LOCK_PROVIDERS = text("""
+    SELECT id FROM orders.providers
+    WHERE id > CAST(:after AS uuid)
+    ORDER BY id
+    LIMIT :batch_size
+    FOR UPDATE
+""")
+
+# Ratings and delivered orders of the locked providers. Archived orders are
+# counted in archived_orders as they are archived: only the hot table is read.
+RECONCILE_PROVIDERS = text("""
+    UPDATE orders.providers p
+    SET rating_sum = s.rating_sum,
+        rating_count = s.rating_count,
+        average_rating = CASE WHEN s.rating_count > 0
+            THEN round(s.rating_sum::numeric / s.rating_count, 2) END,
+        total_orders = s.total_orders
+    FROM (
+        SELECT providers.id,
+               COALESCE(ratings.rating_sum, 0) AS rating_sum,
+               COALESCE(ratings.rating_count, 0) AS rating_count,
+               providers.archived_orders + COALESCE(delivered.total_orders, 0) AS total_orders
+        FROM orders.providers
+        LEFT JOIN (
+            SELECT provider_id, sum(rating) AS rating_sum, count(*) AS rating_count
+            FROM orders.ratings
+            WHERE rating_type = 'provider' AND provider_id = ANY(CAST(:ids AS uuid[]))
+            GROUP BY provider_id
+        ) ratings ON ratings.provider_id = providers.id
+        LEFT JOIN (
+            SELECT provider_id, count(*) AS total_orders
+            FROM orders.orders
+            WHERE status IN ('delivered', 'refunded')
+              AND provider_id = ANY(CAST(:ids AS uuid[]))
+            GROUP BY provider_id
+        ) delivered ON delivered.provider_id = providers.id
+        WHERE providers.id = ANY(CAST(:ids AS uuid[]))
+    ) s
+    WHERE p.id = s.id
+      AND (p.rating_sum, COALESCE(p.rating_count, 0), COALESCE(p.total_orders, 0))
+          IS DISTINCT FROM (s.rating_sum, s.rating_count, s.total_orders)
+""")
+
+# Locks the next batch of drivers (ratings and finished deliveries update the
+# driver row, as for providers)
+LOCK_DRIVERS = text("""
+    SELECT id FROM deliveries.drivers
+    WHERE id > CAST(:after AS uuid)
+    ORDER BY id
+    LIMIT :batch_size
+    FOR UPDATE
+""")
+
+# Ratings and finished deliveries of the locked drivers
+RECONCILE_DRIVERS = text("""
+    UPDATE deliveries.drivers d
+    SET rating_sum = s.rating_sum,
+        rating_count = s.rating_count,
+        average_rating = CASE WHEN s.rating_count > 0
+            THEN round(s.rating_sum::numeric / s.rating_count, 2) END,
+        total_deliveries = s.delivered,
+        failed_deliveries = s.failed,
+        completion_rate = CASE WHEN s.delivered + s.failed > 0
+            THEN round(100.0 * s.delivered / (s.delivered + s.failed), 2) ELSE 100 END
+    FROM (
+        SELECT drivers.id,
+               COALESCE(ratings.rating_sum, 0) AS rating_sum,
+               COALESCE(ratings.rating_count, 0) AS rating_count,
+               COALESCE(finished.delivered, 0) AS delivered,
+               COALESCE(finished.failed, 0) AS failed
+        FROM deliveries.drivers
+        LEFT JOIN (
+            SELECT driver_id, sum(rating) AS rating_sum, count(*) AS rating_count
+            FROM orders.ratings
+            WHERE rating_type = 'driver' AND driver_id = ANY(CAST(:ids AS uuid[]))
+            GROUP BY driver_id
+        ) ratings ON ratings.driver_id = drivers.id
+        LEFT JOIN (
+            SELECT driver_id,
+                   count(*) FILTER (WHERE status = 'delivered') AS delivered,
+                   count(*) FILTER (WHERE status = 'failed') AS failed
+            FROM deliveries.deliveries
+            WHERE status IN ('delivered', 'failed')
+              AND driver_id = ANY(CAST(:ids AS uuid[]))
+            GROUP BY driver_id
+        ) finished ON finished.driver_id = drivers.id
+        WHERE drivers.id = ANY(CAST(:ids AS uuid[]))
+    ) s
+    WHERE d.id = s.id
+      AND (d.rating_sum, COALESCE(d.rating_count, 0),
+           COALESCE(d.total_deliveries, 0), d.failed_deliveries)
+          IS DISTINCT FROM (s.rating_sum, s.rating_count, s.delivered, s.failed)
+""")
+
+# Entities in reconciliation order, with their lock and reconcile statements
+STATEMENTS = {
+    "provider": (LOCK_PROVIDERS, RECONCILE_PROVIDERS),
+    "driver": (LOCK_DRIVERS, RECONCILE_DRIVERS),
+}
+
+
+class AggregateReconciliation:
+    """
+    Recompute provider and driver aggregates from the source tables.
+
+    Ratings and finished orders update running sums and counts in the same
+    statement as the row they add, so the aggregates are exact unless rows
+    are changed outside of the services (moderation, manual fixes, restored
+    backups). This periodic pass corrects those: only rows that differ are
+    written, and each correction is counted.
+
+    Rows are reconciled in batches of ``batch_size`` ids, each in its own
+    transaction: the batch is locked first, so ratings and deliveries of
+    those rows wait for it instead of being overwritten by sums read before
+    they committed. A run stops at its time budget and returns where the
+    next one resumes.
+    """
+
+    def __init__(self, batch_size: int):
+        self.batch_size = batch_size
+
+    async def run(
+        self, time_budget: float, resume: Optional[dict[str, str]] = None
+    ) -> Optional[dict[str, str]]:
+        """
+        Correct out-of-date aggregates for up to ``time_budget`` seconds.
+
+        Starts from ``resume`` (as returned by a previous run), or from the
+        first provider. Returns where to resume, or None once every provider
+        and driver is reconciled.
+        """
+        deadline = time.monotonic() + time_budget
+        entities = list(STATEMENTS)
+        if resume:
+            entities = entities[entities.index(resume["entity"]):]
+        after = resume["after"] if resume else FIRST_ID
+
+        corrected = dict.fromkeys(entities, 0)
+        position = None
+        for entity in entities:
+            lock, reconcile = STATEMENTS[entity]
+            remaining = True
+            while remaining:
+                if time.monotonic() >= deadline:
+                    position = {"entity": entity, "after": after}
+                    break
+                async with get_db_context() as db:
+                    locked = await db.execute(
+                        lock, {"after": after, "batch_size": self.batch_size}
+                    )
+                    ids = list(locked.scalars())
+                    if ids:
+                        result = await db.execute(reconcile, {"ids": ids})
+                        corrected[entity] += cast(CursorResult[Any], result).rowcount
+                if ids:
+                    after = str(ids[-1])
+                remaining = len(ids) == self.batch_size
+            if position:
+                break
+            after = FIRST_ID
+
+        for entity, count in corrected.items():
+            AGGREGATES_CORRECTED.inc(count, entity=entity)
+        if any(corrected.values()):
+            logger.warning(f"Out-of-date aggregates corrected: {corrected}")
+        return position
+
+
+aggregate_reconciliation = AggregateReconciliation(
+    batch_size=settings.aggregate_reconciliation_batch_size,
+)
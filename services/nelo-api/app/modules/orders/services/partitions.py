@@ -0,0 +1,272 @@
+"""Monthly partitions of orders and status history, and their archival."""
+
+import logging
+import re
+import time
+from datetime import date, datetime, timezone
+from typing import Any, Optional, cast
+
+from sqlalchemy import CursorResult, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config import get_settings
+from app.core.database import engine, get_db_context
+from app.core.metrics import Counter
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+ORDERS_ARCHIVED = Counter(
+    "nelo_orders_archived_total", "Closed orders moved to the archive tables"
+)
+
+# Statuses after which an order no longer changes
+CLOSED_STATUSES = ("delivered", "cancelled", "refunded")
+
+# Monthly partitions: <table>_YYYYMM
+MONTHLY_PARTITION = re.compile(r"^(?P<table>[a-z_]+)_(?P<year>\d{4})(?P<month>\d{2})$")
+
+# Moves one batch of closed orders, with their history, to the archive tables.
+# Rows are claimed with SKIP LOCKED: orders being changed are archived later.
+# Delivered orders moved are added to their provider's archived_orders, which
+# the aggregate reconciliation counts instead of reading the archive.
+ARCHIVE_BATCH = text("""
+    WITH batch AS (
+        SELECT id, created_at FROM orders.orders
+        WHERE created_at < :cutoff
+          AND status::text = ANY(:closed_statuses)
+        ORDER BY created_at
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    ),
+    moved AS (
+        DELETE FROM orders.orders o
+        USING batch
+        WHERE o.id = batch.id AND o.created_at = batch.created_at
+        RETURNING o.*
+    ),
+    history AS (
+        DELETE FROM orders.order_status_history h
+        USING moved
+        WHERE h.order_id = moved.id AND h.created_at >= moved.created_at
+        RETURNING h.*
+    ),
+    archived_history AS (
+        INSERT INTO orders.order_status_history_archive SELECT * FROM history
+    ),
+    archived_counts AS (
+        UPDATE orders.providers p
+        SET archived_orders = p.archived_orders + delivered.count
+        FROM (
+            SELECT provider_id, count(*) AS count FROM moved
+            WHERE status IN ('delivered', 'refunded')
+            GROUP BY provider_id
+        ) delivered
+        WHERE p.id = delivered.provider_id
+    )
+    INSERT INTO orders.orders_archive SELECT * FROM moved
+""")
+
+
+def add_months(day: date, months: int) -> date:
+    """First day of the month ``months`` after (or before) the month of ``day``."""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class OrderPartitionMaintenance:
+    """
+    Keep the order partitions ready and the hot tables small.
+
+    ``orders.orders`` and ``orders.order_status_history`` are partitioned by
+    month of ``created_at``. Each run:
+
+    - creates the partitions of the coming ``months_ahead`` months (the hot
+      tables have no default partition: rows without one are rejected);
+    - moves closed orders created before the archive cutoff (the start of
+      the month ``archive_after_months`` ago), and their history, to the
+      yearly partitions of the archive tables, in batches;
+    - detaches monthly partitions left empty before the cutoff, concurrently
+      (queries on the parent are not blocked), then drops them.
+
+    Runs hold a session-level advisory lock on a connection of their own,
+    so that concurrent workers skip instead of racing on partition DDL. The
+    connection is in autocommit (DETACH ... CONCURRENTLY cannot run in a
+    transaction) with a ``lock_timeout``: DDL waiting behind long queries
+    gives up instead of queueing every query on the table behind it. A
+    partition whose detach was interrupted is finalized on the next run.
+    """
+
+    LOCK_KEY = "orders.partition_maintenance"
+    LOCK_TIMEOUT_MS = 5000
+    HOT_TABLES = ("orders", "order_status_history")
+    ARCHIVE_TABLES = ("orders_archive", "order_status_history_archive")
+
+    def __init__(
+        self,
+        months_ahead: int,
+        archive_after_months: int,
+        batch_size: int,
+        archive_tablespace: Optional[str] = None,
+    ):
+        self.months_ahead = months_ahead
+        self.archive_after_months = archive_after_months
+        self.batch_size = batch_size
+        self.archive_tablespace = archive_tablespace
+
+    def archive_cutoff(self, today: Optional[date] = None) -> datetime:
+        """Orders created before this are archived once closed."""
+        today = today or datetime.now(timezone.utc).date()
+        cutoff = add_months(today, -self.archive_after_months)
+        return datetime(cutoff.year, cutoff.month, 1, tzinfo=timezone.utc)
+
+    async def run(self, time_budget: float) -> bool:
+        """
+        Run one maintenance pass, archiving for up to ``time_budget`` seconds.
+
+        Returns True if closed orders are left to archive.
+        """
+        deadline = time.monotonic() + time_budget
+        cutoff = self.archive_cutoff()
+
+        async with engine.connect() as conn:
+            await conn.execution_options(isolation_level="AUTOCOMMIT")
+            locked = await conn.scalar(
+                text("SELECT pg_try_advisory_lock(hashtext(:key))"),
+                {"key": self.LOCK_KEY},
+            )
+            if not locked:
+                logger.info("Order partition maintenance already running elsewhere")
+                return False
+            try:
+                await conn.execute(text(f"SET lock_timeout = {self.LOCK_TIMEOUT_MS}"))
+                return await self._maintain(conn, deadline, cutoff)
+            finally:
+                try:
+                    await conn.execute(text("RESET lock_timeout"))
+                    await conn.execute(
+                        text("SELECT pg_advisory_unlock(hashtext(:key))"),
+                        {"key": self.LOCK_KEY},
+                    )
+                except DBAPIError:
+                    # Closing the connection releases the lock; it must not
+                    # go back to the pool still holding it
+                    logger.exception("Could not release the order partition lock")
+                    await conn.invalidate()
+
+    async def _maintain(self, conn: AsyncConnection, deadline: float, cutoff: datetime) -> bool:
+        await self._ensure_partitions(conn, cutoff)
+
+        archived = 0
+        remaining = True
+        while remaining and time.monotonic() < deadline:
+            async with get_db_context() as db:
+                result = await db.execute(
+                    ARCHIVE_BATCH,
+                    {
+                        "cutoff": cutoff,
+                        "closed_statuses": list(CLOSED_STATUSES),
+                        "batch_size": self.batch_size,
+                    },
+                )
+            moved = cast(CursorResult[Any], result).rowcount
+            archived += moved
+            remaining = moved == self.batch_size
+        ORDERS_ARCHIVED.inc(archived)
+
+        dropped = []
+        if not remaining:
+            dropped = await self._drop_empty_partitions(conn, cutoff)
+
+        logger.info(
+            f"Order partitions maintained: {archived} orders archived, "
+            f"{len(dropped)} empty partitions dropped"
+        )
+        return remaining
+
+    async def _ensure_partitions(self, conn: AsyncConnection, cutoff: datetime) -> None:
+        today = datetime.now(timezone.utc).date()
+        for table in self.HOT_TABLES:
+            await conn.execute(
+                text("SELECT orders.ensure_partitions(:table, 'month', :from_date, :to_date)"),
+                {
+                    "table": table,
+                    "from_date": today.replace(day=1),
+                    "to_date": add_months(today, self.months_ahead),
+                },
+            )
+
+        # Archive partitions from the oldest hot order to now (history rows
+        # of an order can be much later than the order itself)
+        oldest = await conn.scalar(text("SELECT min(created_at) FROM orders.orders"))
+        if oldest is None or oldest >= cutoff:
+            return
+        for table in self.ARCHIVE_TABLES:
+            await conn.execute(
+                text(
+                    "SELECT orders.ensure_partitions("
+                    ":table, 'year', :from_date, :to_date, :tablespace)"
+                ),
+                {
+                    "table": table,
+                    "from_date": oldest.date(),
+                    "to_date": today,
+                    "tablespace": self.archive_tablespace,
+                },
+            )
+
+    async def _drop_empty_partitions(
+        self, conn: AsyncConnection, cutoff: datetime
+    ) -> list[str]:
+        result = await conn.execute(
+            text("""
+                SELECT parent.relname AS parent, child.relname AS partition,
+                       pg_inherits.inhdetachpending AS detach_pending
+                FROM pg_inherits
+                JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                JOIN pg_namespace ns ON ns.oid = parent.relnamespace
+                WHERE ns.nspname = 'orders' AND parent.relname = ANY(:tables)
+            """),
+            {"tables": list(self.HOT_TABLES)},
+        )
+
+        dropped = []
+        for row in result.all():
+            match = MONTHLY_PARTITION.match(row.partition)
+            if not match or match["table"] != row.parent:
+                continue
+            month = date(int(match["year"]), int(match["month"]), 1)
+            if add_months(month, 1) > cutoff.date():
+                continue
+            if not row.detach_pending:
+                empty = await conn.scalar(
+                    text(f'SELECT NOT EXISTS (SELECT 1 FROM orders."{row.partition}")')
+                )
+                if not empty:
+                    continue
+            mode = "FINALIZE" if row.detach_pending else "CONCURRENTLY"
+            try:
+                await conn.execute(
+                    text(
+                        f'ALTER TABLE orders."{row.parent}" '
+                        f'DETACH PARTITION orders."{row.partition}" {mode}'
+                    )
+                )
+            except DBAPIError as exc:
+                # Lock timeout: the partition is left (or pending detach)
+                # and handled on the next run
+                logger.warning(f"Could not detach partition {row.partition}: {exc}")
+                continue
+            await conn.execute(text(f'DROP TABLE IF EXISTS orders."{row.partition}"'))
+            dropped.append(row.partition)
+        return dropped
+
+
+order_partitions = OrderPartitionMaintenance(
+    months_ahead=settings.order_partitions_months_ahead,
+    archive_after_months=settings.order_archive_after_months,
+    batch_size=settings.order_archive_batch_size,
+    archive_tablespace=settings.order_archive_tablespace or None,
+)
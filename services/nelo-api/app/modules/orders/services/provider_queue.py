@@ -0,0 +1,228 @@
+"""Live order queue of each provider (Redis sorted set + pub/sub feed)."""
+
+import json
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+from uuid import UUID
+
+import redis.asyncio as redis
+from sqlalchemy import func, select
+
+from app.core.config import get_settings
+from app.core.database import get_read_db_context
+from app.core.redis import get_redis_context
+from app.modules.orders.models import Order, OrderItem
+from app.shared.realtime import realtime_hub
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Statuses in which an order is on the provider's dashboard
+ACTIVE_STATUSES = ("pending", "confirmed", "preparing", "ready")
+
+# Merge changed fields into an entry, or drop it once no longer active.
+# Returns the entry as stored (the last one known when dropped).
+# ARGV: order id, 1 if still active, changed fields (JSON)
+UPDATE_SCRIPT = """
+local entry = redis.call('HGET', KEYS[2], ARGV[1])
+if ARGV[2] == '0' then
+    redis.call('ZREM', KEYS[1], ARGV[1])
+    redis.call('HDEL', KEYS[2], ARGV[1])
+    return entry
+end
+if not entry then
+    return false
+end
+local data = cjson.decode(entry)
+for field, value in pairs(cjson.decode(ARGV[3])) do
+    data[field] = value
+end
+entry = cjson.encode(data)
+redis.call('HSET', KEYS[2], ARGV[1], entry)
+return entry
+"""
+
+# Drop entries created before ARGV[1] (stuck orders), then return the rest
+# oldest first.
+SNAPSHOT_SCRIPT = """
+local stale = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', '(' .. ARGV[1])
+if #stale > 0 then
+    redis.call('ZREM', KEYS[1], unpack(stale))
+    redis.call('HDEL', KEYS[2], unpack(stale))
+end
+local ids = redis.call('ZRANGE', KEYS[1], 0, -1)
+if #ids == 0 then
+    return {}
+end
+return redis.call('HMGET', KEYS[2], unpack(ids))
+"""
+
+
+def provider_channel(provider_id: UUID | str) -> str:
+    return f"orders:provider:{provider_id}"
+
+
+def queue_entry(order: Order, item_count: int, created_at: datetime) -> dict[str, Any]:
+    """Dashboard fields of an order."""
+    return {
+        "id": str(order.id),
+        "reference": order.reference,
+        "status": order.status,
+        "subtotal": order.subtotal,
+        "delivery_fee": order.delivery_fee,
+        "total_amount": order.total,
+        "item_count": item_count,
+        "payment_method": order.payment_method,
+        "is_scheduled": order.is_scheduled,
+        "scheduled_for": order.scheduled_for.isoformat() if order.scheduled_for else None,
+        "special_instructions": order.special_instructions,
+        "estimated_prep_time": order.estimated_prep_time,
+        "created_at": created_at.isoformat(),
+    }
+
+
+class ProviderOrderQueue:
+    """
+    Active orders of each provider, for live dashboards.
+
+    Per provider, a sorted set of active order ids scored by creation time
+    and a hash of their dashboard entries. Order events keep both up to date
+    and push each change on the provider's channel, so a dashboard reads one
+    snapshot when it connects, then only receives changes.
+
+    The queue of a provider is filled from the database the first time it
+    is read; entries written by events meanwhile are kept (they are newer).
+    Entries older than ``max_age_seconds`` are dropped on read, so orders
+    stuck in an active status do not stay forever.
+    """
+
+    KEY = "provider_orders:{provider_id}"
+    ENTRIES_KEY = "provider_orders:{provider_id}:entries"
+    LOADED_KEY = "provider_orders:{provider_id}:loaded"
+    LOAD_STATEMENT_TIMEOUT_MS = 2000
+
+    def __init__(self, max_age_seconds: int):
+        self.max_age_seconds = max_age_seconds
+
+    def _keys(self, provider_id: UUID | str) -> list[str]:
+        return [
+            self.KEY.format(provider_id=provider_id),
+            self.ENTRIES_KEY.format(provider_id=provider_id),
+        ]
+
+    # -------------------------------------------------------------------------
+    # Updates (from order events)
+    # -------------------------------------------------------------------------
+
+    async def add(self, provider_id: str, entry: dict[str, Any]) -> None:
+        """Add a new order and push it to the provider's dashboards."""
+        queue_key, entries_key = self._keys(provider_id)
+        score = datetime.fromisoformat(entry["created_at"]).timestamp()
+        async with get_redis_context() as client:
+            pipe = client.pipeline(transaction=True)
+            pipe.zadd(queue_key, {entry["id"]: score})
+            pipe.hset(entries_key, entry["id"], json.dumps(entry))
+            await pipe.execute()
+        await realtime_hub.publish([provider_channel(provider_id)], "order.created", entry)
+
+    async def update(
+        self,
+        provider_id: str,
+        order_id: str,
+        status: str,
+        changes: Optional[dict[str, Any]] = None,
+    ) -> None:
+        """Apply a status change and push it to the provider's dashboards."""
+        await self.update_many(provider_id, status, {order_id: changes or {}})
+
+    async def update_many(
+        self,
+        provider_id: str,
+        status: str,
+        changes: dict[str, dict[str, Any]],
+    ) -> None:
+        """
+        Apply the same status change to several orders (order id -> changed
+        fields) and push them to the provider's dashboards, in one round trip
+        each.
+        """
+        active = status in ACTIVE_STATUSES
+        fields = {
+            order_id: {"status": status, **order_changes}
+            for order_id, order_changes in changes.items()
+        }
+        async with get_redis_context() as client:
+            script = client.register_script(UPDATE_SCRIPT)
+            pipe = client.pipeline(transaction=False)
+            for order_id, order_fields in fields.items():
+                await script(
+                    keys=self._keys(provider_id),
+                    args=[order_id, int(active), json.dumps(order_fields)],
+                    client=pipe,
+                )
+            stored = await pipe.execute()
+
+        channel = provider_channel(provider_id)
+        messages = []
+        for (order_id, order_fields), entry in zip(fields.items(), stored):
+            entry = json.loads(entry) if entry else {"id": order_id}
+            entry.update(order_fields)
+            entry["active"] = active
+            messages.append(([channel], f"order.{status}", entry))
+        await realtime_hub.publish_many(messages)
+
+    # -------------------------------------------------------------------------
+    # Reads
+    # -------------------------------------------------------------------------
+
+    async def snapshot(self, provider_id: UUID) -> list[dict[str, Any]]:
+        """Active orders of a provider, oldest first."""
+        async with get_redis_context() as client:
+            if not await client.exists(self.LOADED_KEY.format(provider_id=provider_id)):
+                await self._load(client, provider_id)
+            script = client.register_script(SNAPSHOT_SCRIPT)
+            entries = await script(
+                keys=self._keys(provider_id),
+                args=[time.time() - self.max_age_seconds],
+            )
+        return [json.loads(entry) for entry in entries if entry]
+
+    async def _load(self, client: redis.Redis, provider_id: UUID) -> None:
+        """Fill the queue of a provider from the database (one query)."""
+        item_count = (
+            select(func.count(OrderItem.id))
+            .where(OrderItem.order_id == Order.id)
+            .scalar_subquery()
+        )
+        # Bounded by creation date: only the latest order partitions are scanned
+        created_after = datetime.now(timezone.utc) - timedelta(seconds=self.max_age_seconds)
+        async with get_read_db_context(self.LOAD_STATEMENT_TIMEOUT_MS, use_primary=True) as db:
+            result = await db.execute(
+                select(Order, item_count).where(
+                    Order.provider_id == provider_id,
+                    Order.status.in_(ACTIVE_STATUSES),
+                    Order.created_at >= created_after,
+                )
+            )
+            rows = result.all()
+            entries = [queue_entry(order, count, order.created_at) for order, count in rows]
+
+        queue_key, entries_key = self._keys(provider_id)
+        pipe = client.pipeline(transaction=True)
+        for entry in entries:
+            pipe.zadd(
+                queue_key,
+                {entry["id"]: datetime.fromisoformat(entry["created_at"]).timestamp()},
+                nx=True,
+            )
+            pipe.hsetnx(entries_key, entry["id"], json.dumps(entry))
+        pipe.set(self.LOADED_KEY.format(provider_id=provider_id), "1")
+        await pipe.execute()
+        logger.info(f"Loaded {len(entries)} active orders of provider {provider_id}")
+
+
+provider_order_queue = ProviderOrderQueue(
+    max_age_seconds=settings.provider_order_queue_max_age_seconds
+)
@@ -0,0 +1,257 @@
+"""Hourly and daily sales rollups of providers, for dashboards."""
+
+import logging
+from collections.abc import Mapping
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Optional
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.database import get_db_context
+from app.core.metrics import Counter
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+SALES_BUCKETS_REFRESHED = Counter(
+    "nelo_sales_rollup_buckets_total",
+    "Provider sales buckets recomputed by the rollup refresh",
+    ["granularity"],
+)
+
+WATERMARK_NAME = "provider_sales"
+
+# Longest range of each granularity, in days (bounds the points returned)
+MAX_RANGE_DAYS = {"hour": 7, "day": 366}
+
+ROLLUP_FIELDS = (
+    "orders_count",
+    "delivered_count",
+    "cancelled_count",
+    "sales_amount",
+    "gross_amount",
+    "prep_time_seconds",
+    "prep_count",
+)
+
+_UPSERT = f"""
+    ON CONFLICT (provider_id, bucket) DO UPDATE SET
+        {", ".join(f"{field} = EXCLUDED.{field}" for field in ROLLUP_FIELDS)},
+        updated_at = now()
+"""
+
+# Recomputes every hour (UTC) of a provider in which an order was updated
+# since :since. Orders of a bucket may already be archived: both tables are
+# read, each through its (provider_id, created_at) index.
+REFRESH_HOURLY = text(f"""
+    WITH changed AS (
+        SELECT DISTINCT provider_id,
+               date_trunc('hour', created_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' AS bucket
+        FROM orders.orders
+        WHERE updated_at > :since
+    ),
+    all_orders AS (
+        SELECT provider_id, created_at, status, subtotal, total, confirmed_at, ready_at
+        FROM orders.orders
+        UNION ALL
+        SELECT provider_id, created_at, status, subtotal, total, confirmed_at, ready_at
+        FROM orders.orders_archive
+    )
+    INSERT INTO orders.provider_sales_hourly (provider_id, bucket, {", ".join(ROLLUP_FIELDS)})
+    SELECT c.provider_id, c.bucket,
+           count(*),
+           count(*) FILTER (WHERE o.status = 'delivered'),
+           count(*) FILTER (WHERE o.status = 'cancelled'),
+           COALESCE(sum(o.subtotal) FILTER (WHERE o.status = 'delivered'), 0),
+           COALESCE(sum(o.total) FILTER (WHERE o.status = 'delivered'), 0),
+           COALESCE(sum(extract(epoch FROM o.ready_at - o.confirmed_at)), 0)::bigint,
+           count(o.ready_at - o.confirmed_at)
+    FROM changed c
+    JOIN all_orders o
+      ON o.provider_id = c.provider_id
+     AND o.created_at >= c.bucket
+     AND o.created_at < c.bucket + interval '1 hour'
+    GROUP BY c.provider_id, c.bucket
+    {_UPSERT}
+    RETURNING provider_id, (bucket AT TIME ZONE 'UTC')::date AS day
+""")
+
+# Recomputes the given (provider, UTC day) pairs from their hourly buckets
+REFRESH_DAILY = text(f"""
+    WITH days AS (
+        SELECT DISTINCT provider_id, day
+        FROM unnest(CAST(:provider_ids AS uuid[]), CAST(:days AS date[])) AS d(provider_id, day)
+    )
+    INSERT INTO orders.provider_sales_daily (provider_id, bucket, {", ".join(ROLLUP_FIELDS)})
+    SELECT d.provider_id, d.day,
+           {", ".join(f"sum(h.{field})" for field in ROLLUP_FIELDS)}
+    FROM days d
+    JOIN orders.provider_sales_hourly h
+      ON h.provider_id = d.provider_id
+     AND h.bucket >= d.day::timestamp AT TIME ZONE 'UTC'
+     AND h.bucket < (d.day + 1)::timestamp AT TIME ZONE 'UTC'
+    GROUP BY d.provider_id, d.day
+    {_UPSERT}
+""")
+
+
+class ProviderSalesRollup:
+    """
+    Keep the provider sales rollups up to date.
+
+    ``orders.provider_sales_hourly`` holds, per provider and hour (UTC) of
+    creation, the order counts, sales of delivered orders and preparation
+    times; ``orders.provider_sales_daily`` sums them per day.
+
+    Each refresh recomputes the buckets of the orders updated since the
+    watermark, minus ``overlap_seconds``: ``updated_at`` is set when a
+    transaction starts, so a transaction committing after the previous
+    refresh may carry an older timestamp. Buckets are recomputed from the
+    orders rather than incremented, so reading an order twice is harmless.
+
+    The watermark row is locked (SKIP LOCKED) for the refresh: concurrent
+    workers skip instead of computing the same buckets.
+    """
+
+    def __init__(self, overlap_seconds: int):
+        self.overlap = timedelta(seconds=overlap_seconds)
+
+    async def refresh(self) -> int:
+        """Recompute the buckets of recently updated orders. Returns the hours refreshed."""
+        async with get_db_context() as db:
+            row = (
+                await db.execute(
+                    text("""
+                        SELECT watermark, now() AS started_at
+                        FROM orders.rollup_watermarks
+                        WHERE name = :name
+                        FOR UPDATE SKIP LOCKED
+                    """),
+                    {"name": WATERMARK_NAME},
+                )
+            ).first()
+            if row is None:
+                logger.info("Provider sales refresh already running elsewhere")
+                return 0
+
+            result = await db.execute(REFRESH_HOURLY, {"since": row.watermark - self.overlap})
+            refreshed = result.all()
+            days = {(r.provider_id, r.day) for r in refreshed}
+            if days:
+                provider_ids, day_list = zip(*days)
+                await db.execute(
+                    REFRESH_DAILY,
+                    {"provider_ids": list(provider_ids), "days": list(day_list)},
+                )
+
+            await db.execute(
+                text("UPDATE orders.rollup_watermarks SET watermark = :watermark WHERE name = :name"),
+                {"watermark": row.started_at, "name": WATERMARK_NAME},
+            )
+
+        SALES_BUCKETS_REFRESHED.inc(len(refreshed), granularity="hour")
+        SALES_BUCKETS_REFRESHED.inc(len(days), granularity="day")
+        return len(refreshed)
+
+
+provider_sales_rollup = ProviderSalesRollup(overlap_seconds=settings.sales_rollup_overlap_seconds)
+
+
+def _report_point(row: Mapping[str, Any]) -> dict[str, Any]:
+    """Counters of a bucket (or of a whole range) with derived rates."""
+    return {
+        "orders_count": row["orders_count"],
+        "delivered_count": row["delivered_count"],
+        "cancelled_count": row["cancelled_count"],
+        "sales_amount": row["sales_amount"],
+        "gross_amount": row["gross_amount"],
+        "average_prep_time": (
+            round(row["prep_time_seconds"] / row["prep_count"] / 60, 1)
+            if row["prep_count"]
+            else None
+        ),
+        "cancellation_rate": (
+            round(100 * row["cancelled_count"] / row["orders_count"], 2)
+            if row["orders_count"]
+            else 0.0
+        ),
+    }
+
+
+class ProviderSalesService:
+    """Sales reports of one provider, or of all providers, read from the rollups."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_report(
+        self,
+        start: date,
+        end: date,
+        granularity: str = "day",
+        provider_id: Optional[UUID] = None,
+    ) -> dict[str, Any]:
+        """
+        Sales from ``start`` to ``end`` (inclusive, UTC days), one point per
+        hour or day that has orders (``bucket`` is its start), plus the
+        totals of the range.
+        """
+        if end < start:
+            raise ValueError("Periode invalide: la date de fin precede la date de debut")
+        if (end - start).days >= MAX_RANGE_DAYS[granularity]:
+            raise ValueError(
+                f"Periode trop longue: {MAX_RANGE_DAYS[granularity]} jours maximum "
+                f"par {'heure' if granularity == 'hour' else 'jour'}"
+            )
+
+        if granularity == "hour":
+            table = "provider_sales_hourly"
+            bounds: dict[str, date] = {
+                "start": datetime.combine(start, time(), timezone.utc),
+                "end": datetime.combine(end + timedelta(days=1), time(), timezone.utc),
+            }
+        else:
+            table = "provider_sales_daily"
+            bounds = {"start": start, "end": end + timedelta(days=1)}
+
+        provider_filter = "AND provider_id = :provider_id" if provider_id else ""
+        result = await self.db.execute(
+            text(f"""
+                SELECT bucket, {", ".join(f"sum({f})::bigint AS {f}" for f in ROLLUP_FIELDS)}
+                FROM orders.{table}
+                WHERE bucket >= :start AND bucket < :end {provider_filter}
+                GROUP BY bucket
+                ORDER BY bucket
+            """),
+            {**bounds, "provider_id": provider_id} if provider_id else bounds,
+        )
+        rows = [dict(row._mapping) for row in result]
+        totals = {field: sum(row[field] for row in rows) for field in ROLLUP_FIELDS}
+
+        refreshed_at = await self.db.scalar(
+            text("SELECT watermark FROM orders.rollup_watermarks WHERE name = :name"),
+            {"name": WATERMARK_NAME},
+        )
+
+        return {
+            "provider_id": provider_id,
+            "granularity": granularity,
+            "start": start,
+            "end": end,
+            "refreshed_at": refreshed_at,
+            "totals": _report_point(totals),
+            "points": [
+                {
+                    "bucket": (
+                        row["bucket"]
+                        if granularity == "hour"
+                        else datetime.combine(row["bucket"], time(), timezone.utc)
+                    ),
+                    **_report_point(row),
+                }
+                for row in rows
+            ],
+        }
@@ -0,0 +1,309 @@
+"""Denormalized order tracking documents in Redis."""
+
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any, Optional, cast
+from uuid import UUID
+
+from sqlalchemy import func, select
+
+from app.core.config import get_settings
+from app.core.database import get_read_db_context
+from app.core.metrics import Counter
+from app.core.redis import get_redis_context
+from app.modules.deliveries.models import Driver
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+ORDER_TRACKING_READS = Counter(
+    "nelo_order_tracking_reads_total",
+    "Order tracking reads, served from Redis (hit) or rebuilt from the database (miss)",
+    ["result"],
+)
+
+# Order status -> tracking timestamp set when the order reaches it
+STATUS_TIMESTAMPS = {
+    "confirmed": "confirmed_at",
+    "ready": "ready_at",
+    "picked_up": "picked_up_at",
+    "delivered": "delivered_at",
+}
+
+# Store a rebuilt document unless it already exists or was marked stale.
+STORE_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 1 or redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+# Patch a document in place. A missing document is marked stale instead, so
+# that a rebuild started before the change (and read before it committed)
+# is not stored. Order patches carry the order version: one already applied
+# is skipped, and an older one (handled late, after a newer change) drops
+# the document, which is rebuilt in order on the next read.
+# ARGV: ttl, stale ms, history entry ('' for none), delivery fields ('' for
+# none), order version ('' for none), then field/value pairs.
+PATCH_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    redis.call('SET', KEYS[2], '1', 'PX', ARGV[2])
+    return 0
+end
+if ARGV[5] ~= '' then
+    local current = tonumber(redis.call('HGET', KEYS[1], 'version') or '0')
+    local version = tonumber(ARGV[5])
+    if version == current then
+        return 0
+    end
+    if version < current then
+        redis.call('DEL', KEYS[1])
+        redis.call('SET', KEYS[2], '1', 'PX', ARGV[2])
+        return 0
+    end
+    redis.call('HSET', KEYS[1], 'version', ARGV[5])
+end
+for i = 6, #ARGV, 2 do
+    redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+if ARGV[3] ~= '' then
+    local history = redis.call('HGET', KEYS[1], 'status_history')
+    if not history or history == '[]' then
+        history = '[' .. ARGV[3] .. ']'
+    else
+        history = string.sub(history, 1, -2) .. ',' .. ARGV[3] .. ']'
+    end
+    redis.call('HSET', KEYS[1], 'status_history', history)
+end
+if ARGV[4] ~= '' then
+    local current = redis.call('HGET', KEYS[1], 'delivery')
+    local delivery = {}
+    if current and current ~= 'null' then
+        delivery = cjson.decode(current)
+    end
+    for field, value in pairs(cjson.decode(ARGV[4])) do
+        delivery[field] = value
+    end
+    redis.call('HSET', KEYS[1], 'delivery', cjson.encode(delivery))
+end
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+
+def _encode(value: Any) -> str:
+    return json.dumps(value, default=str)
+
+
+class OrderTrackingStore:
+    """
+    Tracking document of each order, kept in a Redis hash.
+
+    The document is ``OrderService.get_order_tracking()`` with one JSON value
+    per field: a tracking read is a single HGETALL. Order and delivery events
+    patch it in place; when it is missing (new, expired or evicted) it is
+    rebuilt from the primary database on the next read.
+
+    Events are handled once their transaction commits, so patches only carry
+    committed changes. A rebuild may still have read the order before that
+    commit: an event finding no document marks the order stale for
+    ``STALE_MS``, during which rebuilt documents are served but not stored.
+    Events of different transactions (or processes) may be handled out of
+    order: order patches only apply over an older ``version``.
+    """
+
+    KEY = "order_tracking:{order_id}"
+    STALE_KEY = "order_tracking:{order_id}:stale"
+    STALE_MS = 5000
+    REBUILD_STATEMENT_TIMEOUT_MS = 2000
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+
+    def _keys(self, order_id: UUID | str) -> list[str]:
+        return [
+            self.KEY.format(order_id=order_id),
+            self.STALE_KEY.format(order_id=order_id),
+        ]
+
+    # -------------------------------------------------------------------------
+    # Reads
+    # -------------------------------------------------------------------------
+
+    async def get(self, order_id: UUID | str) -> Optional[dict[str, Any]]:
+        """Stored document, or None if missing (or Redis is unavailable)."""
+        try:
+            async with get_redis_context() as client:
+                # decode_responses: field names and values are str
+                fields = cast(
+                    dict[str, str], await client.hgetall(self.KEY.format(order_id=order_id))
+                )
+        except Exception as e:
+            logger.warning(f"Order tracking store unavailable: {e}")
+            return None
+        if not fields:
+            return None
+        return {name: json.loads(value) for name, value in fields.items()}
+
+    async def load(self, order_id: UUID) -> dict[str, Any]:
+        """
+        Tracking document of an order, rebuilt from the database on a miss.
+
+        Raises:
+            ValueError: If the order does not exist
+        """
+        document = await self.get(order_id)
+        if document is not None:
+            ORDER_TRACKING_READS.inc(result="hit")
+            return document
+
+        ORDER_TRACKING_READS.inc(result="miss")
+        # Imported here: the orders service imports the event bus, whose
+        # handlers import this store
+        from app.modules.orders.service import OrderService
+
+        async with get_read_db_context(
+            self.REBUILD_STATEMENT_TIMEOUT_MS, use_primary=True
+        ) as db:
+            document = await OrderService(db).get_order_tracking(order_id)
+        await self.save(order_id, document)
+        return document
+
+    async def save(self, order_id: UUID | str, document: dict[str, Any]) -> None:
+        """Store a rebuilt document (unless one exists or the order is stale)."""
+        args: list[Any] = [self.ttl_seconds]
+        for name, value in document.items():
+            args.extend((name, _encode(value)))
+        try:
+            async with get_redis_context() as client:
+                script = client.register_script(STORE_SCRIPT)
+                await script(keys=self._keys(order_id), args=args)
+        except Exception as e:
+            logger.warning(f"Could not store tracking of order {order_id}: {e}")
+
+    # -------------------------------------------------------------------------
+    # Updates
+    # -------------------------------------------------------------------------
+
+    def _patch_args(
+        self,
+        fields: dict[str, Any],
+        history_entry: Optional[dict[str, Any]] = None,
+        delivery: Optional[dict[str, Any]] = None,
+        version: Optional[int] = None,
+    ) -> list[Any]:
+        args: list[Any] = [
+            self.ttl_seconds,
+            self.STALE_MS,
+            _encode(history_entry) if history_entry else "",
+            _encode(delivery) if delivery else "",
+            version if version is not None else "",
+        ]
+        for name, value in fields.items():
+            args.extend((name, _encode(value)))
+        return args
+
+    async def _patch(
+        self,
+        order_id: UUID | str,
+        fields: dict[str, Any],
+        history_entry: Optional[dict[str, Any]] = None,
+        delivery: Optional[dict[str, Any]] = None,
+        version: Optional[int] = None,
+    ) -> None:
+        async with get_redis_context() as client:
+            script = client.register_script(PATCH_SCRIPT)
+            await script(
+                keys=self._keys(order_id),
+                args=self._patch_args(fields, history_entry, delivery, version),
+            )
+
+    async def invalidate(self, order_id: UUID | str) -> None:
+        """Drop a document that cannot be patched from an event (rebuilt on read)."""
+        doc_key, stale_key = self._keys(order_id)
+        async with get_redis_context() as client:
+            pipe = client.pipeline(transaction=True)
+            pipe.delete(doc_key)
+            pipe.set(stale_key, "1", px=self.STALE_MS)
+            await pipe.execute()
+
+    @staticmethod
+    def _order_status_fields(data: dict[str, Any]) -> dict[str, Any]:
+        status = data["to_status"]
+        fields: dict[str, Any] = {"status": status}
+        if data.get("estimated_prep_time") is not None:
+            fields["estimated_prep_time"] = data["estimated_prep_time"]
+        changed_at = data.get("changed_at") or datetime.now(timezone.utc).isoformat()
+        if status in STATUS_TIMESTAMPS:
+            fields[STATUS_TIMESTAMPS[status]] = changed_at
+        return fields
+
+    async def apply_order_status(self, data: dict[str, Any]) -> None:
+        """Apply an order status event (``order.<status>``)."""
+        await self._patch(
+            data["order_id"],
+            self._order_status_fields(data),
+            history_entry=data.get("history_entry"),
+            version=data.get("version"),
+        )
+
+    async def apply_order_statuses(self, items: list[dict[str, Any]]) -> None:
+        """Apply the status events of several orders in one round trip."""
+        async with get_redis_context() as client:
+            script = client.register_script(PATCH_SCRIPT)
+            pipe = client.pipeline(transaction=False)
+            for data in items:
+                await script(
+                    keys=self._keys(data["order_id"]),
+                    args=self._patch_args(
+                        self._order_status_fields(data),
+                        history_entry=data.get("history_entry"),
+                        version=data.get("version"),
+                    ),
+                    client=pipe,
+                )
+            await pipe.execute()
+
+    async def apply_delivery_status(self, data: dict[str, Any]) -> None:
+        """Apply a delivery status event (``delivery.<status>``)."""
+        delivery: dict[str, Any] = {"status": data["status"]}
+        if data.get("eta_minutes") is not None:
+            delivery["eta_minutes"] = data["eta_minutes"]
+        if data.get("driver_id") and data["status"] == "accepted":
+            delivery["driver"] = await self._driver_info(UUID(data["driver_id"]))
+        await self._patch(data["order_id"], {}, delivery=delivery)
+
+    @staticmethod
+    async def _driver_info(driver_id: UUID) -> Optional[dict[str, Any]]:
+        """Driver fields of the tracking document (the driver row is already committed)."""
+        async with get_read_db_context() as db:
+            result = await db.execute(
+                select(
+                    # Same as the rebuilt document (OrderService._get_delivery_info)
+                    func.coalesce(
+                        func.nullif(Driver.display_name, ""),
+                        Driver.first_name + " " + Driver.last_name,
+                    ).label("name"),
+                    Driver.phone,
+                    Driver.avatar_url,
+                    Driver.vehicle_type,
+                    Driver.vehicle_plate,
+                ).where(Driver.id == driver_id)
+            )
+            row = result.one_or_none()
+        if row is None:
+            return None
+        return {
+            "id": str(driver_id),
+            "name": row.name,
+            "phone": row.phone,
+            "avatar_url": row.avatar_url,
+            "vehicle_type": row.vehicle_type,
+            "vehicle_plate": row.vehicle_plate,
+        }
+
+
+order_tracking_store = OrderTrackingStore(ttl_seconds=settings.order_tracking_ttl_seconds)
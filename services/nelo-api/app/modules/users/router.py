@@ -6,8 +6,8 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db_session
-from app.modules.auth.dependencies import CurrentUser
+from app.core.database import get_db_session, read_only_session
+from app.modules.auth.dependencies import CurrentPrincipal
 from app.modules.users.schemas import (
     AddressCreate,
     AddressListResponse,
@@ -28,7 +28,19 @@ def get_user_service(
     return UserService(db)
 
 
+def get_user_read_service(
+    db: Annotated[AsyncSession, Depends(read_only_session(use_primary=True))],
+) -> UserService:
+    """
+    Dependency to get user service on a read-only session.
+
+    Stays on the primary: addresses are listed right after being edited.
+    """
+    return UserService(db)
+
+
 UserServiceDep = Annotated[UserService, Depends(get_user_service)]
+UserReadServiceDep = Annotated[UserService, Depends(get_user_read_service)]
 
 
 # =============================================================================
@@ -42,7 +54,7 @@ UserServiceDep = Annotated[UserService, Depends(get_user_service)]
     description="Récupère le profil de l'utilisateur connecté.",
 )
 async def get_my_profile(
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     user_service: UserServiceDep,
 ) -> ProfileResponse:
     """Get current user's profile."""
@@ -67,7 +79,7 @@ async def get_my_profile(
 )
 async def update_my_profile(
     request: ProfileUpdate,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     user_service: UserServiceDep,
 ) -> ProfileResponse:
     """Update current user's profile."""
@@ -107,8 +119,8 @@ async def update_my_profile(
     description="Liste toutes les adresses de l'utilisateur connecté.",
 )
 async def get_my_addresses(
-    current_user: CurrentUser,
-    user_service: UserServiceDep,
+    current_user: CurrentPrincipal,
+    user_service: UserReadServiceDep,
 ) -> AddressListResponse:
     """Get all addresses for current user."""
     addresses = await user_service.get_addresses(current_user.id)
@@ -127,7 +139,7 @@ async def get_my_addresses(
 )
 async def create_address(
     request: AddressCreate,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     user_service: UserServiceDep,
 ) -> AddressResponse:
     """Create a new address."""
@@ -166,8 +178,8 @@ async def create_address(
 )
 async def get_address(
     address_id: UUID,
-    current_user: CurrentUser,
-    user_service: UserServiceDep,
+    current_user: CurrentPrincipal,
+    user_service: UserReadServiceDep,
 ) -> AddressResponse:
     """Get a specific address."""
     address = await user_service.get_address(current_user.id, address_id)
@@ -188,7 +200,7 @@ async def get_address(
 async def update_address(
     address_id: UUID,
     request: AddressUpdate,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     user_service: UserServiceDep,
 ) -> AddressResponse:
     """Update an address."""
@@ -225,7 +237,7 @@ async def update_address(
 )
 async def delete_address(
     address_id: UUID,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     user_service: UserServiceDep,
 ) -> None:
     """Delete an address."""
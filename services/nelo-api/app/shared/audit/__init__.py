@@ -0,0 +1,4 @@
+"""Batched audit log."""
+from app.shared.audit.writer import AuditRecord, AuditWriter, audit_writer
+
+__all__ = ["AuditRecord", "AuditWriter", "audit_writer"]
@@ -0,0 +1,190 @@
+"""
+Batched audit log writer.
+
+Audit records are queued in memory and written to ``auth.audit_logs`` by a
+background task, with one multi-row INSERT per batch, instead of adding an
+insert to every sensitive request.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, cast
+from uuid import UUID
+
+from sqlalchemy import Table, event, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session as OrmSession
+
+from app.core.config import get_settings
+from app.core.database import get_db_context
+from app.core.metrics import Counter, Gauge, Histogram
+from app.core.middleware import current_client_ip
+from app.modules.auth.models import AuditLog
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+AUDIT_BACKLOG = Gauge("nelo_audit_backlog", "Audit records waiting to be written")
+AUDIT_WRITTEN = Counter("nelo_audit_records_written_total", "Audit records written")
+AUDIT_DROPPED = Counter(
+    "nelo_audit_records_dropped_total",
+    "Audit records dropped (backlog full, or unwritten at shutdown)",
+)
+AUDIT_FLUSH_SECONDS = Histogram(
+    "nelo_audit_flush_duration_seconds", "Time to write one batch of audit records"
+)
+AUDIT_FLUSH_ERRORS = Counter("nelo_audit_flush_errors_total", "Audit batches that failed")
+
+# Records of a session's transaction, queued once it commits
+SESSION_RECORDS_KEY = "audit_records"
+
+
+@dataclass
+class AuditRecord:
+    """One row of ``auth.audit_logs``."""
+
+    action: str
+    user_id: UUID | None = None
+    resource_type: str | None = None
+    resource_id: UUID | None = None
+    ip_address: str | None = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class AuditWriter:
+    """
+    Queue audit records and write them in batches.
+
+    A batch is written every ``flush_interval`` seconds, or as soon as
+    ``batch_size`` records are waiting. Failed batches stay queued for the
+    next flush. ``stop()`` writes whatever is left, so records survive a
+    graceful shutdown. Beyond ``max_backlog`` waiting records new ones are
+    dropped (and counted).
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float, max_backlog: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_backlog = max_backlog
+        self._queue: deque[AuditRecord] = deque()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task: asyncio.Task[None] | None = None
+        AUDIT_BACKLOG.set_function(lambda: len(self._queue))
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def record(
+        self,
+        action: str,
+        *,
+        user_id: UUID | None = None,
+        resource_type: str | None = None,
+        resource_id: UUID | None = None,
+        ip_address: str | None = None,
+        session: AsyncSession | None = None,
+    ) -> None:
+        """
+        Queue an audit record (never blocks).
+
+        With a ``session``, the record is only queued if the session's
+        transaction commits. The IP address defaults to the current
+        request's client.
+        """
+        record = AuditRecord(
+            action=action,
+            user_id=user_id,
+            resource_type=resource_type,
+            resource_id=resource_id,
+            ip_address=ip_address or current_client_ip(),
+        )
+        if session is not None:
+            session.info.setdefault(SESSION_RECORDS_KEY, []).append(record)
+        else:
+            self.enqueue(record)
+
+    def enqueue(self, record: AuditRecord) -> None:
+        if len(self._queue) >= self.max_backlog:
+            AUDIT_DROPPED.inc()
+            return
+        self._queue.append(record)
+        if len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self) -> None:
+        """Write all queued records, stopping at the first failed batch."""
+        while self._queue:
+            batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            start = time.perf_counter()
+            try:
+                await self._write(batch)
+            except Exception as e:
+                # Keep the batch, in order, for the next flush
+                self._queue.extendleft(reversed(batch))
+                AUDIT_FLUSH_ERRORS.inc()
+                logger.warning(f"Could not write {len(batch)} audit records: {e}")
+                return
+            AUDIT_FLUSH_SECONDS.observe(time.perf_counter() - start)
+            AUDIT_WRITTEN.inc(len(batch))
+
+    async def _write(self, batch: list[AuditRecord]) -> None:
+        rows: list[dict[str, Any]] = [asdict(record) for record in batch]
+        async with get_db_context() as session:
+            await session.execute(insert(cast(Table, AuditLog.__table__)), rows)
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self) -> None:
+        """Start the background writer (call from the event loop)."""
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background writer and write the remaining records."""
+        if self._task is not None:
+            # Let an in-progress batch finish rather than cancelling it
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+        if self._queue:
+            AUDIT_DROPPED.inc(len(self._queue))
+            logger.error(f"{len(self._queue)} audit records lost at shutdown")
+            self._queue.clear()
+
+
+audit_writer = AuditWriter(
+    batch_size=settings.audit_batch_size,
+    flush_interval=settings.audit_flush_interval_ms / 1000,
+    max_backlog=settings.audit_max_backlog,
+)
+
+
+# =============================================================================
+# Transaction-bound records
+# =============================================================================
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _enqueue_committed_records(session: OrmSession) -> None:
+    for record in session.info.pop(SESSION_RECORDS_KEY, ()):
+        audit_writer.enqueue(record)
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _discard_rolled_back_records(session: OrmSession) -> None:
+    session.info.pop(SESSION_RECORDS_KEY, None)
@@ -5,16 +5,39 @@ This will be replaced by RabbitMQ in Phase 2.
 
 import asyncio
 import logging
+import time
 from collections.abc import Awaitable, Callable
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from typing import Any
 from uuid import UUID, uuid4
 
+from sqlalchemy import event as orm_event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session as OrmSession
+
+from app.core.metrics import Counter, Gauge, Histogram
+
 logger = logging.getLogger(__name__)
 
+EVENTS_PUBLISHED = Counter(
+    "nelo_events_published_total", "Events published on the bus", ["event"]
+)
+EVENT_HANDLER_SECONDS = Histogram(
+    "nelo_event_handler_duration_seconds", "Event handler execution time", ["event"]
+)
+EVENT_HANDLER_ERRORS = Counter(
+    "nelo_event_handler_errors_total", "Event handlers that raised", ["event"]
+)
+EVENT_HANDLERS_IN_FLIGHT = Gauge(
+    "nelo_event_handlers_in_flight", "Event handlers currently running"
+)
+
 EventHandler = Callable[[dict[str, Any]], Awaitable[None]]
 
+# Session.info key of the events waiting for the transaction to commit
+SESSION_EVENTS_KEY = "event_bus_events"
+
 
 @dataclass
 class Event:
@@ -42,6 +65,7 @@ class EventBus:
     """
 
     _handlers: dict[str, list[EventHandler]] = {}
+    _deferred: set[asyncio.Task[None]] = set()
 
     @classmethod
     def subscribe(cls, event_name: str, handler: EventHandler) -> None:
@@ -61,9 +85,20 @@ class EventBus:
                 pass
 
     @classmethod
-    async def publish(cls, event: Event) -> None:
-        """Publish an event to all subscribed handlers."""
+    async def publish(cls, event: Event, session: AsyncSession | None = None) -> None:
+        """
+        Publish an event to all subscribed handlers.
+
+        With a ``session``, the event describes changes made in its
+        transaction: handlers run once it commits (in publishing order),
+        and never if it is rolled back.
+        """
+        if session is not None:
+            session.info.setdefault(SESSION_EVENTS_KEY, []).append(event)
+            return
+
         handlers = cls._handlers.get(event.name, [])
+        EVENTS_PUBLISHED.inc(event=event.name)
 
         if not handlers:
             logger.debug(f"No handlers for event '{event.name}'")
@@ -78,15 +113,49 @@ class EventBus:
     @classmethod
     async def _safe_execute(cls, handler: EventHandler, event: Event) -> None:
         """Execute handler with error handling."""
+        EVENT_HANDLERS_IN_FLIGHT.inc()
+        start = time.perf_counter()
         try:
             await handler(event.data)
         except Exception as e:
+            EVENT_HANDLER_ERRORS.inc(event=event.name)
             logger.error(
                 f"Error in handler for event '{event.name}': {e}",
                 exc_info=True,
             )
+        finally:
+            EVENT_HANDLERS_IN_FLIGHT.dec()
+            EVENT_HANDLER_SECONDS.observe(time.perf_counter() - start, event=event.name)
+
+    @classmethod
+    def _publish_committed(cls, events: list[Event]) -> None:
+        async def publish_all() -> None:
+            for event in events:
+                await cls.publish(event)
+
+        task = asyncio.get_running_loop().create_task(publish_all())
+        cls._deferred.add(task)
+        task.add_done_callback(cls._deferred.discard)
+
+    @classmethod
+    async def drain(cls) -> None:
+        """Wait for the events of committed transactions to be handled."""
+        while cls._deferred:
+            await asyncio.gather(*cls._deferred)
 
     @classmethod
     def clear(cls) -> None:
         """Clear all handlers (useful for testing)."""
         cls._handlers.clear()
+
+
+@orm_event.listens_for(OrmSession, "after_commit")
+def _publish_committed_events(session: OrmSession) -> None:
+    events = session.info.pop(SESSION_EVENTS_KEY, None)
+    if events:
+        EventBus._publish_committed(events)
+
+
+@orm_event.listens_for(OrmSession, "after_rollback")
+def _discard_rolled_back_events(session: OrmSession) -> None:
+    session.info.pop(SESSION_EVENTS_KEY, None)
@@ -1,13 +1,37 @@
 """
 Event handlers for order and delivery events.
-These handlers connect the EventBus to the notification service.
+These handlers connect the EventBus to the notification service and timers:
+slow work (notifications, timers) runs as jobs on the workers.
 """
 
+import asyncio
 import logging
+from datetime import datetime
 from typing import Any
 from uuid import UUID
 
-from app.shared.events.event_bus import EventBus
+from app.core.config import get_settings
+from app.modules.deliveries.models import DeliveryStatus
+from app.modules.orders.models import OrderStatus
+from app.modules.orders.services.provider_queue import provider_order_queue
+from app.modules.orders.services.tracking_store import order_tracking_store
+from app.shared.events.event_bus import EventBus, EventHandler
+from app.shared.jobs.handlers import (
+    DELIVERY_REDISPATCH,
+    NOTIFY_OFFER_EXPIRED,
+    NOTIFY_ORDER_STATUS,
+    ORDER_AUTO_CANCEL,
+    ORDER_PREPARATION_LATE,
+    redispatch_job_id,
+)
+from app.shared.jobs.scheduler import job_scheduler
+from app.shared.realtime.tracking import (
+    publish_delivery_update,
+    publish_order_update,
+    publish_order_updates,
+)
+
+settings = get_settings()
 
 logger = logging.getLogger(__name__)
 
@@ -24,11 +48,17 @@ async def handle_order_created(data: dict[str, Any]) -> None:
         extra={"event": "order.created", "data": data},
     )
 
-    # In production, this would:
-    # 1. Get NotificationService from dependency container
-    # 2. Notify customer that order was created
-    # 3. Notify provider of new order
-    # 4. Start timer for auto-cancellation if not confirmed
+    # Notify customer and provider of new order
+    await job_scheduler.enqueue(
+        NOTIFY_ORDER_STATUS, {"order_id": data["order_id"], "status": "pending"}
+    )
+
+    # Auto-cancel if not confirmed in time
+    await job_scheduler.schedule_in(
+        ORDER_AUTO_CANCEL,
+        settings.order_confirmation_timeout_seconds,
+        {"order_id": data["order_id"]},
+    )
 
 
 async def handle_order_confirmed(data: dict[str, Any]) -> None:
@@ -39,7 +69,18 @@ async def handle_order_confirmed(data: dict[str, Any]) -> None:
     )
 
     # Notify customer that order was confirmed
+    await job_scheduler.enqueue(
+        NOTIFY_ORDER_STATUS, {"order_id": data["order_id"], "status": "confirmed"}
+    )
+
     # Start preparation timer
+    await job_scheduler.cancel(f"{ORDER_AUTO_CANCEL}:{data['order_id']}")
+    prep_minutes = data.get("estimated_prep_time") or 30
+    await job_scheduler.schedule_in(
+        ORDER_PREPARATION_LATE,
+        prep_minutes * 60 + settings.order_preparation_grace_seconds,
+        {"order_id": data["order_id"]},
+    )
 
 
 async def handle_order_ready(data: dict[str, Any]) -> None:
@@ -51,6 +92,11 @@ async def handle_order_ready(data: dict[str, Any]) -> None:
 
     # Notify customer that order is ready
     # Trigger driver matching if not already assigned
+    await job_scheduler.enqueue(
+        NOTIFY_ORDER_STATUS, {"order_id": data["order_id"], "status": "ready"}
+    )
+
+    await job_scheduler.cancel(f"{ORDER_PREPARATION_LATE}:{data['order_id']}")
 
 
 async def handle_order_cancelled(data: dict[str, Any]) -> None:
@@ -62,7 +108,13 @@ async def handle_order_cancelled(data: dict[str, Any]) -> None:
 
     # Notify customer of cancellation
     # If driver assigned, notify driver
-    # Process refund if applicable
+    # Process refund if applicable (as a job, once payments are implemented)
+    await job_scheduler.enqueue(
+        NOTIFY_ORDER_STATUS, {"order_id": data["order_id"], "status": "cancelled"}
+    )
+
+    await job_scheduler.cancel(f"{ORDER_AUTO_CANCEL}:{data['order_id']}")
+    await job_scheduler.cancel(f"{ORDER_PREPARATION_LATE}:{data['order_id']}")
 
 
 async def handle_order_delivered(data: dict[str, Any]) -> None:
@@ -74,7 +126,10 @@ async def handle_order_delivered(data: dict[str, Any]) -> None:
 
     # Notify customer of delivery
     # Request rating
-    # Process payment to provider and driver
+    # Process payment to provider and driver (as a job, once payments are implemented)
+    await job_scheduler.enqueue(
+        NOTIFY_ORDER_STATUS, {"order_id": data["order_id"], "status": "delivered"}
+    )
 
 
 # =============================================================================
@@ -92,6 +147,8 @@ async def handle_delivery_assigned(data: dict[str, Any]) -> None:
     # Notify customer that driver was assigned
     # Notify driver of assignment confirmation
 
+    await job_scheduler.cancel(redispatch_job_id(data["delivery_id"]))
+
 
 async def handle_delivery_picked_up(data: dict[str, Any]) -> None:
     """Handle delivery.picked_up event."""
@@ -127,6 +184,27 @@ async def handle_delivery_failed(data: dict[str, Any]) -> None:
     # Process refund or reschedule
 
 
+async def handle_delivery_offers_sent(data: dict[str, Any]) -> None:
+    """Handle delivery.offers_sent event."""
+    logger.info(
+        f"Offers sent for delivery {data.get('delivery_id')} "
+        f"(round {data.get('dispatch_round')})",
+        extra={"event": "delivery.offers_sent", "data": data},
+    )
+
+    # Offer the delivery to the next drivers if nobody accepts in time
+    await job_scheduler.schedule(
+        DELIVERY_REDISPATCH,
+        datetime.fromisoformat(data["expires_at"]),
+        {
+            "delivery_id": data["delivery_id"],
+            "order_value": data.get("order_value", 0),
+            "dispatch_round": data.get("dispatch_round", 1),
+        },
+        job_id=redispatch_job_id(data["delivery_id"]),
+    )
+
+
 # =============================================================================
 # Driver Event Handlers
 # =============================================================================
@@ -149,8 +227,10 @@ async def handle_driver_offer_expired(data: dict[str, Any]) -> None:
         extra={"event": "driver.offer_expired", "data": data},
     )
 
-    # Notify driver that offer expired
-    # Try next driver in queue
+    # Notify driver that offer expired (the next drivers are offered the
+    # delivery by the re-dispatch job)
+    if data.get("driver_id"):
+        await job_scheduler.enqueue(NOTIFY_OFFER_EXPIRED, {"driver_id": data["driver_id"]})
 
 
 # =============================================================================
@@ -158,6 +238,104 @@ async def handle_driver_offer_expired(data: dict[str, Any]) -> None:
 # =============================================================================
 
 
+# =============================================================================
+# Live Tracking
+# =============================================================================
+
+
+def order_tracking_publisher(event_name: str) -> EventHandler:
+    """Handler pushing an order event to its live tracking streams."""
+
+    async def handler(data: dict[str, Any]) -> None:
+        await publish_order_update(event_name, data)
+
+    return handler
+
+
+def delivery_tracking_publisher(event_name: str) -> EventHandler:
+    """Handler pushing a delivery event to its live tracking streams."""
+
+    async def handler(data: dict[str, Any]) -> None:
+        await publish_delivery_update(event_name, data)
+
+    return handler
+
+
+async def handle_order_tracking_update(data: dict[str, Any]) -> None:
+    """Apply an order status change to the order's tracking document."""
+    await order_tracking_store.apply_order_status(data)
+
+
+async def handle_delivery_tracking_update(data: dict[str, Any]) -> None:
+    """Apply a delivery status change to the order's tracking document."""
+    await order_tracking_store.apply_delivery_status(data)
+
+
+async def handle_delivery_created_tracking(data: dict[str, Any]) -> None:
+    """Rebuild the order's tracking document with its new delivery."""
+    await order_tracking_store.invalidate(data["order_id"])
+
+
+# =============================================================================
+# Provider Order Queue
+# =============================================================================
+
+
+async def handle_provider_queue_created(data: dict[str, Any]) -> None:
+    """Add a new order to its provider's live queue."""
+    if data.get("queue_entry"):
+        await provider_order_queue.add(data["provider_id"], data["queue_entry"])
+
+
+async def handle_provider_queue_update(data: dict[str, Any]) -> None:
+    """Apply an order status change to its provider's live queue."""
+    if not data.get("provider_id"):
+        return
+    changes = {}
+    if data.get("estimated_prep_time") is not None:
+        changes["estimated_prep_time"] = data["estimated_prep_time"]
+    await provider_order_queue.update(
+        data["provider_id"], data["order_id"], data["to_status"], changes
+    )
+
+
+# =============================================================================
+# Batched Order Events
+# =============================================================================
+
+
+def order_batch_handler(handler: EventHandler) -> EventHandler:
+    """Handler running a per-order ``handler`` for each order of a batch event."""
+
+    async def batch_handler(data: dict[str, Any]) -> None:
+        await asyncio.gather(*(handler(order) for order in data["orders"]))
+
+    return batch_handler
+
+
+async def handle_order_status_batch(data: dict[str, Any]) -> None:
+    """
+    Apply a batch of status changes (``order.<status>.batch``) to tracking
+    documents, the provider's live queue and live streams, one Redis round
+    trip each.
+    """
+    orders = data["orders"]
+    await order_tracking_store.apply_order_statuses(orders)
+    await provider_order_queue.update_many(
+        data["provider_id"],
+        data["to_status"],
+        {
+            order["order_id"]: (
+                {"estimated_prep_time": order["estimated_prep_time"]}
+                if order.get("estimated_prep_time") is not None
+                else {}
+            )
+            for order in orders
+        },
+    )
+    await publish_order_updates(f"order.{data['to_status']}", orders)
+
+
 def register_event_handlers() -> None:
     """Register all event handlers with the EventBus."""
     # Order events
@@ -172,9 +350,32 @@ def register_event_handlers() -> None:
     EventBus.subscribe("delivery.picked_up", handle_delivery_picked_up)
     EventBus.subscribe("delivery.completed", handle_delivery_completed)
     EventBus.subscribe("delivery.failed", handle_delivery_failed)
+    EventBus.subscribe("delivery.offers_sent", handle_delivery_offers_sent)
 
     # Driver events
     EventBus.subscribe("driver.offer_sent", handle_driver_offer_sent)
     EventBus.subscribe("driver.offer_expired", handle_driver_offer_expired)
 
+    # Live tracking streams and tracking documents
+    for order_status in OrderStatus:
+        event_name = f"order.{order_status.value}"
+        EventBus.subscribe(event_name, order_tracking_publisher(event_name))
+        EventBus.subscribe(event_name, handle_order_tracking_update)
+        EventBus.subscribe(event_name, handle_provider_queue_update)
+    for delivery_status in DeliveryStatus:
+        event_name = f"delivery.{delivery_status.value}"
+        EventBus.subscribe(event_name, delivery_tracking_publisher(event_name))
+        EventBus.subscribe(event_name, handle_delivery_tracking_update)
+    EventBus.subscribe("delivery.created", handle_delivery_created_tracking)
+
+    # Provider order queues
+    EventBus.subscribe("order.created", handle_provider_queue_created)
+
+    # Batched order status changes (bulk provider actions)
+    EventBus.subscribe("order.confirmed.batch", order_batch_handler(handle_order_confirmed))
+    EventBus.subscribe("order.ready.batch", order_batch_handler(handle_order_ready))
+    EventBus.subscribe("order.cancelled.batch", order_batch_handler(handle_order_cancelled))
+    for order_status in OrderStatus:
+        EventBus.subscribe(f"order.{order_status.value}.batch", handle_order_status_batch)
+
     logger.info("Event handlers registered successfully")
@@ -0,0 +1,11 @@
+"""Delayed jobs (Redis sorted set scheduler)."""
+from app.shared.jobs.scheduler import Job, JobScheduler, job_scheduler
+from app.shared.jobs.handlers import register_job_handlers, schedule_maintenance_jobs
+
+__all__ = [
+    "Job",
+    "JobScheduler",
+    "job_scheduler",
+    "register_job_handlers",
+    "schedule_maintenance_jobs",
+]
@@ -0,0 +1,289 @@
+"""
+Job handlers for the order and delivery lifecycles.
+Jobs are scheduled or enqueued by the event handlers and run by the workers
+(``python -m app.worker``).
+"""
+
+import logging
+from typing import Any
+from uuid import UUID
+
+from app.core.config import get_settings
+from app.core.database import get_db_context
+from app.core.redis import get_redis_context
+from app.modules.deliveries.models import DeliveryStatus
+from app.modules.orders.models import OrderStatus
+from app.shared.jobs.scheduler import job_scheduler
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Services and the event bus are imported in the jobs: the event handlers
+# schedule these jobs, and import this module.
+
+ORDER_AUTO_CANCEL = "order.auto_cancel"
+ORDER_PREPARATION_LATE = "order.preparation_late"
+DELIVERY_REDISPATCH = "delivery.redispatch"
+NOTIFY_ORDER_STATUS = "notifications.order_status"
+NOTIFY_OFFER_EXPIRED = "notifications.offer_expired"
+ORDER_PARTITION_MAINTENANCE = "order.partition_maintenance"
+AGGREGATE_RECONCILIATION = "order.aggregate_reconciliation"
+SALES_ROLLUP_REFRESH = "order.sales_rollup_refresh"
+
+# Share of the job timeout spent archiving (or reconciling) per maintenance run
+MAINTENANCE_TIME_BUDGET = 0.5
+# Delay before the next run while closed orders are left to archive (or rows to reconcile)
+MAINTENANCE_BACKLOG_DELAY_SECONDS = 60
+# Delay before a maintenance run that failed (or whose worker died) runs again
+MAINTENANCE_RETRY_DELAY_SECONDS = 300
+
+
+def redispatch_job_id(delivery_id: str) -> str:
+    return f"{DELIVERY_REDISPATCH}:{delivery_id}"
+
+
+# =============================================================================
+# Order Jobs
+# =============================================================================
+
+
+async def auto_cancel_order(data: dict[str, Any]) -> None:
+    """Cancel an order the provider has not confirmed in time."""
+    from app.modules.orders.service import OrderService
+
+    async with get_db_context() as db:
+        service = OrderService(db)
+        order = await service.get_order(UUID(data["order_id"]))
+        if not order or order.status != OrderStatus.PENDING.value:
+            return
+
+        await service.update_order_status(
+            order.id,
+            OrderStatus.CANCELLED,
+            changed_by=None,
+            reason="Commande non confirmee par le prestataire",
+        )
+        logger.info(f"Order auto-cancelled: {order.reference}")
+
+
+async def alert_late_preparation(data: dict[str, Any]) -> None:
+    """Alert when an order is still being prepared past its estimated time."""
+    from app.modules.orders.service import OrderService
+    from app.shared.events.event_bus import Event, EventBus
+
+    async with get_db_context() as db:
+        order = await OrderService(db).get_order(UUID(data["order_id"]))
+        if not order or order.status not in (
+            OrderStatus.CONFIRMED.value,
+            OrderStatus.PREPARING.value,
+        ):
+            return
+
+    logger.warning(f"Order preparation late: {order.reference}")
+    await EventBus.publish(Event(
+        name="order.preparation_late",
+        data={
+            "order_id": str(order.id),
+            "reference": order.reference,
+            "provider_id": str(order.provider_id),
+        }
+    ))
+
+
+# =============================================================================
+# Delivery Jobs
+# =============================================================================
+
+
+async def redispatch_delivery(data: dict[str, Any]) -> None:
+    """Expire unanswered offers and offer the delivery to the next drivers."""
+    from app.modules.deliveries.service import DeliveryService
+    from app.shared.events.event_bus import Event, EventBus
+
+    delivery_id = UUID(data["delivery_id"])
+    dispatch_round = int(data.get("dispatch_round", 1))
+
+    async with get_db_context() as db:
+        service = DeliveryService(db)
+        delivery = await service.get_delivery(delivery_id)
+        if not delivery or delivery.status != DeliveryStatus.PENDING.value:
+            return
+
+        for offer in await service.expire_pending_offers(delivery_id):
+            await EventBus.publish(Event(
+                name="driver.offer_expired",
+                data={"delivery_id": str(delivery_id), "driver_id": str(offer.driver_id)},
+            ), session=db)
+
+        if dispatch_round >= settings.delivery_max_dispatch_rounds:
+            logger.warning(f"No driver found for delivery {delivery.reference}")
+            return
+
+        offers = await service.find_and_offer_drivers(
+            delivery_id,
+            order_value=int(data.get("order_value", 0)),
+            dispatch_round=dispatch_round + 1,
+        )
+
+    if not offers:
+        # No driver around: try again later (delivery.offers_sent schedules it otherwise)
+        await job_scheduler.schedule_in(
+            DELIVERY_REDISPATCH,
+            DeliveryService.OFFER_EXPIRY_SECONDS,
+            {**data, "dispatch_round": dispatch_round + 1},
+            job_id=redispatch_job_id(data["delivery_id"]),
+        )
+
+
+# =============================================================================
+# Notification Jobs
+# =============================================================================
+
+
+async def notify_order_status(data: dict[str, Any]) -> None:
+    """Notify the customer (and the provider for new orders) of an order status."""
+    from app.modules.notifications.service import NotificationService
+    from app.modules.orders.service import OrderService
+
+    order_status = OrderStatus(data["status"])
+    async with get_db_context() as db, get_redis_context() as redis_client:
+        orders = OrderService(db)
+        order = await orders.get_order(UUID(data["order_id"]))
+        if not order:
+            return
+        provider = await orders._get_provider(order.provider_id)
+        provider_name = provider.name if provider else ""
+        notifications = NotificationService(db, redis_client)
+
+        if order_status == OrderStatus.PENDING:
+            await notifications.notify_order_created(
+                order.user_id, order.reference, provider_name, order.total
+            )
+            if provider:
+                await notifications.notify_provider_new_order(
+                    provider.user_id,
+                    order.reference,
+                    order.delivery_address_snapshot.get("contact_name") or "Client",
+                    order.total,
+                )
+        elif order_status == OrderStatus.CONFIRMED:
+            await notifications.notify_order_confirmed(
+                order.user_id, order.reference, provider_name, order.estimated_prep_time
+            )
+        elif order_status == OrderStatus.READY:
+            await notifications.notify_order_ready(order.user_id, order.reference, provider_name)
+        elif order_status == OrderStatus.CANCELLED:
+            await notifications.notify_order_cancelled(
+                order.user_id, order.reference, order.cancellation_reason
+            )
+        elif order_status == OrderStatus.DELIVERED:
+            await notifications.notify_order_delivered(order.user_id, order.reference)
+
+
+async def notify_offer_expired(data: dict[str, Any]) -> None:
+    """Notify a driver that their offer expired."""
+    from app.modules.deliveries.service import DeliveryService
+    from app.modules.notifications.service import NotificationService
+
+    async with get_db_context() as db, get_redis_context() as redis_client:
+        driver = await DeliveryService(db).get_driver(UUID(data["driver_id"]))
+        if driver:
+            await NotificationService(db, redis_client).notify_offer_expired(driver.user_id)
+
+
+# =============================================================================
+# Maintenance Jobs
+# =============================================================================
+
+
+async def _schedule_retry(job_name: str, data: dict[str, Any] | None = None) -> None:
+    """
+    Schedule the next run of a maintenance job before it does its work.
+
+    A job scheduled again while running keeps that schedule when it fails,
+    times out or its worker dies: a failing maintenance job runs again
+    later instead of being dropped (with ``data``, to resume where it
+    started). A run that succeeds schedules itself at its usual interval
+    instead.
+    """
+    await job_scheduler.schedule_in(
+        job_name, MAINTENANCE_RETRY_DELAY_SECONDS, data, job_id=job_name
+    )
+
+
+async def maintain_order_partitions(data: dict[str, Any]) -> None:
+    """Create upcoming order partitions and archive closed orders, then run again later."""
+    from app.modules.orders.services.partitions import order_partitions
+
+    await _schedule_retry(ORDER_PARTITION_MAINTENANCE)
+    backlog = await order_partitions.run(settings.jobs_timeout_seconds * MAINTENANCE_TIME_BUDGET)
+    interval = settings.order_maintenance_interval_seconds
+    await job_scheduler.schedule_in(
+        ORDER_PARTITION_MAINTENANCE,
+        MAINTENANCE_BACKLOG_DELAY_SECONDS if backlog else interval,
+        job_id=ORDER_PARTITION_MAINTENANCE,
+    )
+
+
+async def reconcile_aggregates(data: dict[str, Any]) -> None:
+    """Fix drifted provider and driver aggregates, then resume or run again later."""
+    from app.modules.orders.services.aggregates import aggregate_reconciliation
+
+    await _schedule_retry(AGGREGATE_RECONCILIATION, data)
+    resume = await aggregate_reconciliation.run(
+        settings.jobs_timeout_seconds * MAINTENANCE_TIME_BUDGET, data
+    )
+    interval = settings.aggregate_reconciliation_interval_seconds
+    await job_scheduler.schedule_in(
+        AGGREGATE_RECONCILIATION,
+        MAINTENANCE_BACKLOG_DELAY_SECONDS if resume else interval,
+        data=resume,
+        job_id=AGGREGATE_RECONCILIATION,
+    )
+
+
+async def refresh_sales_rollups(data: dict[str, Any]) -> None:
+    """Roll up recently updated orders into the provider sales tables, then run again later."""
+    from app.modules.orders.services.provider_sales import provider_sales_rollup
+
+    await _schedule_retry(SALES_ROLLUP_REFRESH)
+    await provider_sales_rollup.refresh()
+    await job_scheduler.schedule_in(
+        SALES_ROLLUP_REFRESH,
+        settings.sales_rollup_interval_seconds,
+        job_id=SALES_ROLLUP_REFRESH,
+    )
+
+
+async def schedule_maintenance_jobs() -> None:
+    """
+    Start the recurring maintenance jobs (each schedules its next run).
+
+    Jobs already scheduled or running keep their schedule: restarts do not
+    run them again early.
+    """
+    for job_name in (
+        ORDER_PARTITION_MAINTENANCE,
+        AGGREGATE_RECONCILIATION,
+        SALES_ROLLUP_REFRESH,
+    ):
+        await job_scheduler.schedule_in(job_name, 0, job_id=job_name, replace=False)
+
+
+# =============================================================================
+# Registration
+# =============================================================================
+
+
+def register_job_handlers() -> None:
+    """Register all delayed job handlers with the scheduler."""
+    job_scheduler.register(ORDER_AUTO_CANCEL, auto_cancel_order)
+    job_scheduler.register(ORDER_PREPARATION_LATE, alert_late_preparation)
+    job_scheduler.register(DELIVERY_REDISPATCH, redispatch_delivery)
+    job_scheduler.register(NOTIFY_ORDER_STATUS, notify_order_status)
+    job_scheduler.register(NOTIFY_OFFER_EXPIRED, notify_offer_expired)
+    job_scheduler.register(ORDER_PARTITION_MAINTENANCE, maintain_order_partitions)
+    job_scheduler.register(AGGREGATE_RECONCILIATION, reconcile_aggregates)
+    job_scheduler.register(SALES_ROLLUP_REFRESH, refresh_sales_rollups)
+
+    logger.info("Job handlers registered successfully")
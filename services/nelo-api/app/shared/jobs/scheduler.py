@@ -0,0 +1,397 @@
+"""
+Durable job queue and delayed jobs on a Redis sorted set.
+
+Jobs are members of ``jobs:scheduled`` scored by their due time, with their
+payload in the ``jobs:payloads`` hash. Pollers (in any number of processes)
+claim due jobs in batches by moving them to ``jobs:processing`` with a lease;
+a job whose lease expires (crashed worker) counts as a failed attempt and is
+scheduled again, or dropped after the last attempt. There is no
+task per pending timer: hundreds of thousands of timers are just set members.
+Jobs to run right away are due now, and wake up an idle poller.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+from uuid import uuid4
+
+import redis.asyncio as redis
+
+from app.core.config import get_settings
+from app.core.metrics import Counter, Gauge, Histogram
+from app.core.redis import get_redis_context
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+JOBS_RUN = Counter("nelo_jobs_run_total", "Delayed jobs executed", ["job", "outcome"])
+JOB_SECONDS = Histogram("nelo_job_duration_seconds", "Delayed job execution time", ["job"])
+JOB_LAG_SECONDS = Histogram(
+    "nelo_job_lag_seconds", "Delay between a job's due time and its execution", ["job"]
+)
+JOBS_IN_FLIGHT = Gauge("nelo_jobs_in_flight", "Jobs currently running in this process")
+
+JobHandler = Callable[[dict[str, Any]], Awaitable[None]]
+
+SCHEDULED_KEY = "jobs:scheduled"
+PROCESSING_KEY = "jobs:processing"
+PAYLOADS_KEY = "jobs:payloads"
+JOB_KEYS = [SCHEDULED_KEY, PROCESSING_KEY, PAYLOADS_KEY]
+WAKEUP_KEY = "jobs:wakeup"
+
+# KEYS: scheduled, processing, payloads - ARGV: batch size, lease ms, max attempts
+# Requeues expired leases with one more attempt (a job scheduled again while
+# running keeps its new schedule), dropping jobs past the max attempts, then
+# claims up to a batch of due jobs. Returns two flat lists: claimed
+# (id, due ms, payload) and dropped (id, name)
+CLAIM_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now, 'LIMIT', 0, ARGV[1])
+local dropped = {}
+for _, id in ipairs(expired) do
+    redis.call('ZREM', KEYS[2], id)
+    local payload = redis.call('HGET', KEYS[3], id)
+    if payload and not redis.call('ZSCORE', KEYS[1], id) then
+        local job = cjson.decode(payload)
+        job['attempts'] = (job['attempts'] or 0) + 1
+        if job['attempts'] >= tonumber(ARGV[3]) then
+            redis.call('HDEL', KEYS[3], id)
+            table.insert(dropped, id)
+            table.insert(dropped, job['name'])
+        else
+            redis.call('HSET', KEYS[3], id, cjson.encode(job))
+            redis.call('ZADD', KEYS[1], now, id)
+        end
+    end
+end
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now, 'WITHSCORES', 'LIMIT', 0, ARGV[1])
+local claimed = {}
+for i = 1, #due, 2 do
+    local id = due[i]
+    redis.call('ZREM', KEYS[1], id)
+    redis.call('ZADD', KEYS[2], now + tonumber(ARGV[2]), id)
+    table.insert(claimed, id)
+    table.insert(claimed, due[i + 1])
+    table.insert(claimed, redis.call('HGET', KEYS[3], id) or '')
+end
+return {claimed, dropped}
+"""
+
+# KEYS: scheduled, processing, payloads - ARGV: job id, due ms, payload
+# Schedules a job unless it is already scheduled or running. Returns 1 if added
+SCHEDULE_NX_SCRIPT = """
+if redis.call('ZSCORE', KEYS[1], ARGV[1]) or redis.call('ZSCORE', KEYS[2], ARGV[1]) then
+    return 0
+end
+redis.call('HSET', KEYS[3], ARGV[1], ARGV[3])
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1])
+return 1
+"""
+
+# KEYS: scheduled, processing, payloads - ARGV: job id
+# Drops the payload unless the job was scheduled again while running
+ACK_SCRIPT = """
+redis.call('ZREM', KEYS[2], ARGV[1])
+if not redis.call('ZSCORE', KEYS[1], ARGV[1]) then
+    redis.call('HDEL', KEYS[3], ARGV[1])
+end
+"""
+
+# KEYS: scheduled, processing, payloads - ARGV: job id, due ms, payload
+# Schedules a failed job again, unless it was cancelled while running (its
+# payload is gone) or its lease expired (it was already requeued). Keeps a
+# job scheduled again while running. Returns 1 if the job will be retried
+RETRY_SCRIPT = """
+if redis.call('HEXISTS', KEYS[3], ARGV[1]) == 0 then
+    redis.call('ZREM', KEYS[2], ARGV[1])
+    return 0
+end
+if not redis.call('ZSCORE', KEYS[2], ARGV[1]) then
+    return 0
+end
+redis.call('ZREM', KEYS[2], ARGV[1])
+if redis.call('ZADD', KEYS[1], 'NX', ARGV[2], ARGV[1]) == 1 then
+    redis.call('HSET', KEYS[3], ARGV[1], ARGV[3])
+end
+return 1
+"""
+
+
+@dataclass
+class Job:
+    """A delayed job, identified by ``id`` (scheduling an existing id replaces it)."""
+
+    id: str
+    name: str
+    data: dict[str, Any] = field(default_factory=dict)
+    attempts: int = 0
+    due_at: float = 0.0  # epoch seconds
+
+    def dump(self) -> str:
+        return json.dumps({"name": self.name, "data": self.data, "attempts": self.attempts})
+
+    @classmethod
+    def load(cls, job_id: str, due_ms: float, payload: str) -> "Job":
+        raw = json.loads(payload)
+        return cls(
+            id=job_id,
+            name=raw["name"],
+            data=raw.get("data", {}),
+            attempts=raw.get("attempts", 0),
+            due_at=float(due_ms) / 1000,
+        )
+
+
+class JobScheduler:
+    """
+    Schedule, enqueue, cancel and run jobs.
+
+    Handlers are registered by job name and receive the job data. They must
+    be idempotent: a job can run again after a crash, and should check that
+    what it acts on is still in the expected state. At most ``concurrency``
+    jobs run at once per process, each for up to ``job_timeout`` seconds.
+    Failed or timed out jobs are retried with exponential backoff up to
+    ``max_attempts`` times; a lease that expires (the worker died running the
+    job) counts as an attempt too.
+    """
+
+    def __init__(
+        self,
+        poll_interval: float,
+        batch_size: int,
+        lease_seconds: int,
+        max_attempts: int,
+        concurrency: int,
+        job_timeout: float,
+    ):
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.concurrency = concurrency
+        self.job_timeout = job_timeout
+        self._handlers: dict[str, JobHandler] = {}
+        self._running: set[asyncio.Task[None]] = set()
+        self._task: asyncio.Task[None] | None = None
+        JOBS_IN_FLIGHT.set_function(lambda: len(self._running))
+
+    # -------------------------------------------------------------------------
+    # Scheduling
+    # -------------------------------------------------------------------------
+
+    def register(self, name: str, handler: JobHandler) -> None:
+        """Register the handler of a job name."""
+        self._handlers[name] = handler
+
+    async def schedule(
+        self,
+        name: str,
+        run_at: datetime | float,
+        data: dict[str, Any] | None = None,
+        job_id: str | None = None,
+        replace: bool = True,
+    ) -> str:
+        """
+        Schedule a job at ``run_at`` (datetime or epoch seconds).
+
+        ``job_id`` defaults to ``name:<sorted data values>``; scheduling the
+        same id again moves the existing job, unless ``replace`` is False:
+        a job already scheduled or running is then left as is.
+        """
+        data = data or {}
+        job_id = job_id or ":".join([name, *(str(data[k]) for k in sorted(data))])
+        due_at = run_at.timestamp() if isinstance(run_at, datetime) else run_at
+        job = Job(id=job_id, name=name, data=data)
+
+        async with get_redis_context() as client:
+            if not replace:
+                await client.register_script(SCHEDULE_NX_SCRIPT)(
+                    keys=JOB_KEYS, args=[job_id, int(due_at * 1000), job.dump()]
+                )
+                return job_id
+            pipe = client.pipeline()
+            pipe.hset(PAYLOADS_KEY, job_id, job.dump())
+            pipe.zadd(SCHEDULED_KEY, {job_id: int(due_at * 1000)})
+            await pipe.execute()
+        return job_id
+
+    async def schedule_in(
+        self,
+        name: str,
+        delay_seconds: float,
+        data: dict[str, Any] | None = None,
+        job_id: str | None = None,
+        replace: bool = True,
+    ) -> str:
+        """Schedule a job ``delay_seconds`` from now."""
+        return await self.schedule(name, time.time() + delay_seconds, data, job_id, replace)
+
+    async def enqueue(self, name: str, data: dict[str, Any] | None = None) -> str:
+        """Queue a job to run as soon as possible, and wake up an idle worker."""
+        job_id = f"{name}:{uuid4().hex}"
+        job = Job(id=job_id, name=name, data=data or {})
+
+        async with get_redis_context() as client:
+            pipe = client.pipeline()
+            pipe.hset(PAYLOADS_KEY, job_id, job.dump())
+            pipe.zadd(SCHEDULED_KEY, {job_id: int(time.time() * 1000)})
+            pipe.lpush(WAKEUP_KEY, 1)
+            pipe.ltrim(WAKEUP_KEY, 0, 0)
+            await pipe.execute()
+        return job_id
+
+    async def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a pending job. Returns False if it was not scheduled.
+
+        A running job is not stopped, but is not retried if it fails.
+        """
+        async with get_redis_context() as client:
+            pipe = client.pipeline()
+            pipe.zrem(SCHEDULED_KEY, job_id)
+            pipe.hdel(PAYLOADS_KEY, job_id)
+            removed, _ = await pipe.execute()
+        return bool(removed)
+
+    # -------------------------------------------------------------------------
+    # Execution
+    # -------------------------------------------------------------------------
+
+    async def _claim(self, client: redis.Redis, limit: int) -> list[Job]:
+        claim = client.register_script(CLAIM_SCRIPT)
+        claimed, dropped = await claim(
+            keys=JOB_KEYS, args=[limit, self.lease_seconds * 1000, self.max_attempts]
+        )
+        for i in range(0, len(dropped), 2):
+            job_id, name = dropped[i : i + 2]
+            logger.error(f"Job {job_id} lease expired {self.max_attempts} times, dropping it")
+            JOBS_RUN.inc(job=name, outcome="dropped")
+
+        jobs = []
+        for i in range(0, len(claimed), 3):
+            job_id, due_ms, payload = claimed[i : i + 3]
+            if not payload:
+                # Cancelled while being claimed
+                await client.register_script(ACK_SCRIPT)(keys=JOB_KEYS, args=[job_id])
+                continue
+            jobs.append(Job.load(job_id, due_ms, payload))
+        return jobs
+
+    async def _run(self, job: Job) -> None:
+        handler = self._handlers.get(job.name)
+        if handler is None:
+            logger.error(f"No handler for job '{job.name}' ({job.id}), dropping it")
+            JOBS_RUN.inc(job=job.name, outcome="unknown")
+            await self._ack(job)
+            return
+
+        JOB_LAG_SECONDS.observe(max(time.time() - job.due_at, 0.0), job=job.name)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(handler(job.data), self.job_timeout)
+        except Exception as e:
+            if isinstance(e, TimeoutError):
+                e = TimeoutError(f"timed out after {self.job_timeout}s")
+            await self._fail(job, e)
+            return
+        finally:
+            JOB_SECONDS.observe(time.perf_counter() - start, job=job.name)
+
+        JOBS_RUN.inc(job=job.name, outcome="done")
+        await self._ack(job)
+
+    async def _ack(self, job: Job) -> None:
+        async with get_redis_context() as client:
+            await client.register_script(ACK_SCRIPT)(keys=JOB_KEYS, args=[job.id])
+
+    async def _fail(self, job: Job, error: Exception) -> None:
+        job.attempts += 1
+        if job.attempts >= self.max_attempts:
+            logger.error(f"Job {job.id} failed {job.attempts} times, dropping it: {error}")
+            JOBS_RUN.inc(job=job.name, outcome="dropped")
+            await self._ack(job)
+            return
+
+        retry_at = time.time() + min(2**job.attempts, 300)
+        async with get_redis_context() as client:
+            retried = await client.register_script(RETRY_SCRIPT)(
+                keys=JOB_KEYS, args=[job.id, int(retry_at * 1000), job.dump()]
+            )
+        if not retried:
+            logger.info(f"Job {job.id} failed after being cancelled or requeued: {error}")
+            JOBS_RUN.inc(job=job.name, outcome="not_retried")
+            return
+        logger.warning(f"Job {job.id} failed (attempt {job.attempts}): {error}")
+        JOBS_RUN.inc(job=job.name, outcome="retried")
+
+    async def run_due(self, client: redis.Redis) -> int:
+        """Claim one batch of due jobs and run them to completion. Returns the number run."""
+        jobs = await self._claim(client, self.batch_size)
+        await asyncio.gather(*(self._run(job) for job in jobs))
+        return len(jobs)
+
+    async def _poll(self) -> None:
+        while True:
+            try:
+                async with get_redis_context() as client:
+                    while True:
+                        free = self.concurrency - len(self._running)
+                        if free <= 0:
+                            await asyncio.wait(self._running, return_when=asyncio.FIRST_COMPLETED)
+                            continue
+
+                        limit = min(free, self.batch_size)
+                        jobs = await self._claim(client, limit)
+                        for job in jobs:
+                            task = asyncio.create_task(self._run(job))
+                            self._running.add(task)
+                            task.add_done_callback(self._running.discard)
+
+                        # Keep claiming while batches come back full, otherwise
+                        # wait for an enqueued job or the next poll
+                        if len(jobs) < limit:
+                            await client.blpop([WAKEUP_KEY], timeout=self.poll_interval)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Job poller error: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+    def start(self) -> None:
+        """Start polling for due jobs (call from the event loop)."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._poll())
+
+    async def stop(self) -> None:
+        """
+        Stop claiming jobs and let running ones finish (up to the job timeout).
+
+        Jobs still running after that are requeued once their lease expires.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._running:
+            _, pending = await asyncio.wait(self._running, timeout=self.job_timeout)
+            for task in pending:
+                task.cancel()
+
+
+job_scheduler = JobScheduler(
+    poll_interval=settings.jobs_poll_interval_ms / 1000,
+    batch_size=settings.jobs_batch_size,
+    lease_seconds=settings.jobs_lease_seconds,
+    max_attempts=settings.jobs_max_attempts,
+    concurrency=settings.jobs_concurrency,
+    job_timeout=settings.jobs_timeout_seconds,
+)
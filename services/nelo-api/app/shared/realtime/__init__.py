@@ -0,0 +1,4 @@
+"""Live streams over Redis pub/sub (order and delivery tracking)."""
+from app.shared.realtime.hub import PubSubHub, Subscription, realtime_hub
+
+__all__ = ["PubSubHub", "Subscription", "realtime_hub"]
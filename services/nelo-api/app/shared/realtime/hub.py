@@ -0,0 +1,244 @@
+"""Fan-out of Redis pub/sub channels to the live streams of this process."""
+
+import asyncio
+import json
+import logging
+from typing import Any
+
+from redis.asyncio.client import PubSub
+
+from app.core.config import get_settings
+from app.core.metrics import Counter, Gauge
+from app.core.redis import get_redis_context
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+REALTIME_PUBLISHED = Counter(
+    "nelo_realtime_published_total", "Messages published to live stream channels"
+)
+REALTIME_PUBLISH_ERRORS = Counter(
+    "nelo_realtime_publish_errors_total", "Messages that could not be published"
+)
+REALTIME_DROPPED = Counter(
+    "nelo_realtime_dropped_total", "Messages dropped because a subscriber fell behind"
+)
+REALTIME_SUBSCRIBERS = Gauge(
+    "nelo_realtime_subscribers", "Live stream subscriptions open in this process"
+)
+REALTIME_CHANNELS = Gauge(
+    "nelo_realtime_channels", "Redis channels this process is subscribed to"
+)
+
+# Message: (event name, event data)
+Message = tuple[str, dict[str, Any]]
+
+
+class Subscription:
+    """
+    Messages of a few channels for one client (an SSE or WebSocket stream).
+
+    Holds a bounded queue: when the client does not keep up, the oldest
+    messages are dropped (the client only needs the latest state).
+    """
+
+    def __init__(self, hub: "PubSubHub", maxsize: int):
+        self._hub = hub
+        self._queue: asyncio.Queue[Message] = asyncio.Queue(maxsize)
+        self.channels: set[str] = set()
+        self.closed = False
+
+    def deliver(self, message: Message) -> None:
+        if self._queue.full():
+            self._queue.get_nowait()
+            REALTIME_DROPPED.inc()
+        self._queue.put_nowait(message)
+
+    async def get(self, timeout: float) -> Message | None:
+        """Next message, or None if nothing arrived within ``timeout`` seconds."""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def add(self, channel: str) -> None:
+        """Also receive the messages of ``channel``."""
+        if not self.closed and channel not in self.channels:
+            self.channels.add(channel)
+            await self._hub._attach(self, channel)
+
+    async def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            await self._hub._detach(self)
+
+
+class PubSubHub:
+    """
+    One Redis pub/sub connection per process, shared by all live streams.
+
+    A channel is subscribed in Redis while at least one local subscription
+    wants it; each message is decoded once and handed to the queues of its
+    subscriptions. An idle stream therefore costs a queue and a waiting
+    coroutine, not a Redis connection. Lost connections are re-established
+    and every wanted channel is subscribed again.
+    """
+
+    CONTROL_CHANNEL = "realtime:hub"
+    RETRY_DELAY = 2.0
+    SUBSCRIBE_CHUNK = 1000
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers: dict[str, set[Subscription]] = {}
+        self._subscription_count = 0
+        self._pubsub: PubSub | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._unsubscribing: set[asyncio.Task[None]] = set()
+        REALTIME_SUBSCRIBERS.set_function(lambda: self._subscription_count)
+        REALTIME_CHANNELS.set_function(lambda: len(self._subscribers))
+
+    # -------------------------------------------------------------------------
+    # Publishing
+    # -------------------------------------------------------------------------
+
+    @classmethod
+    async def publish(cls, channels: list[str], event: str, data: dict[str, Any]) -> None:
+        """
+        Publish an event to channels of any process.
+
+        Best effort: live streams are a convenience over the stored state, so
+        a Redis error is logged and never fails the caller.
+        """
+        await cls.publish_many([(channels, event, data)])
+
+    @staticmethod
+    async def publish_many(messages: list[tuple[list[str], str, dict[str, Any]]]) -> None:
+        """Publish several events (channels, event, data) in one round trip."""
+        count = sum(len(channels) for channels, _, _ in messages)
+        if not count:
+            return
+        try:
+            async with get_redis_context() as client:
+                pipe = client.pipeline(transaction=False)
+                for channels, event, data in messages:
+                    payload = json.dumps({"event": event, "data": data}, default=str)
+                    for channel in channels:
+                        pipe.publish(channel, payload)
+                await pipe.execute()
+            REALTIME_PUBLISHED.inc(count)
+        except Exception as e:
+            REALTIME_PUBLISH_ERRORS.inc(count)
+            events = sorted({event for _, event, _ in messages})
+            logger.warning(f"Could not publish {', '.join(events)} to {count} channel(s): {e}")
+
+    # -------------------------------------------------------------------------
+    # Subscriptions
+    # -------------------------------------------------------------------------
+
+    async def subscribe(self, channels: list[str]) -> Subscription:
+        """Open a subscription to ``channels`` (close it when the client leaves)."""
+        subscription = Subscription(self, self.queue_size)
+        self._subscription_count += 1
+        for channel in channels:
+            await subscription.add(channel)
+        return subscription
+
+    async def _attach(self, subscription: Subscription, channel: str) -> None:
+        subscribers = self._subscribers.get(channel)
+        if subscribers is not None:
+            subscribers.add(subscription)
+            return
+        self._subscribers[channel] = {subscription}
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.subscribe(channel)
+            except Exception as e:
+                # Subscribed again by the listener once reconnected
+                logger.warning(f"Could not subscribe to {channel}: {e}")
+
+    async def _detach(self, subscription: Subscription) -> None:
+        self._subscription_count -= 1
+        unused = []
+        for channel in subscription.channels:
+            subscribers = self._subscribers.get(channel)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[channel]
+                unused.append(channel)
+        if unused and self._pubsub is not None:
+            # In a task: streams are often closed by a cancelled request
+            task = asyncio.create_task(self._unsubscribe(unused))
+            self._unsubscribing.add(task)
+            task.add_done_callback(self._unsubscribing.discard)
+
+    async def _unsubscribe(self, channels: list[str]) -> None:
+        # A client may have come back for the channel in the meantime
+        channels = [c for c in channels if c not in self._subscribers]
+        if not channels or self._pubsub is None:
+            return
+        try:
+            await self._pubsub.unsubscribe(*channels)
+        except Exception as e:
+            logger.warning(f"Could not unsubscribe from {len(channels)} channel(s): {e}")
+
+    def _dispatch(self, channel: str, raw: str) -> None:
+        subscribers = self._subscribers.get(channel)
+        if not subscribers:
+            return
+        try:
+            payload = json.loads(raw)
+            message = (payload["event"], payload["data"])
+        except (ValueError, KeyError, TypeError):
+            logger.warning(f"Malformed message on {channel}")
+            return
+        for subscription in list(subscribers):
+            subscription.deliver(message)
+
+    # -------------------------------------------------------------------------
+    # Listener
+    # -------------------------------------------------------------------------
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with get_redis_context() as client:
+                    pubsub = client.pubsub(ignore_subscribe_messages=True)
+                    try:
+                        await pubsub.subscribe(self.CONTROL_CHANNEL)
+                        self._pubsub = pubsub
+                        channels = list(self._subscribers)
+                        for i in range(0, len(channels), self.SUBSCRIBE_CHUNK):
+                            await pubsub.subscribe(*channels[i:i + self.SUBSCRIBE_CHUNK])
+                        logger.info(f"Realtime hub listening ({len(channels)} channels)")
+                        while True:
+                            message = await pubsub.get_message(timeout=None)
+                            if message and message["type"] == "message":
+                                self._dispatch(message["channel"], message["data"])
+                    finally:
+                        self._pubsub = None
+                        await pubsub.aclose()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Realtime hub subscription lost: {e}")
+                await asyncio.sleep(self.RETRY_DELAY)
+
+    def start(self) -> None:
+        """Start relaying Redis messages (call from the event loop)."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+realtime_hub = PubSubHub(queue_size=settings.realtime_queue_size)
@@ -0,0 +1,189 @@
+"""Live order and delivery tracking streams (SSE and WebSocket)."""
+
+import json
+import logging
+import time
+from collections.abc import AsyncGenerator, AsyncIterator
+from datetime import datetime, timezone
+from typing import Any, Optional
+from uuid import UUID
+
+from fastapi import WebSocket, WebSocketDisconnect
+from starlette.background import BackgroundTask
+from starlette.responses import StreamingResponse
+
+from app.core.config import get_settings
+from app.shared.realtime.hub import Message, Subscription, realtime_hub
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Statuses after which a tracked order or delivery no longer changes
+FINAL_STATUSES = {"delivered", "cancelled", "refunded", "failed"}
+ORDER_FINAL_EVENTS = {"order.delivered", "order.cancelled", "order.refunded"}
+DELIVERY_FINAL_EVENTS = {"delivery.delivered", "delivery.failed", "delivery.cancelled"}
+
+# Reconnection delay suggested to SSE clients (milliseconds)
+SSE_RETRY_MS = 3000
+
+
+def order_channel(order_id: UUID | str) -> str:
+    return f"tracking:order:{order_id}"
+
+
+def delivery_channel(delivery_id: UUID | str) -> str:
+    return f"tracking:delivery:{delivery_id}"
+
+
+def driver_channel(driver_id: UUID | str) -> str:
+    return f"tracking:driver:{driver_id}"
+
+
+# =============================================================================
+# Publishing
+# =============================================================================
+
+
+async def publish_order_update(event: str, data: dict[str, Any]) -> None:
+    """Push an order event to the streams following the order."""
+    await realtime_hub.publish([order_channel(data["order_id"])], event, data)
+
+
+async def publish_order_updates(event: str, items: list[dict[str, Any]]) -> None:
+    """Push the same event of several orders to their streams, in one round trip."""
+    await realtime_hub.publish_many(
+        [([order_channel(data["order_id"])], event, data) for data in items]
+    )
+
+
+async def publish_delivery_update(event: str, data: dict[str, Any]) -> None:
+    """Push a delivery event to the streams following the delivery and its order."""
+    channels = [delivery_channel(data["delivery_id"])]
+    if data.get("order_id"):
+        channels.append(order_channel(data["order_id"]))
+    await realtime_hub.publish(channels, event, data)
+
+
+async def publish_driver_location(
+    driver_id: UUID,
+    latitude: float,
+    longitude: float,
+    heading: Optional[float] = None,
+    speed: Optional[float] = None,
+) -> None:
+    """Push a driver ping to the streams following one of the driver's deliveries."""
+    await realtime_hub.publish(
+        [driver_channel(driver_id)],
+        "driver.location",
+        {
+            "driver_id": str(driver_id),
+            "latitude": latitude,
+            "longitude": longitude,
+            "heading": heading,
+            "speed": speed,
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+        },
+    )
+
+
+# =============================================================================
+# Streams
+# =============================================================================
+
+
+def tracking_channels(snapshot: dict[str, Any]) -> list[str]:
+    """Channels of the driver already assigned in an order or delivery snapshot."""
+    driver = snapshot.get("driver") or (snapshot.get("delivery") or {}).get("driver")
+    return [driver_channel(driver["id"])] if driver and driver.get("id") else []
+
+
+async def tracking_events(
+    subscription: Subscription,
+    snapshot: dict[str, Any],
+    final_events: set[str],
+) -> AsyncGenerator[Message | None, None]:
+    """
+    Snapshot first, then the live events of a subscription.
+
+    Yields None when nothing happened for the keepalive interval. Follows the
+    driver once one is assigned, and ends after one of ``final_events`` or
+    once the stream has lasted ``tracking_stream_max_seconds`` (clients
+    reconnect, which re-checks their token).
+    """
+    try:
+        yield "snapshot", snapshot
+        if snapshot.get("status") in FINAL_STATUSES:
+            return
+
+        deadline = time.monotonic() + settings.tracking_stream_max_seconds
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            message = await subscription.get(
+                min(settings.tracking_stream_keepalive_seconds, remaining)
+            )
+            if message is None:
+                yield None
+                continue
+
+            event, data = message
+            if event == "delivery.assigned" and data.get("driver_id"):
+                await subscription.add(driver_channel(data["driver_id"]))
+            yield message
+            if event in final_events:
+                return
+    finally:
+        await subscription.close()
+
+
+def _format_sse(message: Message | None) -> str:
+    if message is None:
+        return ": ping\n\n"
+    event, data = message
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _sse_stream(
+    subscription: Subscription,
+    snapshot: dict[str, Any],
+    final_events: set[str],
+) -> AsyncIterator[str]:
+    yield f"retry: {SSE_RETRY_MS}\n\n"
+    async for message in tracking_events(subscription, snapshot, final_events):
+        yield _format_sse(message)
+
+
+def sse_response(
+    subscription: Subscription,
+    snapshot: dict[str, Any],
+    final_events: set[str],
+) -> StreamingResponse:
+    """Serve a tracking subscription as Server-Sent Events."""
+    return StreamingResponse(
+        _sse_stream(subscription, snapshot, final_events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Releases the subscription if the stream never started
+        background=BackgroundTask(subscription.close),
+    )
+
+
+async def serve_websocket(
+    websocket: WebSocket,
+    subscription: Subscription,
+    snapshot: dict[str, Any],
+    final_events: set[str],
+) -> None:
+    """Serve a tracking subscription over an accepted WebSocket."""
+    events = tracking_events(subscription, snapshot, final_events)
+    try:
+        async for message in events:
+            event, data = message or ("ping", {})
+            await websocket.send_text(json.dumps({"event": event, "data": data}, default=str))
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await events.aclose()
+        await subscription.close()
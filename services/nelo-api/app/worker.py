@@ -0,0 +1,100 @@
+"""
+Background job worker.
+
+Runs the jobs queued by the API (notifications, order timers, offer
+re-dispatch) and the recurring maintenance jobs (order partitions and
+archival, aggregate reconciliation, sales rollups) with the application's
+service layer:
+
+    python -m app.worker
+
+Metrics are served on ``WORKER_METRICS_PORT`` (``/metrics``).
+"""
+
+import asyncio
+import logging
+import signal
+
+from app.core.config import get_settings
+from app.core.database import engine, replica_router
+from app.core.loop_monitor import loop_monitor
+from app.core.metrics import CONTENT_TYPE, render_metrics
+from app.core.redis import close_redis_pool
+from app.shared.audit import audit_writer
+from app.shared.events import EventBus, register_event_handlers
+from app.shared.jobs import job_scheduler, register_job_handlers, schedule_maintenance_jobs
+
+settings = get_settings()
+logger = logging.getLogger("app.worker")
+
+
+async def serve_metrics(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Minimal HTTP endpoint for Prometheus: ``GET /metrics``."""
+    try:
+        request_line = await reader.readline()
+        while await reader.readline() not in (b"\r\n", b"\n", b""):
+            pass  # Skip headers
+        parts = request_line.split()
+        if len(parts) > 1 and parts[1] == b"/metrics":
+            status, body = "200 OK", render_metrics().encode()
+        else:
+            status, body = "404 Not Found", b""
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: {CONTENT_TYPE}\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+            + body
+        )
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def run() -> None:
+    """Run the worker until SIGINT or SIGTERM."""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    # Jobs call services, which publish events
+    register_event_handlers()
+    register_job_handlers()
+
+    await replica_router.start()
+    loop_monitor.start()
+    audit_writer.start()
+    await schedule_maintenance_jobs()
+    job_scheduler.start()
+
+    metrics_server = await asyncio.start_server(
+        serve_metrics, "0.0.0.0", settings.worker_metrics_port
+    )
+
+    logger.info(
+        f"Worker started (concurrency {settings.jobs_concurrency}, "
+        f"metrics on :{settings.worker_metrics_port})"
+    )
+    await stop.wait()
+    logger.info("Worker stopping, waiting for running jobs")
+
+    await job_scheduler.stop()
+    await EventBus.drain()
+    metrics_server.close()
+    await audit_writer.stop()
+    await loop_monitor.stop()
+    await replica_router.stop()
+    await engine.dispose()
+    await close_redis_pool()
+    logger.info("Worker stopped")
+
+
+def main() -> None:
+    logging.basicConfig(
+        level=logging.DEBUG if settings.debug else logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
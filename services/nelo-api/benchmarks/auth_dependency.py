@@ -0,0 +1,49 @@
+"""
+Cost of the auth dependency token check, with and without the verified
+token cache.
+
+Runs ``get_current_user_id`` on the same access token repeatedly, as a
+mobile client does during the token's life. The revocation cache is marked
+in sync so no Redis is needed: only token decoding and checks are measured.
+
+Usage (from services/nelo-api, with the usual env vars set):
+    python -m benchmarks.auth_dependency [iterations]
+"""
+
+import asyncio
+import sys
+import time
+from uuid import uuid4
+
+from app.modules.auth.dependencies import get_current_user_id
+from app.modules.auth.services.jwt_service import JWTService
+from app.modules.auth.services.revocation import revocation_cache
+from app.modules.auth.services.token_cache import verified_token_cache
+
+
+async def run(token: str, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        assert await get_current_user_id(token, redis_client=None)
+    return (time.perf_counter() - start) / iterations
+
+
+async def main(iterations: int) -> None:
+    revocation_cache._ready = True
+    token = JWTService(redis_client=None).create_access_token(uuid4(), role="client")
+    maxsize = verified_token_cache.maxsize
+
+    verified_token_cache.maxsize = 0
+    verified_token_cache.clear()
+    uncached = min([await run(token, iterations) for _ in range(3)])
+
+    verified_token_cache.maxsize = maxsize
+    cached = min([await run(token, iterations) for _ in range(3)])
+
+    print(f"without cache: {uncached * 1e6:.2f} us/request")
+    print(f"with cache:    {cached * 1e6:.2f} us/request")
+    print(f"speedup:       x{uncached / cached:.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000))
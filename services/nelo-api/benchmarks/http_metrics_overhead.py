@@ -0,0 +1,61 @@
+"""
+Overhead of the HTTP metrics middleware.
+
+Calls a trivial ASGI app directly, with and without ``MetricsMiddleware``,
+and reports the added cost per request.
+
+Usage (from services/nelo-api, with the usual env vars set):
+    python -m benchmarks.http_metrics_overhead [iterations]
+"""
+
+import asyncio
+import sys
+import time
+
+from fastapi.routing import APIRoute
+
+from app.core.middleware import MetricsMiddleware
+
+ROUTE = APIRoute("/api/v1/orders/{order_id}", endpoint=lambda order_id: None)
+
+
+async def endpoint(scope, receive, send) -> None:
+    # What the router does once it has matched the request
+    scope["route"] = ROUTE
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive() -> dict:
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message: dict) -> None:
+    pass
+
+
+async def run(app, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        scope = {"type": "http", "method": "GET", "path": "/api/v1/orders/123"}
+        await app(scope, receive, send)
+    return (time.perf_counter() - start) / iterations
+
+
+async def main(iterations: int) -> None:
+    instrumented = MetricsMiddleware(endpoint)
+
+    # Warm-up (creates the label series)
+    await run(endpoint, 1000)
+    await run(instrumented, 1000)
+
+    baseline = min([await run(endpoint, iterations) for _ in range(5)])
+    wrapped = min([await run(instrumented, iterations) for _ in range(5)])
+
+    print(f"baseline:     {baseline * 1e6:.2f} us/request")
+    print(f"instrumented: {wrapped * 1e6:.2f} us/request")
+    print(f"overhead:     {(wrapped - baseline) * 1e6:.2f} us/request")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000))
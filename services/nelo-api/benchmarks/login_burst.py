@@ -0,0 +1,85 @@
+"""
+Latency of unrelated requests during a login burst.
+
+Serves a minimal app with a cheap ``/ping`` route and a ``/login`` route that
+hashes a password, either on the event loop (``hash_password``) or in the
+hashing pool (``hash_password_async``). While a burst of logins is running,
+``/ping`` is called continuously and its latency percentiles are reported.
+
+Usage (from services/nelo-api, with the usual env vars set):
+    python -m benchmarks.login_burst [logins] [concurrency]
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.core.security import hash_password, hash_password_async
+
+app = FastAPI()
+
+
+@app.get("/ping")
+async def ping() -> dict:
+    return {"ok": True}
+
+
+@app.post("/login/blocking")
+async def login_blocking() -> dict:
+    return {"hash": hash_password("correct horse battery staple")}
+
+
+@app.post("/login/offloaded")
+async def login_offloaded() -> dict:
+    return {"hash": await hash_password_async("correct horse battery staple")}
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+async def run(mode: str, logins: int, concurrency: int) -> None:
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        done = asyncio.Event()
+        latencies: list[float] = []
+        slots = asyncio.Semaphore(concurrency)
+
+        async def login() -> None:
+            async with slots:
+                await client.post(f"/login/{mode}")
+
+        async def pinger() -> None:
+            while not done.is_set():
+                start = time.perf_counter()
+                await client.get("/ping")
+                latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(0.005)
+
+        ping_task = asyncio.create_task(pinger())
+        start = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await ping_task
+
+    print(
+        f"{mode:>9}: {logins} logins in {elapsed:.2f}s | /ping n={len(latencies)} "
+        f"p50={statistics.median(latencies) * 1000:.1f}ms "
+        f"p99={percentile(latencies, 0.99) * 1000:.1f}ms "
+        f"max={max(latencies) * 1000:.1f}ms"
+    )
+
+
+async def main(logins: int, concurrency: int) -> None:
+    await run("blocking", logins, concurrency)
+    await run("offloaded", logins, concurrency)
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    asyncio.run(main(*(args + [50, 10][len(args):])))
@@ -1,8 +1,10 @@
 """Pytest configuration and fixtures."""
 
 import pytest
+import redis.asyncio as redis
 from httpx import ASGITransport, AsyncClient
 
+from app.core.config import get_settings
 from app.main import app
 
 
@@ -20,3 +22,16 @@ async def client():
         base_url="http://test",
     ) as ac:
         yield ac
+
+
+@pytest.fixture
+async def redis_client():
+    """Client on the configured Redis, skipped when it is unreachable."""
+    client = redis.from_url(str(get_settings().redis_url), decode_responses=True)
+    try:
+        await client.ping()
+    except (redis.ConnectionError, OSError):
+        await client.aclose()
+        pytest.skip("Redis is not available")
+    yield client
+    await client.aclose()
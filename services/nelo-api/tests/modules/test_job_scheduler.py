@@ -0,0 +1,195 @@
+"""Tests for claiming, acking, retrying and leasing delayed jobs (needs Redis)."""
+
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from uuid import uuid4
+
+import pytest
+
+import app.shared.jobs.scheduler as scheduler_module
+from app.shared.jobs.scheduler import JobScheduler
+
+LEASE_SECONDS = 1
+
+
+@pytest.fixture
+async def keys(redis_client, monkeypatch):
+    """Job keys under a prefix of their own, so that no other job is claimed."""
+    prefix = f"test:{uuid4().hex}"
+    names = {
+        name: f"{prefix}:{getattr(scheduler_module, name)}"
+        for name in ("SCHEDULED_KEY", "PROCESSING_KEY", "PAYLOADS_KEY", "WAKEUP_KEY")
+    }
+    for name, key in names.items():
+        monkeypatch.setattr(scheduler_module, name, key)
+    monkeypatch.setattr(
+        scheduler_module,
+        "JOB_KEYS",
+        [names["SCHEDULED_KEY"], names["PROCESSING_KEY"], names["PAYLOADS_KEY"]],
+    )
+
+    @asynccontextmanager
+    async def redis_context():
+        yield redis_client
+
+    monkeypatch.setattr(scheduler_module, "get_redis_context", redis_context)
+    yield names
+    await redis_client.delete(*names.values())
+
+
+@pytest.fixture
+def scheduler(keys) -> JobScheduler:
+    return JobScheduler(
+        poll_interval=0.1,
+        batch_size=10,
+        lease_seconds=LEASE_SECONDS,
+        max_attempts=3,
+        concurrency=5,
+        job_timeout=1,
+    )
+
+
+async def test_due_job_runs_and_ack_drops_it(redis_client, keys, scheduler: JobScheduler):
+    """A due job is claimed, run with its data, then removed everywhere."""
+    seen = []
+
+    async def handler(data):
+        seen.append(data)
+
+    scheduler.register("test.job", handler)
+    await scheduler.schedule_in("test.job", 0, {"order_id": "1"})
+    await scheduler.schedule_in("test.job", 60, {"order_id": "2"})
+
+    assert await scheduler.run_due(redis_client) == 1
+    assert seen == [{"order_id": "1"}]
+    assert await redis_client.zrange(keys["SCHEDULED_KEY"], 0, -1) == ["test.job:2"]
+    assert await redis_client.zcard(keys["PROCESSING_KEY"]) == 0
+    assert await redis_client.hkeys(keys["PAYLOADS_KEY"]) == ["test.job:2"]
+
+
+async def test_failed_job_is_retried_with_backoff(redis_client, keys, scheduler: JobScheduler):
+    """A failing job is scheduled again later, with its attempt counted."""
+
+    async def handler(data):
+        raise RuntimeError("boom")
+
+    scheduler.register("test.job", handler)
+    job_id = await scheduler.schedule_in("test.job", 0, {"order_id": "1"})
+
+    assert await scheduler.run_due(redis_client) == 1
+    assert await scheduler.run_due(redis_client) == 0
+    assert await redis_client.zcard(keys["PROCESSING_KEY"]) == 0
+    assert await redis_client.zscore(keys["SCHEDULED_KEY"], job_id) > time.time() * 1000
+    payload = json.loads(await redis_client.hget(keys["PAYLOADS_KEY"], job_id))
+    assert payload["attempts"] == 1
+
+
+async def test_failed_job_is_dropped_after_max_attempts(
+    redis_client, keys, scheduler: JobScheduler
+):
+    """The last failed attempt removes the job."""
+    scheduler.max_attempts = 1
+
+    async def handler(data):
+        raise RuntimeError("boom")
+
+    scheduler.register("test.job", handler)
+    await scheduler.schedule_in("test.job", 0, {"order_id": "1"})
+
+    assert await scheduler.run_due(redis_client) == 1
+    for key in keys.values():
+        assert not await redis_client.exists(key)
+
+
+async def test_job_cancelled_while_running_is_not_retried(
+    redis_client, keys, scheduler: JobScheduler
+):
+    """Cancelling a running job that then fails does not bring it back."""
+    job_id = "test.job:1"
+
+    async def handler(data):
+        await scheduler.cancel(job_id)
+        raise RuntimeError("boom")
+
+    scheduler.register("test.job", handler)
+    await scheduler.schedule_in("test.job", 0, job_id=job_id)
+
+    assert await scheduler.run_due(redis_client) == 1
+    for key in keys.values():
+        assert not await redis_client.exists(key)
+
+
+async def test_job_scheduled_again_while_running_is_kept(
+    redis_client, keys, scheduler: JobScheduler
+):
+    """A job that schedules its own next run keeps it, whether it succeeds or fails."""
+    for outcome in ("done", "failed"):
+        job_id = f"test.job:{outcome}"
+
+        async def handler(data, job_id=job_id, outcome=outcome):
+            await scheduler.schedule_in("test.job", 60, {"next": True}, job_id=job_id)
+            if outcome == "failed":
+                raise RuntimeError("boom")
+
+        scheduler.register("test.job", handler)
+        await scheduler.schedule_in("test.job", 0, job_id=job_id)
+
+        assert await scheduler.run_due(redis_client) == 1
+        assert await redis_client.zscore(keys["SCHEDULED_KEY"], job_id) > time.time() * 1000
+        payload = json.loads(await redis_client.hget(keys["PAYLOADS_KEY"], job_id))
+        assert payload == {"name": "test.job", "data": {"next": True}, "attempts": 0}
+    assert await redis_client.zcard(keys["PROCESSING_KEY"]) == 0
+
+
+async def test_expired_lease_is_claimed_again(redis_client, keys, scheduler: JobScheduler):
+    """A job claimed by a worker that never acks runs again once its lease expires."""
+    job_id = await scheduler.schedule_in("test.job", 0, {"order_id": "1"})
+
+    assert [job.id for job in await scheduler._claim(redis_client, 10)] == [job_id]
+    assert await scheduler._claim(redis_client, 10) == []
+
+    await asyncio.sleep(LEASE_SECONDS + 0.1)
+    jobs = await scheduler._claim(redis_client, 10)
+    assert [(job.id, job.data, job.attempts) for job in jobs] == [(job_id, {"order_id": "1"}, 1)]
+
+
+async def test_job_whose_lease_keeps_expiring_is_dropped(
+    redis_client, keys, scheduler: JobScheduler
+):
+    """A job that takes its worker down every time is dropped after max attempts."""
+    job_id = await scheduler.schedule_in("test.job", 0, {"order_id": "1"})
+
+    for _ in range(scheduler.max_attempts):
+        assert [job.id for job in await scheduler._claim(redis_client, 10)] == [job_id]
+        await asyncio.sleep(LEASE_SECONDS + 0.1)
+
+    assert await scheduler._claim(redis_client, 10) == []
+    for key in keys.values():
+        assert not await redis_client.exists(key)
+
+
+async def test_job_cancelled_before_claim_is_skipped(redis_client, keys, scheduler: JobScheduler):
+    """A cancelled job is neither claimed nor run."""
+    job_id = await scheduler.schedule_in("test.job", 0, {"order_id": "1"})
+
+    assert await scheduler.cancel(job_id)
+    assert not await scheduler.cancel(job_id)
+    assert await scheduler.run_due(redis_client) == 0
+
+
+async def test_schedule_without_replace_keeps_existing_job(
+    redis_client, keys, scheduler: JobScheduler
+):
+    """``replace=False`` leaves a scheduled or running job as is."""
+    job_id = await scheduler.schedule_in("test.job", 60, job_id="test.job")
+    due = await redis_client.zscore(keys["SCHEDULED_KEY"], job_id)
+
+    await scheduler.schedule_in("test.job", 0, job_id=job_id, replace=False)
+    assert await redis_client.zscore(keys["SCHEDULED_KEY"], job_id) == due
+
+    await scheduler.schedule_in("test.job", 0, job_id=job_id)
+    assert [job.id for job in await scheduler._claim(redis_client, 10)] == [job_id]
+    await scheduler.schedule_in("test.job", 0, job_id=job_id, replace=False)
+    assert await redis_client.zcard(keys["SCHEDULED_KEY"]) == 0
@@ -0,0 +1,59 @@
+"""Tests for the durable password login lock (needs PostgreSQL and Redis)."""
+
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import delete, select, text
+from sqlalchemy.exc import DBAPIError
+
+from app.core.database import async_session_factory
+from app.core.security import hash_password_async
+from app.modules.auth.models import User
+from app.modules.auth.service import AuthService
+from app.modules.auth.services.login_attempts import MAX_FAILED_LOGIN_ATTEMPTS
+
+
+@pytest.fixture
+async def user(redis_client):
+    """User with a known password, skipped when the database is unreachable."""
+    phone = f"+225{uuid4().int % 10**10:010d}"
+    try:
+        async with async_session_factory() as db:
+            await db.execute(text("SELECT 1"))
+            user = User(phone=phone, password_hash=await hash_password_async("right-password"))
+            db.add(user)
+            await db.commit()
+    except (OSError, DBAPIError):
+        pytest.skip("PostgreSQL is not available")
+    yield user
+    async with async_session_factory() as db:
+        await db.execute(delete(User).where(User.id == user.id))
+        await db.commit()
+    await redis_client.delete(f"login_failures:{phone}", f"login_lock:{phone}")
+
+
+async def _failed_login(redis_client, phone: str) -> None:
+    """Bad password in a request session, rolled back like on an HTTP error."""
+    async with async_session_factory() as db:
+        with pytest.raises(ValueError):
+            await AuthService(db, redis_client).login_with_password(phone, "wrong-password")
+        await db.rollback()
+
+
+async def test_lock_is_persisted_when_the_request_rolls_back(redis_client, user: User):
+    """The lock triggered by the last failure survives the request rollback."""
+    for _ in range(MAX_FAILED_LOGIN_ATTEMPTS):
+        await _failed_login(redis_client, user.phone)
+
+    async with async_session_factory() as db:
+        row = (await db.execute(select(User).where(User.id == user.id))).scalar_one()
+    assert row.failed_login_attempts == MAX_FAILED_LOGIN_ATTEMPTS
+    assert row.locked_until is not None
+
+    # Still locked once the Redis lock window is gone
+    await redis_client.delete(f"login_lock:{user.phone}")
+    async with async_session_factory() as db:
+        with pytest.raises(ValueError, match="verrouillé"):
+            await AuthService(db, redis_client).login_with_password(
+                user.phone, "right-password"
+            )
@@ -0,0 +1,41 @@
+"""Tests for OTP attempt accounting under concurrent guesses (needs Redis)."""
+
+import asyncio
+from uuid import uuid4
+
+import pytest
+
+from app.modules.auth.services.otp_service import OTP_MAX_ATTEMPTS, OTPService
+
+
+@pytest.fixture
+def otp_service(redis_client) -> OTPService:
+    return OTPService(redis_client)
+
+
+async def test_parallel_guesses_cannot_exceed_max_attempts(otp_service: OTPService):
+    """Wrong guesses fired in parallel are counted atomically."""
+    phone = f"+225{uuid4().int % 10**10:010d}"
+    code, wait_time = await otp_service.generate_and_store(phone)
+    assert code and wait_time == 0
+
+    wrong = "0" * len(code) if code != "0" * len(code) else "1" * len(code)
+    results = await asyncio.gather(*(otp_service.verify(phone, wrong) for _ in range(20)))
+
+    incorrect = [message for ok, message in results if message.startswith("Code incorrect")]
+    assert not any(ok for ok, _ in results)
+    assert len(incorrect) == OTP_MAX_ATTEMPTS
+
+    # The code is burnt once the attempts are used up
+    assert await otp_service.verify(phone, code) == (False, "Code expiré ou invalide")
+
+
+async def test_parallel_generation_sends_one_code(otp_service: OTPService):
+    """Only one of several concurrent OTP requests gets a code."""
+    phone = f"+225{uuid4().int % 10**10:010d}"
+    results = await asyncio.gather(*(otp_service.generate_and_store(phone) for _ in range(10)))
+
+    codes = [code for code, _ in results if code]
+    assert len(codes) == 1
+    assert all(wait_time > 0 for code, wait_time in results if not code)
+    assert await otp_service.verify(phone, codes[0]) == (True, "")